@@ -19,6 +19,9 @@ from gloaks.api.models import Scan, ScanRequest, ScanResponse
 from gloaks.core.engine import GloaksEngine
 from gloaks.core.config import load_config
 from gloaks.core.database import create_db_and_tables, get_session
+from gloaks.core.geo_batch import geo_batcher
+from gloaks.core.scope import shared_validator
+from gloaks.modules.registry import registry
 
 logger = structlog.get_logger()
 
@@ -69,6 +72,7 @@ async def lifespan(app: FastAPI):
                 logger.info("Cancelling active scan", scan_id=scan_id)
                 task.cancel()
     
+    await geo_batcher.aclose()
     await app.state.http_client.aclose()
 
 app = FastAPI(title="Gloaks API", version="3.0.0", lifespan=lifespan)
@@ -106,6 +110,29 @@ async def get_api_key(api_key_header: str = Security(api_key_header)):
         status_code=HTTP_403_FORBIDDEN, detail="Could not validate credentials"
     )
 
+async def persist_partial_results(scan_id: str, target: str, updates: asyncio.Queue, session: AsyncSession):
+    """Write module results to the scan row as they arrive, until a None sentinel."""
+    modules = {}
+    while True:
+        batch = [await updates.get()]
+        # Coalesce results that arrived while the previous write was in flight
+        while not updates.empty():
+            batch.append(updates.get_nowait())
+
+        if None in batch:
+            # The final write happens in run_scan_task right after this
+            return
+
+        for name, data in batch:
+            modules[name] = data
+
+        scan = await session.get(Scan, scan_id)
+        if scan:
+            scan.results = {"target": target, "modules": dict(modules)}
+            scan.updated_at = datetime.utcnow()
+            session.add(scan)
+            await session.commit()
+
 async def run_scan_task(scan_id: str, target: str, config, http_client, session_factory):
     # Create cancellation token for this task
     token = asyncio.Event()
@@ -128,7 +155,23 @@ async def run_scan_task(scan_id: str, target: str, config, http_client, session_
             if token.is_set():
                  raise asyncio.CancelledError()
 
-            results = await engine.run(target, cancellation_token=token)
+            # Persist each module's result as it finishes so clients polling
+            # GET /scans/{id} see progress before the slowest module is done
+            updates: asyncio.Queue = asyncio.Queue()
+            persister = asyncio.create_task(persist_partial_results(scan_id, target, updates, session))
+
+            def on_event(event):
+                if event["type"] == "module":
+                    updates.put_nowait((event["module"], event["data"]))
+
+            try:
+                results = await engine.run(target, cancellation_token=token, on_event=on_event)
+            except asyncio.CancelledError:
+                persister.cancel()
+                raise
+            finally:
+                updates.put_nowait(None)
+                await asyncio.gather(persister, return_exceptions=True)
             
             scan = await session.get(Scan, scan_id)
             if scan:
@@ -136,7 +179,9 @@ async def run_scan_task(scan_id: str, target: str, config, http_client, session_
                     scan.status = "cancelled"
                 else:
                     scan.status = "completed"
-                    scan.results = results
+                # The engine returns whatever finished before a cancellation
+                # or deadline, so keep partial results either way
+                scan.results = results
                 scan.updated_at = datetime.utcnow()
                 session.add(scan)
                 await session.commit()
@@ -181,6 +226,23 @@ async def create_scan(
 ):
     scan_id = str(uuid.uuid4())
     config = load_config()
+
+    # Per-scan module selection, e.g. {"skip_modules": ["geolocation"]}
+    scan_options = request.config or {}
+    if "modules" in scan_options:
+        config.engine.modules = scan_options["modules"]
+    if "skip_modules" in scan_options:
+        config.engine.skip_modules = scan_options["skip_modules"]
+    try:
+        registry.select(config.engine.modules, config.engine.skip_modules)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    # The shared validator reloads the scope file when it is edited, so scope
+    # changes apply without restarting the server
+    if config.scope_file and config.block_out_of_scope:
+        if not await shared_validator(config.scope_file).is_target_allowed(request.target):
+            raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Target is not in the authorized scope")
     
     new_scan = Scan(
         id=scan_id,
@@ -239,9 +301,10 @@ async def cancel_scan(
         
     async with jobs_lock:
         if scan_id in cancellation_tokens:
+            # The engine cancels its in-flight modules itself and still
+            # returns partial results, so the task is left to finish
             cancellation_tokens[scan_id].set()
-        
-        if scan_id in running_tasks:
+        elif scan_id in running_tasks:
             running_tasks[scan_id].cancel()
         
     scan.status = "cancelling"
@@ -1,85 +1,150 @@
-import asyncio
 import click
-import structlog
-from gloaks.core.config import load_config
-from gloaks.core.logging_setup import configure_logging
-from gloaks.core.engine import GloaksEngine
-from gloaks.cli import output
 
-# Initialize logging immediately for CLI usage
-# User requested visible startup messages, so default to INFO
-configure_logging(level="INFO", log_format="console")
-logger = structlog.get_logger()
+# Keep this module's imports to click alone. Everything else (asyncio, the
+# engine, pydantic-settings, rich, structlog, and fastapi/uvicorn for `api`) is
+# imported inside the command that needs it, so `gloaks --help` and argument
+# errors return without paying for the whole stack.
+# tests/unit/test_cli_startup.py enforces this.
 
 @click.group()
 def cli():
     """Gloaks-CLI: Advanced Network Reconnaissance Tool"""
     pass
 
+def _split_names(ctx, param, value):
+    """Parse a comma-separated module list option."""
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+def _port_spec(ctx, param, value):
+    """Validate a --ports spec without importing the scanner."""
+    if value is None:
+        return None
+    from gloaks.utils.ports import parse_port_spec
+    try:
+        parse_port_spec(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    return value
+
+def _timing(ctx, param, value):
+    """Validate a --timing template name without importing the scanner."""
+    if value is None:
+        return None
+    from gloaks.core.timing import get_timing_template
+    try:
+        get_timing_template(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    return value
+
 @cli.command()
-@click.argument("target")
+@click.argument("target", required=False)
+@click.option("--targets-file", "-f", type=click.File("r"), help="Scan every target in a file, one per line ('-' for stdin); URLs and CIDR ranges are accepted")
+@click.option("--max-concurrent", type=click.IntRange(min=1), help="Maximum targets scanned at once in batch mode (per worker)")
+@click.option("--workers", "-w", type=click.IntRange(min=1), help="Shard batch scans across this many processes")
 @click.option("--config", "-c", type=click.Path(exists=True), help="Path to configuration file")
-@click.option("--output-file", "-o", help="Save results to JSON file")
+@click.option("--output-file", "-o", help="Save results to JSON file (JSON Lines in batch mode)")
 @click.option("--verbose", "-v", is_flag=True, help="Enable verbose logging")
 @click.option("--scope", "-s", type=click.Path(exists=True), help="Path to scope definition file")
-def scan(target: str, config: str, output_file: str, verbose: bool, scope: str):
-    """Scan a target domain or IP address."""
+@click.option("--modules", "-m", callback=_split_names, help="Comma-separated modules to run (default: all)")
+@click.option("--skip-modules", callback=_split_names, help="Comma-separated modules to leave out")
+@click.option("--ports", "-p", callback=_port_spec, help="Ports to scan, e.g. '1-1024,8080', 'top:100' or 'all'")
+@click.option("--timing", "-T", callback=_timing, help="Port scan timing template: paranoid, sneaky, polite, normal, aggressive, insane (or T0-T5)")
+@click.option("--banners", is_flag=True, help="Grab service banners on open ports")
+@click.option("--wordlist", type=click.Path(exists=True, dir_okay=False), help="Brute force subdomains from this wordlist")
+def scan(target: str, targets_file, max_concurrent: int, workers: int, config: str, output_file: str, verbose: bool, scope: str,
+         modules: list, skip_modules: list, ports: str, timing: str, banners: bool, wordlist: str):
+    """Scan a target domain or IP address, or a list of targets."""
+    if bool(target) == bool(targets_file):
+        raise click.UsageError("Provide either a TARGET or --targets-file.")
+
+    import asyncio
+    import structlog
+    from gloaks.cli import output
+    from gloaks.core.config import load_config
+    from gloaks.core.engine import GloaksEngine
+    from gloaks.core.logging_setup import configure_logging
+
     output.print_banner()
     
-    # Reconfigure logging based on verbosity
+    # Configure logging based on verbosity
     log_level = "DEBUG" if verbose else "INFO"
     configure_logging(level=log_level, log_format="console")
+    logger = structlog.get_logger()
     
     # Load configuration
     app_config = load_config(config)
-    
-    # Input Validation
-    from gloaks.utils.validators import InputValidator
-    is_valid, error_msg = InputValidator.validate_target(target)
-    if not is_valid:
-        output.console.print(f"[bold red]Security Error:[/bold red] {error_msg}")
-        return
+    if modules is not None:
+        app_config.engine.modules = modules
+    if skip_modules is not None:
+        app_config.engine.skip_modules = skip_modules
+    if ports:
+        app_config.port_scan.ports = ports
+    if timing:
+        app_config.port_scan.timing = timing
+    if banners:
+        app_config.port_scan.banners = True
+    if wordlist:
+        app_config.dns_enumeration.subdomain_wordlist = wordlist
+    if workers:
+        app_config.engine.workers = workers
+    # Worker processes configure their own logging from the config
+    app_config.log.level = log_level
+    app_config.log.format = "console"
+
+    # Fail on unknown module names before any scanning starts
+    from gloaks.modules.registry import registry
+    try:
+        registry.select(app_config.engine.modules, app_config.engine.skip_modules)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'--modules' / '--skip-modules'")
 
-    # Validate Scope
     from gloaks.core.scope import ScopeValidator
     validator = ScopeValidator(scope or app_config.scope_file)
-    
-    # Run async scope check
-    loop = asyncio.new_event_loop()
-    try:
-        is_allowed = loop.run_until_complete(validator.is_target_allowed(target))
-    finally:
-        loop.close()
 
-    if scope and not is_allowed:
-        output.console.print(f"[bold red]Error:[/bold red] Target '{target}' is not in the authorized scope.")
-        output.console.print(f"Scope file: {scope}")
-        return
+    from gloaks.utils.targets import parse_target
+    if not targets_file:
+        # URLs and host:port are reduced to the host; a CIDR range is scanned
+        # as a batch of its addresses
+        try:
+            parsed = parse_target(target)
+        except ValueError as e:
+            output.console.print(f"[bold red]Security Error:[/bold red] {e}")
+            return
+        if not isinstance(parsed, str):
+            targets_file = [target]
+        else:
+            target = parsed
 
+    if targets_file:
+        _scan_batch(targets_file, app_config, validator, scope, max_concurrent, output_file)
+        return
     
     # Initialize Engine
     engine = GloaksEngine(app_config)
     
-    # Run Async Loop
-    try:
-        results = asyncio.run(engine.run(target))
-        
-        # Render Results
-        modules = results.get("modules", {})
-        
+    # Run Async Loop, rendering each finding and module as soon as it arrives.
+    # The scope check shares the loop (and DNS cache) with the scan.
+    async def stream_scan():
+        if scope and not await validator.is_target_allowed(target):
+            return None
         output.console.rule("[bold blue]Scan Results")
-        
-        if "geolocation" in modules:
-            output.print_geolocation(modules["geolocation"])
-            
-        if "port_scan" in modules:
-            output.print_ports(modules["port_scan"])
-            
-        if "dns_enumeration" in modules:
-            output.print_dns_records(modules["dns_enumeration"])
+        async for event in engine.run_stream(target):
+            if event["type"] == "finding":
+                output.print_finding(event["module"], event["data"])
+            elif event["type"] == "module":
+                output.print_module_result(event["module"], event["data"])
+            else:
+                return event["results"]
 
-        if "http_analysis" in modules:
-            output.print_http_analysis(modules["http_analysis"])
+    try:
+        results = asyncio.run(stream_scan())
+        if results is None:
+            output.console.print(f"[bold red]Error:[/bold red] Target '{target}' is not in the authorized scope.")
+            output.console.print(f"Scope file: {scope}")
+            return
             
         if output_file:
             output.export_json(results, output_file)
@@ -88,6 +153,55 @@ def scan(target: str, config: str, output_file: str, verbose: bool, scope: str):
         logger.exception("Scan failed")
         click.echo(f"Error: {e}", err=True)
 
+def _scan_batch(targets_file, app_config, validator, scope: str, max_concurrent: int, output_file: str):
+    """Stream every target in ``targets_file`` through the engine.
+
+    Entries are normalised, deduplicated and CIDR ranges expanded as they are
+    read. Targets are scanned on this process's event loop, or sharded across
+    ``engine.workers`` processes when more than one is configured.
+    """
+    import asyncio
+    import structlog
+    from gloaks.cli import output
+    from gloaks.core.engine import GloaksEngine
+    from gloaks.utils.targets import aiter_targets
+
+    logger = structlog.get_logger()
+    engine = GloaksEngine(app_config)
+
+    def skip_invalid(entry: str, reason: str):
+        logger.warning("Skipping invalid target", target=entry, error=reason)
+
+    async def allowed_targets():
+        # Read on a thread so a slow file or stdin never blocks the scans
+        async for target in aiter_targets(targets_file, on_invalid=skip_invalid):
+            if scope and not await validator.is_target_allowed(target):
+                logger.warning("Skipping out-of-scope target", target=target)
+                continue
+
+            yield target
+
+    async def run_batch() -> int:
+        count = 0
+        with output.jsonl_writer(output_file) as write:
+            if app_config.engine.workers > 1:
+                results = engine.run_sharded(allowed_targets(), max_concurrent=max_concurrent)
+            else:
+                results = engine.run_many(allowed_targets(), max_concurrent=max_concurrent)
+            async for result in results:
+                output.print_batch_result(result)
+                write(result)
+                count += 1
+        return count
+
+    output.console.rule("[bold blue]Batch Scan Results")
+    try:
+        count = asyncio.run(run_batch())
+        output.console.print(f"[bold green]Scanned {count} target(s)[/bold green]")
+    except Exception as e:
+        logger.exception("Batch scan failed")
+        click.echo(f"Error: {e}", err=True)
+
 @cli.command()
 @click.option("--host", default="127.0.0.1", help="Host to bind to")
 @click.option("--port", default=8000, help="Port to bind to")
@@ -95,9 +209,87 @@ def scan(target: str, config: str, output_file: str, verbose: bool, scope: str):
 def api(host: str, port: int, reload: bool):
     """Start the Gloaks API server."""
     import uvicorn
+    from gloaks.cli import output
+    from gloaks.core.logging_setup import configure_logging
+
+    configure_logging(level="INFO", log_format="console")
     output.print_banner()
     output.console.print(f"[bold green]Starting API server on {host}:{port}[/bold green]")
     uvicorn.run("gloaks.api.app:app", host=host, port=port, reload=reload)
 
+@cli.group()
+def geodb():
+    """Manage the offline geolocation database."""
+    pass
+
+@geodb.command("build")
+@click.argument("csv_file", type=click.Path(exists=True, dir_okay=False))
+@click.argument("output_file", type=click.Path(dir_okay=False))
+def geodb_build(csv_file: str, output_file: str):
+    """Compile an IP range CSV into a database for the offline provider.
+
+    The CSV needs a header row naming either a 'network' (CIDR) column or
+    'start_ip' and 'end_ip' columns, plus any of country, city, isp, latitude
+    and longitude.
+    """
+    from gloaks.core.geodb import build_database, read_csv_ranges
+
+    try:
+        counts = build_database(read_csv_ranges(csv_file), output_file)
+    except (KeyError, ValueError) as e:
+        raise click.ClickException(f"Invalid geolocation CSV: {e}")
+    click.echo(
+        f"Wrote {output_file}: {counts['ipv4_ranges']} IPv4 and {counts['ipv6_ranges']} IPv6 ranges, "
+        f"{counts['locations']} locations"
+    )
+
+@cli.group("scope")
+def scope_group():
+    """Work with scope definition files."""
+    pass
+
+@scope_group.command("check")
+@click.argument("scope_file", type=click.Path(exists=True, dir_okay=False))
+@click.argument("targets_file", type=click.File("r"), default="-")
+@click.option("--concurrency", type=click.IntRange(min=1), default=200, show_default=True,
+              help="DNS lookups in flight at once")
+@click.option("--allowed-only", is_flag=True, help="Print only allowed targets, one per line")
+def scope_check(scope_file: str, targets_file, concurrency: int, allowed_only: bool):
+    """Check every target in TARGETS_FILE (default stdin) against SCOPE_FILE.
+
+    Targets are normalised like batch scan input (URLs reduced to their host,
+    CIDR ranges expanded, duplicates dropped). Prints one 'allowed' or 'denied' line per target as soon as it is decided
+    (not in input order) and a summary on stderr. With --allowed-only the
+    output can be piped straight into 'gloaks scan -f -'.
+    """
+    import asyncio
+    from gloaks.core.logging_setup import configure_logging
+    from gloaks.core.scope import ScopeValidator
+    from gloaks.utils.targets import aiter_targets
+
+    configure_logging(level="WARNING", log_format="console")
+    validator = ScopeValidator(scope_file)
+    counts = {"allowed": 0, "denied": 0, "invalid": 0}
+
+    def on_invalid(entry: str, reason: str):
+        counts["invalid"] += 1
+        if not allowed_only:
+            click.echo(f"invalid\t{entry}")
+
+    async def check():
+        targets = aiter_targets(targets_file, on_invalid=on_invalid)
+        async for target, allowed in validator.check_many(targets, concurrency=concurrency):
+            counts["allowed" if allowed else "denied"] += 1
+            if allowed_only:
+                if allowed:
+                    click.echo(target)
+            else:
+                click.echo(f"{'allowed' if allowed else 'denied'}\t{target}")
+
+    asyncio.run(check())
+    click.echo(
+        f"{counts['allowed']} allowed, {counts['denied']} denied, {counts['invalid']} invalid", err=True
+    )
+
 if __name__ == "__main__":
     cli()
@@ -1,11 +1,9 @@
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
-from rich.syntax import Syntax
-from rich.json import JSON
-from typing import Dict, Any, List
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
 import json
-import yaml
 
 console = Console()
 
@@ -52,9 +50,17 @@ def print_ports(data: Dict[str, Any]):
     table.add_column("Port", style="cyan")
     table.add_column("Protocol", style="magenta")
     table.add_column("State", style="green")
+    show_services = any("service" in port or "banner" in port for port in open_ports)
+    if show_services:
+        table.add_column("Service", style="white")
 
     for port in open_ports:
-        table.add_row(str(port["port"]), port["protocol"], port["state"])
+        row = [str(port["port"]), port["protocol"], port["state"]]
+        if show_services:
+            product = " ".join(filter(None, (port.get("product"), port.get("version"))))
+            service = port.get("service") or ""
+            row.append(f"{service} ({product})" if service and product else service or port.get("banner", ""))
+        table.add_row(*row)
     
     console.print(table)
 
@@ -65,17 +71,32 @@ def print_http_analysis(data: Dict[str, Any]):
         # console.print(f"[red]HTTP Analysis Error:[/red] {data['error']}")
         return
 
+    if data.get("status") == "skipped":
+        console.print(f"[yellow]HTTP analysis skipped:[/yellow] {data.get('reason')}")
+        return
+
     # Info Table
     info_table = Table(title="HTTP Analysis", show_header=False)
     info_table.add_row("URL", data.get("url"))
     info_table.add_row("Status", str(data.get("status_code")))
+    if "ttfb_ms" in data:
+        info_table.add_row("TTFB", f"{data['ttfb_ms']} ms")
+    # Every URL raced for this result, when there was more than one
+    probes = data.get("probes", [])
+    if len(probes) > 1:
+        for probe in probes:
+            outcome = probe.get("status_code") or probe.get("status") or probe.get("error")
+            info_table.add_row("Probe", f"{probe['url']} ({outcome})")
     console.print(info_table)
 
     # Technologies
-    if data.get("technologies"):
+    if data.get("technologies") or data.get("fingerprints"):
         console.print("[bold]Technologies Detected:[/bold]")
-        for tech in data["technologies"]:
+        for tech in data.get("technologies", []):
             console.print(f"  • {tech}")
+        for tech in data.get("fingerprints", []):
+            version = f" {tech['version']}" if tech.get("version") else ""
+            console.print(f"  • {tech['name']}{version} [dim]({tech.get('category')})[/dim]")
 
     # Security Headers
     sec_headers = data.get("security_headers", {})
@@ -100,6 +121,8 @@ def print_dns_records(data: Dict[str, Any]):
     table.add_column("Values", style="white")
     
     for rtype, values in data.items():
+        if rtype in ("subdomains", "subdomain_stats"):
+            continue
         if values:
             # Handle MX records dict
             if rtype == "MX":
@@ -110,8 +133,123 @@ def print_dns_records(data: Dict[str, Any]):
             
     console.print(table)
 
+    subdomains = data.get("subdomains")
+    if subdomains:
+        table = Table(title="Subdomains")
+        table.add_column("Name", style="cyan")
+        table.add_column("Addresses", style="white")
+        for entry in sorted(subdomains, key=lambda e: e["subdomain"]):
+            table.add_row(entry["subdomain"], ", ".join(entry["addresses"]))
+        console.print(table)
+    stats = data.get("subdomain_stats")
+    if stats and "error" in stats:
+        console.print(f"[yellow]Subdomains: {stats['error']}[/yellow]")
+    elif stats:
+        wildcard = f", {stats['wildcard_filtered']} wildcard answers dropped" if stats["wildcard_filtered"] else ""
+        console.print(f"[dim]Subdomains: {stats['found']} found in {stats['queried']} queries{wildcard}[/dim]")
+
+def print_tls(data: Dict[str, Any]):
+    """Print TLS endpoint details."""
+    endpoints = data.get("endpoints", [])
+    if not endpoints:
+        return
+
+    table = Table(title="TLS")
+    table.add_column("Port", style="cyan")
+    table.add_column("Protocol", style="white")
+    table.add_column("Cipher", style="white")
+    table.add_column("Expires", style="white")
+    table.add_column("Chain", style="white")
+    table.add_column("Issues", style="yellow")
+
+    for endpoint in endpoints:
+        if "error" in endpoint:
+            table.add_row(str(endpoint["port"]), f"[red]{endpoint['error']}[/red]", "", "", "", "")
+            continue
+        expires = endpoint.get("certificate", {}).get("not_after", "")[:10]
+        chain = " > ".join(
+            cert["subject"].get("commonName") or cert["subject"].get("organizationName") or "?"
+            for cert in endpoint.get("chain") or ()
+        )
+        table.add_row(
+            str(endpoint["port"]),
+            endpoint.get("protocol") or "",
+            endpoint.get("cipher") or "",
+            expires,
+            chain,
+            "; ".join(endpoint.get("issues", [])),
+        )
+    console.print(table)
+
+def print_finding(module: str, data: Dict[str, Any]):
+    """Print a single finding reported while its module is still running."""
+    if module == "port_scan":
+        console.print(f"[green]+[/green] Discovered open port [cyan]{data['port']}/{data['protocol']}[/cyan]")
+    elif module == "dns_enumeration" and "subdomain" in data:
+        console.print(f"[green]+[/green] Subdomain [cyan]{data['subdomain']}[/cyan] ({', '.join(data['addresses'])})")
+    elif module == "dns_enumeration":
+        values = [v["host"] if isinstance(v, dict) else v for v in data["values"]]
+        console.print(f"[green]+[/green] {data['record_type']} records: {', '.join(values)}")
+
+def print_module_result(module: str, data: Dict[str, Any]):
+    """Print a module's complete result section."""
+    if data.get("status") in ("cancelled", "timeout"):
+        console.print(f"[yellow]{module}: {data['status']}[/yellow]")
+        return
+
+    printer = MODULE_PRINTERS.get(module)
+    if printer:
+        printer(data)
+
+MODULE_PRINTERS = {
+    "geolocation": print_geolocation,
+    "port_scan": print_ports,
+    "dns_enumeration": print_dns_records,
+    "http_analysis": print_http_analysis,
+    "tls": print_tls,
+}
+
 def export_json(data: Dict[str, Any], filename: str):
     """Export results to JSON file."""
     with open(filename, "w") as f:
         json.dump(data, f, indent=2)
     console.print(f"[bold green]Results exported to {filename}[/bold green]")
+
+def print_batch_result(result: Dict[str, Any]):
+    """Print a one-line summary of a single target from a batch scan."""
+    modules = result.get("modules", {})
+    parts = []
+
+    ports = modules.get("port_scan", {}).get("open_ports", [])
+    parts.append("ports: " + (",".join(str(p["port"]) for p in ports) or "none"))
+
+    geo = modules.get("geolocation", {})
+    if geo.get("country"):
+        parts.append(f"country: {geo['country']}")
+
+    http = modules.get("http_analysis", {})
+    if "status_code" in http:
+        parts.append(f"http: {http['status_code']}")
+
+    errors = [name for name, data in modules.items() if isinstance(data, dict) and "error" in data]
+    if errors:
+        parts.append(f"[red]errors: {', '.join(errors)}[/red]")
+
+    console.print(f"[cyan]{result.get('target')}[/cyan]  " + "  ".join(parts))
+
+@contextmanager
+def jsonl_writer(filename: Optional[str]):
+    """Yield a callable that appends one result per line to ``filename``.
+
+    Results are written as they arrive so batch scans never hold the full
+    result set in memory. Without a filename the callable is a no-op.
+    """
+    if not filename:
+        yield lambda data: None
+        return
+
+    with open(filename, "w") as f:
+        def write(data: Dict[str, Any]):
+            f.write(json.dumps(data) + "\n")
+        yield write
+    console.print(f"[bold green]Results exported to {filename}[/bold green]")
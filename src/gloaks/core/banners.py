@@ -0,0 +1,115 @@
+import asyncio
+import re
+import socket
+from typing import Any, Dict, Optional
+
+# Sent when a service stays silent after connecting: most silent services on
+# scanned ports speak HTTP, and anything else just ignores or rejects it
+HTTP_PROBE = b"HEAD / HTTP/1.0\r\n\r\n"
+
+# Printable part of a banner kept in results
+MAX_BANNER_CHARS = 256
+
+_SSH = re.compile(r"^SSH-([\d.]+)-(\S+)(?: (.*))?")
+_HTTP_STATUS = re.compile(r"^HTTP/(\d\.\d) (\d{3})")
+_HTTP_SERVER = re.compile(r"^server:[ \t]*(.+?)\s*$", re.IGNORECASE | re.MULTILINE)
+_PRODUCT_VERSION = re.compile(r"([A-Za-z][\w.-]*?)[/ _-]v?(\d+(?:\.\d+)+[\w.-]*)")
+_SMTP = re.compile(r"^220[ -]\S+ .*\b(E?SMTP)\b\s*(.*)", re.IGNORECASE)
+_FTP = re.compile(r"^220[ -](.*FTP.*)", re.IGNORECASE)
+
+async def grab_banner(
+    sock: socket.socket, max_bytes: int, timeout: float, send_probe: bool = True
+) -> Optional[bytes]:
+    """Read what an open service says on an established connection.
+
+    Waits up to half of ``timeout`` for the service to speak first (SSH, SMTP,
+    FTP, ...). If it stays silent and ``send_probe`` is set, sends a minimal
+    HTTP request and reads the reply for the rest of the budget. At most
+    ``max_bytes`` are read in total.
+
+    Returns:
+        The bytes received, or None if the service sent nothing.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    data = await _read(sock, max_bytes, timeout / 2)
+    if not data and send_probe:
+        try:
+            await asyncio.wait_for(loop.sock_sendall(sock, HTTP_PROBE), timeout=max(0.0, deadline - loop.time()))
+        except (asyncio.TimeoutError, OSError):
+            return None
+        data = await _read(sock, max_bytes, max(0.0, deadline - loop.time()))
+    return data or None
+
+async def _read(sock: socket.socket, max_bytes: int, timeout: float) -> bytes:
+    """Read until ``max_bytes``, the peer closes, or ``timeout`` expires."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    data = b""
+    while len(data) < max_bytes:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            chunk = await asyncio.wait_for(loop.sock_recv(sock, max_bytes - len(data)), timeout=remaining)
+        except (asyncio.TimeoutError, OSError):
+            break
+        if not chunk:
+            break
+        data += chunk
+        # A line-oriented greeting is complete once it ends a line
+        if data.endswith(b"\n") and not data.startswith(b"HTTP/"):
+            break
+    return data
+
+def identify_service(data: bytes) -> Dict[str, Any]:
+    """Service hints from a banner.
+
+    Returns a dict with ``banner`` (the printable start of the data) and,
+    when recognised, ``service`` and ``product``/``version``.
+    """
+    text = data.decode("latin-1")
+    first_line = text.split("\n", 1)[0].strip()
+    hints: Dict[str, Any] = {"banner": "".join(c for c in first_line if c.isprintable())[:MAX_BANNER_CHARS]}
+
+    match = _SSH.match(text)
+    if match:
+        hints["service"] = "ssh"
+        hints.update(_product_version(match.group(2)))
+        return hints
+
+    match = _HTTP_STATUS.match(text)
+    if match:
+        hints["service"] = "http"
+        server = _HTTP_SERVER.search(text)
+        if server:
+            hints.update(_product_version(server.group(1)))
+        return hints
+
+    match = _SMTP.match(first_line)
+    if match:
+        hints["service"] = "smtp"
+        hints.update(_product_version(match.group(2)))
+        return hints
+
+    match = _FTP.match(first_line)
+    if match:
+        hints["service"] = "ftp"
+        hints.update(_product_version(match.group(1)))
+        return hints
+
+    if first_line.startswith("+OK"):
+        hints["service"] = "pop3"
+    elif first_line.startswith("* OK"):
+        hints["service"] = "imap"
+    return hints
+
+def _product_version(text: str) -> Dict[str, str]:
+    """``product`` and ``version`` from e.g. ``OpenSSH_8.9p1`` or ``nginx/1.25.3``."""
+    text = text.strip()
+    if not text:
+        return {}
+    match = _PRODUCT_VERSION.search(text)
+    if match:
+        return {"product": match.group(1), "version": match.group(2)}
+    return {"product": text.split()[0]}
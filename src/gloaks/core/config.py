@@ -1,5 +1,5 @@
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 import yaml
@@ -13,11 +13,114 @@ class GeolocationConfig(BaseSettings):
     provider: str = "ip-api"
     timeout: float = 5.0
     api_key: Optional[str] = None
+    # Lookups made within batch_window seconds of each other share one ip-api
+    # /batch request of up to batch_size addresses (0 sends one request each)
+    batch_window: float = 0.05
+    batch_size: int = 100
+    # Compiled database for provider "offline" (see `gloaks geodb build`)
+    database: Optional[str] = None
+    # Results are reused for cache_ttl seconds (0 disables caching) from an
+    # in-memory LRU and, with persistent_cache, the application database
+    cache_ttl: float = 86400.0
+    cache_size: int = 10000
+    persistent_cache: bool = False
+
+class HttpAnalysisConfig(BaseSettings):
+    timeout: float = 5.0
+    follow_redirects: bool = True
+    # Non-default web ports probed when the port scan finds them open
+    extra_http_ports: List[int] = [8080, 8000]
+    extra_https_ports: List[int] = [8443]
+    # "best" stops at the first URL that answers; "all" probes every candidate
+    probe_mode: str = "best"
+    # Happy Eyeballs head start (seconds) each candidate gets before the next
+    # one is started alongside it
+    fallback_delay: float = 0.25
+    # Response body bytes read for fingerprinting (0 = headers only); the rest
+    # of the body is never downloaded
+    max_body_bytes: int = 0
+    # Send HEAD first, falling back to GET if the server rejects it
+    head_first: bool = False
+
+class TlsConfig(BaseSettings):
+    # Ports assessed when open (or when no port scan ran)
+    ports: List[int] = [443, 8443]
+    timeout: float = 5.0
+    # Resume the first port's TLS session on the host's other ports
+    session_reuse: bool = True
+
+class DnsEnumerationConfig(BaseSettings):
+    # Wordlist of subdomain labels to brute force (one per line); off when unset
+    subdomain_wordlist: Optional[str] = None
+    # Brute force queries in flight at once
+    subdomain_window: int = 1000
+    # Resolvers for brute forcing, "ip" or "ip:port"; system resolvers if empty
+    nameservers: List[str] = []
+    query_timeout: float = 2.0
+    query_tries: int = 2
+    # Random names resolved to detect wildcard records (0 disables filtering)
+    wildcard_probes: int = 3
 
 class PortScanConfig(BaseSettings):
     default_ports: List[int] = [21, 22, 80, 443, 8080]
+    # Port spec overriding default_ports, e.g. "1-1024,8080", "top:100" or "all"
+    ports: Optional[str] = None
     timeout: float = 1.0
     concurrency: int = 50
+    # Timing template (paranoid, sneaky, polite, normal, aggressive, insane or
+    # T0-T5). When set, probe timeouts adapt to the measured RTT and replace
+    # the fixed timeout above, and filtered ports may be retransmitted.
+    timing: Optional[str] = None
+    # Read a banner on each open port's connection (sending a minimal HTTP
+    # request if the service stays silent) and report service hints
+    banners: bool = False
+    banner_probe: bool = True
+    banner_timeout: float = 2.0
+    banner_bytes: int = 512
+    banner_concurrency: int = 10
+
+class ResolverConfig(BaseSettings):
+    # Shared DNS cache used by scope checks, the engine and modules (seconds)
+    max_entries: int = 10000
+    default_ttl: float = 300.0
+    max_ttl: float = 3600.0
+    negative_ttl: float = 60.0
+
+class RateLimitConfig(BaseSettings):
+    # Requests per second (and burst size) allowed to any single target host
+    # and to any /ipv4_prefix or /ipv6_prefix network, summed over every
+    # module and concurrent scan in the process; 0 disables a limit
+    host_rate: float = 0.0
+    host_burst: float = 20.0
+    network_rate: float = 0.0
+    network_burst: float = 100.0
+    ipv4_prefix: int = 24
+    ipv6_prefix: int = 64
+    max_buckets: int = 10000
+
+class EngineConfig(BaseSettings):
+    # Upper bound on targets scanned at once by GloaksEngine.run_many
+    max_concurrent_targets: int = 10
+    # Deadlines in seconds (None = unbounded). Modules still running when their
+    # deadline passes return partial results or are cancelled.
+    scan_timeout: Optional[float] = None
+    module_timeout: Optional[float] = None
+    # Per-module overrides of module_timeout, keyed by module name
+    module_timeouts: Dict[str, float] = {}
+    # Module selection by name; None runs every registered module
+    modules: Optional[List[str]] = None
+    skip_modules: List[str] = []
+    # Worker processes for batch scans (1 = single event loop) and the number
+    # of targets handed to a worker at a time
+    workers: int = 1
+    shard_size: int = 64
+    # Run IP-level modules (port scan, geolocation) once per resolved address
+    # in batch scans, sharing the results between targets on that address;
+    # results are kept for the last ip_results_size addresses, for at most
+    # ip_results_ttl seconds
+    group_by_ip: bool = True
+    ip_results_size: int = 10000
+    ip_results_ttl: float = 300.0
 
 from pydantic_settings import BaseSettings, SettingsConfigDict, PydanticBaseSettingsSource, YamlConfigSettingsSource
 from typing import Type, Tuple, Dict, Any
@@ -27,6 +130,12 @@ class GloaksConfig(BaseSettings):
     log: LogConfig = Field(default_factory=LogConfig)
     geolocation: GeolocationConfig = Field(default_factory=GeolocationConfig)
     port_scan: PortScanConfig = Field(default_factory=PortScanConfig)
+    http_analysis: HttpAnalysisConfig = Field(default_factory=HttpAnalysisConfig)
+    tls: TlsConfig = Field(default_factory=TlsConfig)
+    dns_enumeration: DnsEnumerationConfig = Field(default_factory=DnsEnumerationConfig)
+    engine: EngineConfig = Field(default_factory=EngineConfig)
+    resolver: ResolverConfig = Field(default_factory=ResolverConfig)
+    rate_limit: RateLimitConfig = Field(default_factory=RateLimitConfig)
     scope_file: Optional[str] = None
 
     model_config = SettingsConfigDict(
@@ -179,6 +288,12 @@ class GloaksConfig(BaseSettings):
     log: LogConfig = Field(default_factory=LogConfig)
     geolocation: GeolocationConfig = Field(default_factory=GeolocationConfig)
     port_scan: PortScanConfig = Field(default_factory=PortScanConfig)
+    http_analysis: HttpAnalysisConfig = Field(default_factory=HttpAnalysisConfig)
+    tls: TlsConfig = Field(default_factory=TlsConfig)
+    dns_enumeration: DnsEnumerationConfig = Field(default_factory=DnsEnumerationConfig)
+    engine: EngineConfig = Field(default_factory=EngineConfig)
+    resolver: ResolverConfig = Field(default_factory=ResolverConfig)
+    rate_limit: RateLimitConfig = Field(default_factory=RateLimitConfig)
     scope_file: Optional[str] = None
 
     model_config = SettingsConfigDict(
@@ -1,94 +1,543 @@
 import asyncio
+import time
 import structlog
-from typing import List, Dict, Any, Type, Optional
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import (
+    List, Dict, Any, Type, Optional, Callable, Awaitable, Iterable, AsyncIterable, AsyncIterator, Set, Tuple, Union,
+)
+from pydantic import BaseModel
 from gloaks.core.config import GloaksConfig
+from gloaks.core.ratelimit import rate_limiter
+from gloaks.core.resolver import dns_cache
 from gloaks.modules.base import ReconModule
-from gloaks.modules.geolocation import GeolocationModule
-from gloaks.modules.port_scanner import PortScanModule
-from gloaks.modules.http_analysis import HttpAnalysisModule
-from gloaks.modules.dns_enum import DnsEnumModule
+from gloaks.modules.registry import registry
 
 logger = structlog.get_logger()
 
+# Artifacts produced by the engine itself before any module depends on them
+ENGINE_ARTIFACTS = ("resolved_ips",)
+
+# Seconds a module may overrun its deadline to return partial results before
+# the engine cancels it outright
+DEADLINE_GRACE = 0.5
+
+# Result, context artifacts and findings of one IP-scope module run
+AddressResult = Tuple[Dict[str, Any], Dict[str, Any], List[Dict[str, Any]]]
+
+class AddressResults:
+    """Runs of IP-scope modules shared by the targets of a batch.
+
+    Keyed by ``(module, address)``. A run in flight is shared as a task by
+    every target waiting on it, and cancelled once none is left. A complete
+    result is then kept for ``ttl`` seconds as plain data, so it outlives the
+    event loop and can be reused by later batches (e.g. the successive chunks
+    a shard worker scans). Runs that raise, and results that are partial,
+    timed out, cancelled or errors, are not kept: the next target runs the
+    module again. The ``max_entries`` most recently used addresses are kept.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        # A shared task, or (expiry time, result) once it completed
+        self._entries: "OrderedDict[Tuple[str, str], Union[asyncio.Task, Tuple[float, AddressResult]]]" = OrderedDict()
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(
+        self, key: Tuple[str, str], run: Callable[[], Awaitable[AddressResult]]
+    ) -> AddressResult:
+        """The result stored under ``key``, starting ``run()`` if there is none.
+
+        Cancelling the caller does not cancel a run other targets still wait on.
+        """
+        entry = self._entries.get(key)
+        if isinstance(entry, tuple) and entry[0] <= self._clock():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            entry = asyncio.create_task(run())
+            entry.add_done_callback(lambda task: self._settle(key, task))
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        if not isinstance(entry, asyncio.Task):
+            return entry[1]
+
+        self._waiters[entry] = self._waiters.get(entry, 0) + 1
+        try:
+            return await asyncio.shield(entry)
+        finally:
+            self._waiters[entry] -= 1
+            if not self._waiters[entry]:
+                del self._waiters[entry]
+                if not entry.done():
+                    entry.cancel()
+
+    def _settle(self, key: Tuple[str, str], task: asyncio.Task):
+        if self._entries.get(key) is not task:
+            return
+        if task.cancelled() or task.exception() is not None or not _complete(task.result()[0]):
+            del self._entries[key]
+        else:
+            self._entries[key] = (self._clock() + self.ttl, task.result())
+
+    def cancel(self):
+        """Cancel the runs still in flight, keeping completed results."""
+        for entry in list(self._entries.values()):
+            if isinstance(entry, asyncio.Task):
+                entry.cancel()
+
+def _complete(data: Dict[str, Any]) -> bool:
+    """Whether a module result is final, i.e. worth reusing for other targets."""
+    return not (data.get("partial") or "error" in data or data.get("status") in ("timeout", "cancelled"))
+
 class GloaksEngine:
-    def __init__(self, config: GloaksConfig, http_client: Optional[Any] = None):
+    def __init__(
+        self,
+        config: GloaksConfig,
+        http_client: Optional[Any] = None,
+        modules: Optional[List[str]] = None,
+        skip_modules: Optional[List[str]] = None,
+    ):
+        """
+        Args:
+            config: Application configuration.
+            http_client: Shared ``httpx.AsyncClient`` handed to modules that use one.
+            modules: Names of the modules to run; defaults to ``engine.modules``
+                from the config, or every registered module.
+            skip_modules: Names to leave out; defaults to ``engine.skip_modules``.
+
+        Raises:
+            ValueError: If a module name is not registered, or a module asked
+                for by name cannot be loaded.
+        """
         self.config = config
         self.http_client = http_client
         self.results = {}
+        dns_cache.configure(**config.resolver.model_dump())
+        rate_limiter.configure(**config.rate_limit.model_dump())
+
+        # Only the selected modules are imported, so e.g. a port-scan-only run
+        # never loads httpx
+        requested = modules if modules is not None else config.engine.modules
+        selected = registry.select(
+            requested,
+            skip_modules if skip_modules is not None else config.engine.skip_modules,
+        )
         self.modules: List[ReconModule] = [
-            GeolocationModule(),
-            PortScanModule(),
-            HttpAnalysisModule(http_client=http_client),
-            DnsEnumModule()
+            cls.from_config(config, http_client=http_client)
+            for cls in registry.load_selected(selected, explicit=requested is not None)
         ]
 
-    async def run(self, target: str, cancellation_token: Optional[asyncio.Event] = None) -> Dict[str, Any]:
-        """Run all registered modules against the target."""
+    async def run(
+        self,
+        target: str,
+        cancellation_token: Optional[asyncio.Event] = None,
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+        address_results: Optional[AddressResults] = None,
+    ) -> Dict[str, Any]:
+        """Run all registered modules against the target.
+
+        Modules are scheduled as a dependency graph: each one starts as soon as
+        the artifacts it ``requires`` have been settled, so independent modules
+        still run concurrently while e.g. HTTP analysis waits for the port scan.
+        The target is resolved once up front and the addresses are shared with
+        every module through the scan context.
+
+        Every module runs as its own task. Setting ``cancellation_token`` cancels
+        all of them immediately, and modules that outlive their deadline
+        (``engine.module_timeout`` / ``engine.scan_timeout``) are cancelled too.
+        Whatever finished in time is still returned, with ``status`` set to
+        ``cancelled`` or ``timeout`` on the scan and on each unfinished module.
+
+        ``on_event`` is called with every ``finding`` and ``module`` event as it
+        happens (see ``run_stream``), e.g. to persist partial results.
+
+        With ``address_results``, IP-scope modules reuse the result stored for
+        the target's address (or share the run in flight) instead of running
+        again; ``run_many`` passes one to every target of a batch.
+        """
         logger.info("Starting comprehensive scan", target=target)
         
         results = {
             "target": target,
             "modules": {}
         }
+
+        producers = self._check_dependencies()
+        context: Dict[str, Any] = {}
+        if on_event:
+            context["on_finding"] = lambda module_name, finding: on_event(
+                {"type": "finding", "target": target, "module": module_name, "data": finding}
+            )
+        settled = {artifact: asyncio.Event() for artifact in producers}
+
+        loop = asyncio.get_running_loop()
+        engine_config = self.config.engine
+        scan_deadline = loop.time() + engine_config.scan_timeout if engine_config.scan_timeout else None
+
+        async def resolve_wrapper():
+            try:
+                remaining = scan_deadline - loop.time() if scan_deadline else None
+                context["resolved_ips"] = await asyncio.wait_for(self._resolve_target(target), timeout=remaining)
+            except (asyncio.CancelledError, asyncio.TimeoutError):
+                logger.info("Target resolution did not finish", target=target)
+            finally:
+                settled["resolved_ips"].set()
         
         async def run_module_wrapper(module: ReconModule):
+            try:
+                for artifact in module.requires:
+                    if artifact in settled:
+                        await settled[artifact].wait()
+                name, data = await run_module(module)
+            except asyncio.CancelledError:
+                logger.info("Module cancelled", module=module.name)
+                name, data = module.name, {"status": "cancelled"}
+            finally:
+                for artifact in module.provides:
+                    settled[artifact].set()
+
+            if on_event:
+                on_event({"type": "module", "target": target, "module": name, "data": data})
+            return name, data
+
+        async def run_module(module: ReconModule):
             if cancellation_token and cancellation_token.is_set():
                 logger.info("Scan cancelled before module start", module=module.name)
                 return module.name, {"status": "cancelled"}
                 
             try:
-                # Extract module-specific config
-                module_config = {}
-                if module.name == "geolocation":
-                    module_config = self.config.geolocation.model_dump()
-                elif module.name == "port_scan":
-                    module_config = self.config.port_scan.model_dump()
-                
-                # Check cancellation again before running potentially long task
-                if cancellation_token and cancellation_token.is_set():
-                     return module.name, {"status": "cancelled"}
-
-                # Run the module
-                # Ideally, modules should also accept cancellation_token, 
-                # but for now we rely on them checking it or wrapper handling it
-                # or just standard task cancellation if we cancel the gather.
-                # But here we are using a token cooperatively.
-                
-                # To support TRUE cancellation, we might need to wrap in a task and cancel it 
-                # if the event is set, but here we just check before.
-                
-                data = await module.run(target, module_config)
+                # Extract module-specific config (the config section named after the module)
+                section = getattr(self.config, module.name, None)
+                module_config = section.model_dump() if isinstance(section, BaseModel) else {}
+
+                # Modules clamp their own timeouts to this deadline so they can
+                # return partial results; the engine only cancels them once the
+                # grace period after it has also passed.
+                deadline = self._module_deadline(module, loop.time(), scan_deadline)
+                hard_limit = None
+                if deadline is not None:
+                    module_config["deadline"] = deadline
+                    hard_limit = max(0.0, deadline - loop.time()) + DEADLINE_GRACE
+
+                data = await asyncio.wait_for(
+                    self._run_module(module, target, module_config, context, address_results), timeout=hard_limit
+                )
                 return module.name, data
             except asyncio.CancelledError:
                 logger.info("Module cancelled", module=module.name)
                 return module.name, {"status": "cancelled"}
+            except asyncio.TimeoutError:
+                logger.warning("Module exceeded its deadline", module=module.name)
+                return module.name, {"status": "timeout"}
             except Exception as e:
                 logger.exception("Module failed", module=module.name)
                 return module.name, {"error": str(e)}
 
-        # Run all modules concurrently
-        # We wrap in shield to allow us to handle cancellation manually if needed, 
-        # or just standard gather.
-        
-        tasks = [run_module_wrapper(m) for m in self.modules]
-        
-        # If using a token, we might want to wait for either tasks or token?
-        # But for now, the token is passed in.
+        tasks = [asyncio.create_task(run_module_wrapper(m)) for m in self.modules]
+        resolve_task = asyncio.create_task(resolve_wrapper())
+
+        watcher = None
+        if cancellation_token:
+            watcher = asyncio.create_task(self._cancel_on_token(cancellation_token, [resolve_task, *tasks]))
         
         try:
-            if cancellation_token:
-                # If we want to abort *immediately* on token set, we need to monitor it.
-                # But for this iteration, we check at start of wrappers. 
-                # To be more responsive, we'd need to modify modules.
-                pass
-                
-            module_results = await asyncio.gather(*tasks)
+            _, *module_results = await asyncio.gather(resolve_task, *tasks)
             
             for name, data in module_results:
                 results["modules"][name] = data
 
-            logger.info("Scan completed", target=target)
+            results["resolved_ips"] = context.get("resolved_ips", [])
+
+            if cancellation_token and cancellation_token.is_set():
+                results["status"] = "cancelled"
+            elif scan_deadline and loop.time() >= scan_deadline:
+                results["status"] = "timeout"
+
+            logger.info("Scan completed", target=target, status=results.get("status", "completed"))
             return results
         except asyncio.CancelledError:
             logger.info("Scan execution cancelled")
             raise
+        finally:
+            if watcher:
+                watcher.cancel()
+
+    async def run_stream(
+        self, target: str, cancellation_token: Optional[asyncio.Event] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run a scan and yield its events as soon as they happen.
+
+        Yields ``{"type": "finding", ...}`` for every individual discovery
+        (an open port, a set of DNS records), ``{"type": "module", ...}`` when a
+        module finishes, and finally ``{"type": "complete", "results": ...}``
+        carrying the same dictionary ``run`` would have returned. Closing the
+        generator early cancels the scan.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(self.run(target, cancellation_token, on_event=queue.put_nowait))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+
+            yield {"type": "complete", "target": target, "results": task.result()}
+        finally:
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+    @staticmethod
+    async def _cancel_on_token(token: asyncio.Event, tasks: List[asyncio.Task]):
+        """Cancel in-flight work as soon as the scan's token is set."""
+        await token.wait()
+        logger.info("Cancellation requested, stopping in-flight modules")
+        for task in tasks:
+            task.cancel()
+
+    async def _run_module(
+        self,
+        module: ReconModule,
+        target: str,
+        config: Dict[str, Any],
+        context: Dict[str, Any],
+        address_results: Optional[AddressResults],
+    ) -> Dict[str, Any]:
+        """Run ``module`` for one target, sharing IP-scope runs through ``address_results``.
+
+        An ``ip`` module whose target resolved to an address already scanned
+        (or being scanned) waits for that run instead of repeating it, then
+        receives a copy of its result, the artifacts it put into the context
+        and its findings.
+        """
+        addresses = context.get("resolved_ips")
+        if address_results is None or module.scope != "ip" or not addresses:
+            return await module.run(target, config, context)
+
+        data, artifacts, findings = await address_results.get(
+            (module.name, addresses[0]), lambda: self._run_for_address(module, config, context)
+        )
+        context.update(artifacts)
+        for finding in findings:
+            module.emit(context, finding)
+        return dict(data)
+
+    @staticmethod
+    async def _run_for_address(
+        module: ReconModule, config: Dict[str, Any], context: Dict[str, Any]
+    ) -> AddressResult:
+        """Run an IP-scope module against the first resolved address alone.
+
+        Returns its result, the artifacts it added to the context and the
+        findings it emitted, to be replayed on every target sharing the address.
+        """
+        findings: List[Dict[str, Any]] = []
+        private = {artifact: context[artifact] for artifact in module.requires if artifact in context}
+        private["on_finding"] = lambda _, finding: findings.append(finding)
+        # The run is shielded from its waiters' own limits, so enforce the
+        # deadline it was started with here
+        deadline = config.get("deadline")
+        hard_limit = None
+        if deadline is not None:
+            hard_limit = max(0.0, deadline - asyncio.get_running_loop().time()) + DEADLINE_GRACE
+        data = await asyncio.wait_for(
+            module.run(context["resolved_ips"][0], config, private), timeout=hard_limit
+        )
+        artifacts = {k: v for k, v in private.items() if k != "on_finding" and k not in module.requires}
+        return data, artifacts, findings
+
+    def _module_deadline(self, module: ReconModule, now: float, scan_deadline: Optional[float]) -> Optional[float]:
+        """Earliest of the module's own timeout and the whole-scan deadline."""
+        engine_config = self.config.engine
+        timeout = engine_config.module_timeouts.get(module.name, engine_config.module_timeout)
+        deadlines = [d for d in (scan_deadline, now + timeout if timeout else None) if d is not None]
+        return min(deadlines) if deadlines else None
+
+    def _check_dependencies(self) -> Dict[str, str]:
+        """Map every artifact available in a scan to its producer.
+
+        Raises:
+            ValueError: If an artifact has two producers or the modules'
+                requirements form a cycle (which would deadlock the scan).
+        """
+        producers = {artifact: "engine" for artifact in ENGINE_ARTIFACTS}
+        for module in self.modules:
+            for artifact in module.provides:
+                if artifact in producers:
+                    raise ValueError(
+                        f"Artifact '{artifact}' is provided by both '{producers[artifact]}' and '{module.name}'"
+                    )
+                producers[artifact] = module.name
+
+        by_name = {module.name: module for module in self.modules}
+        visiting: Set[str] = set()
+        visited: Set[str] = set()
+
+        def visit(module: ReconModule):
+            if module.name in visited:
+                return
+            if module.name in visiting:
+                raise ValueError(f"Module dependency cycle involving '{module.name}'")
+            visiting.add(module.name)
+            for artifact in module.requires:
+                upstream = by_name.get(producers.get(artifact))
+                if upstream is not None:
+                    visit(upstream)
+            visiting.discard(module.name)
+            visited.add(module.name)
+
+        for module in self.modules:
+            visit(module)
+        return producers
+
+    async def _resolve_target(self, target: str) -> List[str]:
+        """Resolve the target once so modules do not each repeat the lookup."""
+        return await dns_cache.resolve(target)
+
+    async def run_many(
+        self,
+        targets: Union[Iterable[str], AsyncIterable[str]],
+        max_concurrent: Optional[int] = None,
+        cancellation_token: Optional[asyncio.Event] = None,
+        address_results: Optional[AddressResults] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Scan many targets on a single event loop.
+
+        Targets are pulled lazily, so the input may be an arbitrarily large
+        iterator (e.g. a file or stdin). At most ``max_concurrent`` targets are
+        in flight at once and all of them share this engine's modules and HTTP
+        client. Results are yielded as each target completes, which is not
+        necessarily input order.
+
+        With ``engine.group_by_ip``, IP-scope modules (port scan, geolocation)
+        run once per resolved address and their results are shared by every
+        target on it; host-scope modules (HTTP, DNS, TLS) still run per name.
+        Results are kept in ``address_results`` when given, so they carry over
+        to later calls, or else for this call only.
+        """
+        limit = max_concurrent or self.config.engine.max_concurrent_targets
+        if limit < 1:
+            raise ValueError("max_concurrent must be at least 1")
+
+        logger.info("Starting batch scan", max_concurrent=limit)
+
+        if address_results is None and self.config.engine.group_by_ip:
+            address_results = AddressResults(self.config.engine.ip_results_size, self.config.engine.ip_results_ttl)
+        hits = address_results.hits if address_results is not None else 0
+        async with self._shared_http_client():
+            source = _aiter_targets(targets)
+            pending: Set[asyncio.Task] = set()
+            exhausted = False
+            try:
+                while True:
+                    # Top up the in-flight window before waiting on anything
+                    while not exhausted and len(pending) < limit:
+                        if cancellation_token and cancellation_token.is_set():
+                            exhausted = True
+                            break
+                        try:
+                            target = await source.__anext__()
+                        except StopAsyncIteration:
+                            exhausted = True
+                            break
+                        pending.add(asyncio.create_task(
+                            self.run(target, cancellation_token, address_results=address_results)
+                        ))
+
+                    if not pending:
+                        break
+
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+            finally:
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    await asyncio.gather(*pending, return_exceptions=True)
+                # Address runs are shielded from their targets, so stop any left
+                if address_results is not None:
+                    address_results.cancel()
+
+        shared = address_results.hits - hits if address_results is not None else 0
+        logger.info("Batch scan completed", shared_address_results=shared)
+
+    async def run_sharded(
+        self,
+        targets: Union[Iterable[str], AsyncIterable[str]],
+        workers: Optional[int] = None,
+        max_concurrent: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Scan many targets across a pool of worker processes.
+
+        Targets are cut into chunks of ``chunk_size`` (``engine.shard_size``)
+        and each chunk is scanned by ``run_many`` in a worker process with its
+        own event loop and engine, built from this engine's config and module
+        selection. ``max_concurrent`` applies per worker. Unlike ``run_many``,
+        results are yielded in input order.
+        """
+        workers = workers if workers is not None else self.config.engine.workers
+        chunk_size = chunk_size if chunk_size is not None else self.config.engine.shard_size
+        if workers < 1 or chunk_size < 1:
+            raise ValueError("workers and chunk_size must be at least 1")
+
+        from gloaks.core.sharding import run_sharded
+
+        logger.info("Starting sharded batch scan", workers=workers, chunk_size=chunk_size)
+        async for result in run_sharded(self, _aiter_targets(targets), workers, chunk_size, max_concurrent):
+            yield result
+        logger.info("Sharded batch scan completed")
+
+    @asynccontextmanager
+    async def _shared_http_client(self):
+        """Provide one HTTP client for every module for the duration of a batch.
+
+        A client passed to the constructor (e.g. the API's app-wide client) is
+        used as-is; otherwise one is created here and closed afterwards, unless
+        none of the selected modules makes HTTP requests.
+        """
+        if self.http_client is not None or not any(hasattr(m, "http_client") for m in self.modules):
+            yield self.http_client
+            return
+
+        import httpx
+
+        async with httpx.AsyncClient(verify=True, follow_redirects=True) as client:
+            self._bind_http_client(client)
+            try:
+                yield client
+            finally:
+                self._bind_http_client(None)
+
+    def _bind_http_client(self, client: Optional[Any]):
+        for module in self.modules:
+            if hasattr(module, "http_client"):
+                module.http_client = client
+
+
+async def _aiter_targets(targets: Union[Iterable[str], AsyncIterable[str]]) -> AsyncIterator[str]:
+    """Iterate sync and async target sources uniformly."""
+    if hasattr(targets, "__aiter__"):
+        async for target in targets:
+            yield target
+    else:
+        for target in targets:
+            yield target
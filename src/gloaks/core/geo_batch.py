@@ -0,0 +1,157 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+import structlog
+
+logger = structlog.get_logger()
+
+class _Batch:
+    """Lookups waiting for one batch request."""
+
+    def __init__(self):
+        # query -> future shared by every caller asking for it, and the
+        # number of callers still waiting on it
+        self.futures: Dict[str, asyncio.Future] = {}
+        self.waiters: Dict[str, int] = {}
+        self.timeout = 0.0
+        self.client: Any = None
+
+class GeoBatcher:
+    """Process-wide coalescer for ip-api ``/batch`` lookups.
+
+    Lookups arriving within ``window`` seconds of the first one in a batch are
+    sent together as a single POST of up to ``max_batch`` queries (ip-api
+    accepts 100), and each caller gets its own record back. Concurrent scans
+    and every target of a batch run therefore share requests, which is what
+    keeps the free tier's rate limit out of reach.
+    """
+
+    def __init__(self, window: float = 0.05, max_batch: int = 100):
+        self.window = window
+        self.max_batch = max_batch
+        # Open batches per event loop and endpoint
+        self._open: Dict[Tuple[asyncio.AbstractEventLoop, str], _Batch] = {}
+        # Flush and send tasks, referenced until done so they are not collected
+        self._tasks: Set[asyncio.Task] = set()
+        self.requests = 0
+        self.lookups = 0
+
+    def configure(self, window: Optional[float] = None, max_batch: Optional[int] = None):
+        if window is not None:
+            self.window = window
+        if max_batch is not None:
+            self.max_batch = max_batch
+
+    async def lookup(self, query: str, url: str, timeout: float, client: Any = None) -> Dict[str, Any]:
+        """Geolocate ``query`` (an IP or hostname) as part of a batch sent to ``url``.
+
+        Args:
+            query: Address to look up.
+            url: Batch endpoint, including the API key if any.
+            timeout: Seconds to wait for the answer.
+            client: ``httpx.AsyncClient`` to send the batch with; a temporary
+                one is used when None.
+
+        Returns:
+            The provider's record for ``query``.
+
+        Raises:
+            httpx.RequestError / httpx.HTTPStatusError: If the batch request failed.
+            ValueError: If the batch response was not one record per query.
+            asyncio.TimeoutError: If no answer arrived within ``timeout``.
+        """
+        loop = asyncio.get_running_loop()
+        key = (loop, url)
+        batch = self._open.get(key)
+        if batch is None:
+            batch = self._open[key] = _Batch()
+            self._spawn(self._flush_later(key, batch))
+
+        self.lookups += 1
+        future = batch.futures.get(query)
+        if future is None or future.cancelled():
+            future = batch.futures[query] = loop.create_future()
+        batch.timeout = max(batch.timeout, timeout)
+        if batch.client is None:
+            batch.client = client
+
+        if len(batch.futures) >= self.max_batch:
+            self._close(key, batch)
+            self._spawn(self._send(url, batch))
+
+        # Shielded: one caller timing out must not cancel the answer for others.
+        # Once the last one gives up, the future is cancelled so a late answer
+        # or error is not left unretrieved.
+        batch.waiters[query] = batch.waiters.get(query, 0) + 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        finally:
+            batch.waiters[query] -= 1
+            if not batch.waiters[query] and not future.done():
+                future.cancel()
+
+    def _spawn(self, coro: Any):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def aclose(self):
+        """Cancel pending flushes and sends on this loop (e.g. at shutdown)."""
+        loop = asyncio.get_running_loop()
+        tasks = [task for task in self._tasks if task.get_loop() is loop]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for key in [key for key in self._open if key[0] is loop]:
+            batch = self._open.pop(key)
+            for future in batch.futures.values():
+                future.cancel()
+
+    def _close(self, key: Tuple[asyncio.AbstractEventLoop, str], batch: _Batch):
+        """Stop ``batch`` from taking more lookups."""
+        if self._open.get(key) is batch:
+            del self._open[key]
+
+    async def _flush_later(self, key: Tuple[asyncio.AbstractEventLoop, str], batch: _Batch):
+        await asyncio.sleep(self.window)
+        # A batch that filled up early has already been sent
+        if self._open.get(key) is batch:
+            self._close(key, batch)
+            await self._send(key[1], batch)
+
+    async def _send(self, url: str, batch: _Batch):
+        queries = list(batch.futures)
+        self.requests += 1
+        logger.debug("Sending geolocation batch", size=len(queries))
+        try:
+            if batch.client is not None:
+                records = await self._post(batch.client, url, queries, batch.timeout)
+            else:
+                import httpx
+                async with httpx.AsyncClient() as client:
+                    records = await self._post(client, url, queries, batch.timeout)
+            # Records come back in request order, one per query
+            if not isinstance(records, list) or len(records) != len(queries):
+                raise ValueError(
+                    f"Malformed batch response: expected {len(queries)} records, "
+                    f"got {len(records) if isinstance(records, list) else type(records).__name__}"
+                )
+        except Exception as exc:
+            logger.debug("Geolocation batch failed", size=len(queries), error=str(exc))
+            for future in batch.futures.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for query, record in zip(queries, records):
+            future = batch.futures[query]
+            if not future.done():
+                future.set_result(record)
+
+    @staticmethod
+    async def _post(client: Any, url: str, queries: List[str], timeout: float) -> List[Dict[str, Any]]:
+        response = await client.post(url, json=queries, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+# Shared by every geolocation lookup in the process
+geo_batcher = GeoBatcher()
@@ -0,0 +1,126 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+import structlog
+
+logger = structlog.get_logger()
+
+class GeoCache:
+    """Process-wide two-tier cache of geolocation results, keyed by IP.
+
+    Lookups check an in-memory LRU first, then (when ``persistent``) the
+    ``geo_cache`` table of the application database, so repeat scans of the
+    same hosts skip the provider as long as results are younger than ``ttl``
+    seconds. A failing database degrades to the memory tier alone.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl: float = 86400.0,
+        persistent: bool = False,
+        store: Any = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persistent = persistent
+        self._store = store
+        self._clock = clock
+        # ip -> (expires_at, record)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def configure(self, **settings: Any):
+        """Apply ``GeolocationConfig`` cache values to the shared cache."""
+        for key, value in settings.items():
+            if not hasattr(self, key):
+                raise ValueError(f"Unknown geolocation cache setting: {key}")
+            setattr(self, key, value)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    @property
+    def store(self) -> Any:
+        # sqlmodel is only imported once the persistent tier is actually used
+        if self._store is None:
+            from gloaks.core.geo_store import SqlGeoStore
+            self._store = SqlGeoStore()
+        return self._store
+
+    async def get(self, ip: str) -> Optional[Dict[str, Any]]:
+        """Fresh cached record for ``ip``, or None."""
+        record, _ = await self.lookup(ip)
+        return record
+
+    async def lookup(self, ip: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        """Like ``get``, also naming the tier that answered: ``memory``, ``persistent`` or ``miss``."""
+        now = self._clock()
+        entry = self._entries.get(ip)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(ip)
+                self.memory_hits += 1
+                return dict(entry[1]), "memory"
+            del self._entries[ip]
+
+        if self.persistent:
+            try:
+                stored = await self.store.load(ip)
+            except Exception as e:
+                logger.warning("Geolocation cache lookup failed", ip=ip, error=str(e))
+                stored = None
+            if stored is not None:
+                record, fetched_at = stored
+                expires_at = self._timestamp(fetched_at) + self.ttl
+                if expires_at > now:
+                    self.persistent_hits += 1
+                    self._remember(ip, record, expires_at)
+                    return dict(record), "persistent"
+
+        self.misses += 1
+        return None, "miss"
+
+    def stats(self) -> Dict[str, int]:
+        """Process-wide hit and miss counters and the memory tier's size."""
+        return {
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+        }
+
+    async def put(self, ip: str, record: Dict[str, Any]):
+        """Cache a freshly fetched record in both tiers."""
+        now = self._clock()
+        self._remember(ip, record, now + self.ttl)
+        if self.persistent:
+            try:
+                await self.store.save(ip, record, datetime.fromtimestamp(now, timezone.utc).replace(tzinfo=None))
+            except Exception as e:
+                logger.warning("Geolocation cache write failed", ip=ip, error=str(e))
+
+    def _remember(self, ip: str, record: Dict[str, Any], expires_at: float):
+        if self.ttl <= 0:
+            return
+        self._entries[ip] = (expires_at, dict(record))
+        self._entries.move_to_end(ip)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _timestamp(fetched_at: datetime) -> float:
+        # Stored as naive UTC, like the rest of the database
+        return fetched_at.replace(tzinfo=timezone.utc).timestamp()
+
+# Shared by every geolocation lookup in the process
+geo_cache = GeoCache()
@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import JSON, Column, Field, SQLModel
+
+class GeoCacheEntry(SQLModel, table=True):
+    __tablename__ = "geo_cache"
+
+    ip: str = Field(primary_key=True)
+    data: Dict[str, Any] = Field(sa_column=Column(JSON))
+    fetched_at: datetime = Field(default_factory=datetime.utcnow)
+
+class SqlGeoStore:
+    """Persistent geolocation cache tier in the application database."""
+
+    def __init__(self, engine: Optional[AsyncEngine] = None):
+        if engine is None:
+            from gloaks.core.database import engine
+        self.engine = engine
+        self._session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        self._table_ready = False
+
+    async def _ensure_table(self):
+        if not self._table_ready:
+            async with self.engine.begin() as conn:
+                await conn.run_sync(SQLModel.metadata.create_all, tables=[GeoCacheEntry.__table__])
+            self._table_ready = True
+
+    async def load(self, ip: str) -> Optional[Tuple[Dict[str, Any], datetime]]:
+        """Stored record for ``ip`` and when it was fetched, if any."""
+        await self._ensure_table()
+        async with self._session() as session:
+            entry = await session.get(GeoCacheEntry, ip)
+            return (entry.data, entry.fetched_at) if entry else None
+
+    async def save(self, ip: str, data: Dict[str, Any], fetched_at: datetime):
+        await self._ensure_table()
+        async with self._session() as session:
+            await session.merge(GeoCacheEntry(ip=ip, data=data, fetched_at=fetched_at))
+            await session.commit()
@@ -0,0 +1,172 @@
+import csv
+import ipaddress
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# File layout, all big-endian:
+#   header     magic, version, IPv4 range count, IPv6 range count,
+#              location count, string blob size
+#   IPv4 table (start u32, end u32, location u32), sorted by start
+#   IPv6 table (start 16s, end 16s, location u32), sorted by start
+#   locations  (lat f64, lon f64, string offset u32, string length u32)
+#   strings    UTF-8 "country\x1fcity\x1fisp" per location
+# Big-endian addresses compare as bytes in numeric order, so the tables can be
+# binary searched straight out of the memory map without unpacking them.
+MAGIC = b"GLKGEODB"
+VERSION = 1
+_HEADER = struct.Struct(">8sHxxIIII")
+_V4_RANGE = struct.Struct(">III")
+_V6_RANGE = struct.Struct(">16s16sI")
+_LOCATION = struct.Struct(">ddII")
+_SEPARATOR = "\x1f"
+
+Location = Tuple[str, str, str, float, float]
+
+class GeoDatabase:
+    """Read-only, memory-mapped IP range geolocation database.
+
+    Lookups binary search the packed range tables in place, so opening a
+    database costs no parsing and worker processes mapping the same file share
+    its pages.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size:
+            raise ValueError(f"{path} is not a gloaks geolocation database")
+        magic, version, self.v4_count, self.v6_count, location_count, _ = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a gloaks geolocation database")
+        if version != VERSION:
+            raise ValueError(f"{path} has unsupported database version {version}")
+        self._v4_offset = _HEADER.size
+        self._v6_offset = self._v4_offset + self.v4_count * _V4_RANGE.size
+        self._locations_offset = self._v6_offset + self.v6_count * _V6_RANGE.size
+        self._strings_offset = self._locations_offset + location_count * _LOCATION.size
+
+    def close(self):
+        self._map.close()
+
+    def lookup(self, ip: str) -> Optional[Dict[str, Any]]:
+        """Location of ``ip``, or None if no range covers it.
+
+        Raises:
+            ValueError: If ``ip`` is not an IP address.
+        """
+        address = ipaddress.ip_address(ip)
+        if address.version == 4:
+            location = self._search(int(address), self._v4_offset, self.v4_count, _V4_RANGE)
+        else:
+            location = self._search(address.packed, self._v6_offset, self.v6_count, _V6_RANGE)
+        if location is None:
+            return None
+
+        lat, lon, string_offset, string_length = _LOCATION.unpack_from(
+            self._map, self._locations_offset + location * _LOCATION.size
+        )
+        start = self._strings_offset + string_offset
+        country, city, isp = self._map[start:start + string_length].decode("utf-8").split(_SEPARATOR)
+        return {"country": country or None, "city": city or None, "isp": isp or None, "lat": lat, "lon": lon, "ip": ip}
+
+    def _search(self, key: Any, offset: int, count: int, record: struct.Struct) -> Optional[int]:
+        """Index of the location whose range contains ``key``."""
+        # Find the last range starting at or before key
+        low, high = 0, count
+        while low < high:
+            mid = (low + high) // 2
+            if record.unpack_from(self._map, offset + mid * record.size)[0] <= key:
+                low = mid + 1
+            else:
+                high = mid
+        if low == 0:
+            return None
+        _, end, location = record.unpack_from(self._map, offset + (low - 1) * record.size)
+        return location if key <= end else None
+
+# Databases opened by this process, by path
+_open_databases: Dict[str, GeoDatabase] = {}
+
+def open_database(path: str) -> GeoDatabase:
+    """Shared ``GeoDatabase`` for ``path``, mapped once per process."""
+    database = _open_databases.get(path)
+    if database is None:
+        database = _open_databases[path] = GeoDatabase(path)
+    return database
+
+def build_database(
+    ranges: Iterable[Tuple[str, str, Location]], path: str
+) -> Dict[str, int]:
+    """Compile ``(start_ip, end_ip, location)`` ranges into a database file.
+
+    ``location`` is ``(country, city, isp, lat, lon)``. The file is written
+    next to ``path`` and moved into place, so processes with the old file
+    mapped keep reading it undisturbed.
+
+    Returns:
+        Counts of IPv4 and IPv6 ranges and distinct locations written.
+
+    Raises:
+        ValueError: On invalid addresses, mixed-family or inverted ranges, or
+            overlapping ranges.
+    """
+    locations: Dict[Location, int] = {}
+    v4: List[Tuple[int, int, int]] = []
+    v6: List[Tuple[int, int, int]] = []
+    for start_ip, end_ip, location in ranges:
+        start, end = ipaddress.ip_address(start_ip), ipaddress.ip_address(end_ip)
+        if start.version != end.version or int(start) > int(end):
+            raise ValueError(f"Invalid range {start_ip} - {end_ip}")
+        index = locations.setdefault(location, len(locations))
+        (v4 if start.version == 4 else v6).append((int(start), int(end), index))
+
+    for table in (v4, v6):
+        table.sort()
+        for previous, current in zip(table, table[1:]):
+            if current[0] <= previous[1]:
+                raise ValueError(
+                    f"Overlapping ranges starting at {ipaddress.ip_address(previous[0])} "
+                    f"and {ipaddress.ip_address(current[0])}"
+                )
+
+    strings = bytearray()
+    location_table = bytearray()
+    for country, city, isp, lat, lon in locations:
+        encoded = _SEPARATOR.join(value or "" for value in (country, city, isp)).encode("utf-8")
+        location_table += _LOCATION.pack(float(lat or 0.0), float(lon or 0.0), len(strings), len(encoded))
+        strings += encoded
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(v4), len(v6), len(locations), len(strings)))
+        for start, end, index in v4:
+            f.write(_V4_RANGE.pack(start, end, index))
+        for start, end, index in v6:
+            f.write(_V6_RANGE.pack(start.to_bytes(16, "big"), end.to_bytes(16, "big"), index))
+        f.write(location_table)
+        f.write(strings)
+    os.replace(tmp_path, path)
+    return {"ipv4_ranges": len(v4), "ipv6_ranges": len(v6), "locations": len(locations)}
+
+def read_csv_ranges(path: str) -> Iterable[Tuple[str, str, Location]]:
+    """Ranges from a CSV file with a header row.
+
+    Each row gives either a ``network`` (CIDR) or ``start_ip`` and ``end_ip``,
+    plus any of ``country``, ``city``, ``isp``, ``latitude``/``lat`` and
+    ``longitude``/``lon``.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("network"):
+                network = ipaddress.ip_network(row["network"].strip(), strict=False)
+                start_ip, end_ip = str(network.network_address), str(network.broadcast_address)
+            else:
+                start_ip, end_ip = row["start_ip"].strip(), row["end_ip"].strip()
+            lat = row.get("latitude") or row.get("lat") or 0.0
+            lon = row.get("longitude") or row.get("lon") or 0.0
+            yield start_ip, end_ip, (
+                row.get("country") or "", row.get("city") or "", row.get("isp") or "", float(lat), float(lon)
+            )
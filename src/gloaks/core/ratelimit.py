@@ -0,0 +1,134 @@
+import asyncio
+import ipaddress
+import time
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of polling.
+
+    A caller takes its tokens immediately, letting the balance go negative,
+    and is told how long to wait for them to have been earned. Waiters are thus
+    served in arrival order without re-checking the bucket in a loop.
+    """
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def reserve(self, tokens: float, now: float) -> float:
+        """Take ``tokens`` and return the seconds until they are covered."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= tokens
+        return max(0.0, -self.tokens / self.rate)
+
+    def idle(self, now: float) -> bool:
+        """Whether the bucket would be full by now (and can be forgotten)."""
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+class HostRateLimiter:
+    """Process-wide politeness limits per target host and per network.
+
+    Every request a module sends to a target first acquires a token for the
+    target's address and for its surrounding network (``/ipv4_prefix`` or
+    ``/ipv6_prefix``), so the combined load of all modules and all concurrent
+    scans on one host or subnet stays under ``host_rate`` / ``network_rate``
+    requests per second, with bursts up to the bucket sizes. A rate of 0
+    leaves that limit off.
+    """
+
+    def __init__(
+        self,
+        host_rate: float = 0.0,
+        host_burst: float = 20.0,
+        network_rate: float = 0.0,
+        network_burst: float = 100.0,
+        ipv4_prefix: int = 24,
+        ipv6_prefix: int = 64,
+        max_buckets: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.network_rate = network_rate
+        self.network_burst = network_burst
+        self.ipv4_prefix = ipv4_prefix
+        self.ipv6_prefix = ipv6_prefix
+        self.max_buckets = max_buckets
+        self._clock = clock
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.waits = 0
+        self.waited = 0.0
+
+    def configure(self, **settings: Any):
+        """Apply ``RateLimitConfig`` values to the shared limiter."""
+        changed = False
+        for key, value in settings.items():
+            if not hasattr(self, key):
+                raise ValueError(f"Unknown rate limit setting: {key}")
+            changed = changed or getattr(self, key) != value
+            setattr(self, key, value)
+        # Buckets carry the rate they were created with. Reconfiguring with
+        # the same values (every new engine does) keeps concurrent scans'
+        # buckets intact.
+        if changed:
+            self._buckets.clear()
+
+    @property
+    def enabled(self) -> bool:
+        return self.host_rate > 0 or self.network_rate > 0
+
+    async def acquire(self, address: str, tokens: float = 1.0):
+        """Wait until ``address`` may be sent ``tokens`` more requests.
+
+        ``address`` is normally an IP; a hostname is limited on its own, with
+        no network bucket.
+        """
+        if not self.enabled:
+            return
+        now = self._clock()
+        delay = 0.0
+        for key, rate, burst in self._limits(address):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(rate, burst, now)
+            self._buckets.move_to_end(key)
+            delay = max(delay, bucket.reserve(tokens, now))
+        self._evict(now)
+
+        if delay > 0:
+            self.waits += 1
+            self.waited += delay
+            await asyncio.sleep(delay)
+
+    def _limits(self, address: str) -> List[tuple]:
+        limits = []
+        if self.host_rate > 0:
+            limits.append((f"host:{address.lower()}", self.host_rate, self.host_burst))
+        if self.network_rate > 0:
+            network = self._network(address)
+            if network is not None:
+                limits.append((f"net:{network}", self.network_rate, self.network_burst))
+        return limits
+
+    def _network(self, address: str) -> Optional[str]:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return None
+        prefix = self.ipv4_prefix if ip.version == 4 else self.ipv6_prefix
+        return str(ipaddress.ip_network(f"{ip}/{prefix}", strict=False))
+
+    def _evict(self, now: float):
+        # Oldest first; a full bucket holds no state worth keeping
+        while len(self._buckets) > self.max_buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if not bucket.idle(now) and len(self._buckets) <= 2 * self.max_buckets:
+                break
+            del self._buckets[key]
+
+# Shared by every module and scan in the process
+rate_limiter = HostRateLimiter()
@@ -0,0 +1,158 @@
+import asyncio
+import socket
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import structlog
+from gloaks.utils.validators import InputValidator
+
+logger = structlog.get_logger()
+
+# A lookup returns the addresses for a host and the TTL to cache them for
+# (None when the source carries no TTL, e.g. /etc/hosts)
+Lookup = Callable[[str], Awaitable[Tuple[List[str], Optional[float]]]]
+
+class DnsCache:
+    """Process-wide async hostname resolution cache.
+
+    Positive answers are cached for their record TTL (capped at ``max_ttl``),
+    failed lookups for ``negative_ttl``, and the least recently used entries are
+    evicted beyond ``max_entries``. Concurrent lookups of the same name share a
+    single query. Every component that needs a hostname's addresses (scope
+    checks, the engine, modules) goes through the shared ``dns_cache`` so each
+    name is resolved once per TTL rather than once per use.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        default_ttl: float = 300.0,
+        max_ttl: float = 3600.0,
+        negative_ttl: float = 60.0,
+        lookup: Optional[Lookup] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self._lookup = lookup or self._query
+        self._clock = clock
+        # host -> (expires_at, addresses); an empty list is a negative entry
+        self._entries: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._resolver: Any = None
+        self._resolver_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def configure(self, **settings: Any):
+        """Apply ``ResolverConfig`` values to the shared cache."""
+        for key, value in settings.items():
+            if not hasattr(self, key):
+                raise ValueError(f"Unknown DNS cache setting: {key}")
+            setattr(self, key, value)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def resolve(self, host: str) -> List[str]:
+        """Return the addresses ``host`` resolves to (empty if it does not).
+
+        IPv4 addresses are listed before IPv6 ones. IP literals are returned
+        as-is without a lookup.
+        """
+        if InputValidator.is_valid_ip(host):
+            return [host]
+
+        key = host.lower().rstrip(".")
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(entry[1])
+            del self._entries[key]
+
+        loop = asyncio.get_running_loop()
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not loop:
+            self.misses += 1
+            task = loop.create_task(self._fetch(key))
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+
+        # Shielded so a cancelled caller does not fail the lookup for the
+        # other callers waiting on it
+        return list(await asyncio.shield(task))
+
+    async def _fetch(self, key: str) -> List[str]:
+        try:
+            addresses, ttl = await self._lookup(key)
+        except Exception as e:
+            logger.warning("DNS resolution failed", host=key, error=str(e))
+            addresses, ttl = [], None
+        finally:
+            self._inflight.pop(key, None)
+
+        if addresses:
+            ttl = min(self.default_ttl if ttl is None else ttl, self.max_ttl)
+        else:
+            ttl = self.negative_ttl
+
+        if ttl > 0:
+            self._entries[key] = (self._clock() + ttl, addresses)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return addresses
+
+    def dns_resolver(self) -> Any:
+        """Shared ``aiodns.DNSResolver`` for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._resolver is None or self._resolver_loop is not loop:
+            import aiodns
+
+            self._resolver = aiodns.DNSResolver(loop=loop)
+            self._resolver_loop = loop
+        return self._resolver
+
+    async def _query(self, host: str) -> Tuple[List[str], Optional[float]]:
+        """Resolve ``host`` like the system resolver, keeping the lowest record TTL.
+
+        c-ares' getaddrinfo follows the nsswitch/host.conf lookup order, so
+        /etc/hosts entries win over DNS as they do for every other program.
+        Hosts-file answers carry a TTL of 0 and are cached for ``default_ttl``.
+        """
+        import aiodns
+
+        try:
+            result = await self.dns_resolver().getaddrinfo(host, type=socket.SOCK_STREAM)
+        except aiodns.error.DNSError:
+            result = None
+        if result is not None and result.nodes:
+            addresses = list(dict.fromkeys(
+                node.addr[0].decode() if isinstance(node.addr[0], bytes) else node.addr[0]
+                for node in result.nodes
+            ))
+            addresses.sort(key=lambda address: ":" in address)
+            ttl = min(node.ttl for node in result.nodes)
+            return addresses, ttl or None
+
+        # Names only other NSS sources know (mDNS, LDAP) never reach c-ares
+        try:
+            info = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            return [], None
+        addresses = list(dict.fromkeys(entry[4][0] for entry in info))
+        addresses.sort(key=lambda address: ":" in address)
+        return addresses, None
+
+dns_cache = DnsCache()
@@ -1,82 +1,329 @@
 import yaml
-import re
-import socket
 import asyncio
-from typing import List, Optional, Dict
+import hashlib
+import ipaddress
+import os
+import time
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
 import structlog
-from urllib.parse import urlparse
-import sys
+from gloaks.core import scope_cache
+from gloaks.core.resolver import dns_cache
+from gloaks.core.scope_index import IpAddress, ScopeIndex
 
 logger = structlog.get_logger()
 
+# File stamp (mtime, size), rule lists and compiled index of a scope file
+_ScopeState = Tuple[Optional[Tuple[int, int]], scope_cache.RuleLists, Optional[ScopeIndex]]
+
+# Scope check verdicts
+ALLOWED = "allowed"
+EXCLUDED = "excluded"
+OUT_OF_SCOPE = "out_of_scope"
+
 class ScopeValidator:
-    def __init__(self, scope_file: Optional[str] = None):
+    """Authorises targets against a scope file.
+
+    The rule lists are compiled into a ``ScopeIndex`` on first use. Assigning
+    any of them (rather than mutating it in place) recompiles the index.
+
+    Unless ``cache`` is False, compiled scopes are cached in ``cache_dir``
+    (``~/.cache/gloaks/scope`` by default) under the SHA-256 of the scope
+    file, so an unchanged file loads without parsing YAML. With ``auto_reload``, the file's
+    mtime is checked at most every ``reload_interval`` seconds and the scope
+    reloaded when it changes, in a worker thread so the event loop (e.g. the
+    API's) keeps serving while a large scope is read and compiled.
+    """
+
+    def __init__(
+        self,
+        scope_file: Optional[str] = None,
+        cache: bool = True,
+        cache_dir: Optional[str] = None,
+        auto_reload: bool = False,
+        reload_interval: float = 1.0,
+    ):
         self.scope_file = scope_file
-        self.allowed_domains = []
-        self.allowed_ips = []
-        self.excluded_domains = []
+        self.cache_dir = (cache_dir or scope_cache.default_cache_dir()) if cache else None
+        self.auto_reload = auto_reload
+        self.reload_interval = reload_interval
+        self._allowed_domains: List[str] = []
+        self._allowed_ips: List[str] = []
+        self._excluded_domains: List[str] = []
+        self._excluded_ips: List[str] = []
+        self._index: Optional[ScopeIndex] = None
+        self._file_stamp: Optional[Tuple[int, int]] = None
+        self._next_stat = 0.0
+        self._reload_task: Optional[asyncio.Task] = None
+        self.reloads = 0
         
         if scope_file:
             self._load_scope()
 
+    @property
+    def allowed_domains(self) -> List[str]:
+        return self._allowed_domains
+
+    @allowed_domains.setter
+    def allowed_domains(self, value: List[str]):
+        self._allowed_domains = list(value)
+        self._index = None
+
+    @property
+    def allowed_ips(self) -> List[str]:
+        return self._allowed_ips
+
+    @allowed_ips.setter
+    def allowed_ips(self, value: List[str]):
+        self._allowed_ips = list(value)
+        self._index = None
+
+    @property
+    def excluded_domains(self) -> List[str]:
+        return self._excluded_domains
+
+    @excluded_domains.setter
+    def excluded_domains(self, value: List[str]):
+        self._excluded_domains = list(value)
+        self._index = None
+
+    @property
+    def excluded_ips(self) -> List[str]:
+        return self._excluded_ips
+
+    @excluded_ips.setter
+    def excluded_ips(self, value: List[str]):
+        self._excluded_ips = list(value)
+        self._index = None
+
+    @property
+    def index(self) -> ScopeIndex:
+        """Compiled rules, rebuilt after any rule list is reassigned."""
+        if self._index is None:
+            self._index = ScopeIndex(
+                self._allowed_domains, self._excluded_domains, self._allowed_ips, self._excluded_ips
+            )
+        return self._index
+
     def _load_scope(self):
-        """Load scope definition from YAML file."""
+        """Load scope definition from YAML file (or its compiled cache)."""
+        self._apply(self._read_scope())
+
+    def _read_scope(self) -> "_ScopeState":
+        """Read and compile the scope file without touching the live rules.
+
+        Safe to run in a worker thread. Fails closed: a file that cannot be
+        loaded yields empty rules, leaving nothing in scope.
+        """
+        stamp = None
         try:
-            with open(self.scope_file, 'r') as f:
-                data = yaml.safe_load(f)
-                
-            self.allowed_domains = data.get('allow', {}).get('domains', [])
-            self.allowed_ips = data.get('allow', {}).get('ips', [])
-            self.excluded_domains = data.get('exclude', {}).get('domains', [])
-            
-            logger.info("Scope loaded", 
-                        allowed_domains=len(self.allowed_domains), 
-                        allowed_ips=len(self.allowed_ips))
-        except (yaml.YAMLError, OSError) as e:
+            with open(self.scope_file, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                raw = f.read()
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            digest = hashlib.sha256(raw).digest()
+
+            path = scope_cache.cache_path(self.cache_dir, digest) if self.cache_dir else None
+            compiled = scope_cache.load(path, digest) if path else None
+            if compiled is not None:
+                lists, index = compiled
+            else:
+                data = yaml.load(raw, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
+                lists = (
+                    [str(d) for d in data.get('allow', {}).get('domains') or []],
+                    [str(d) for d in data.get('exclude', {}).get('domains') or []],
+                    [str(ip) for ip in data.get('allow', {}).get('ips') or []],
+                    [str(ip) for ip in data.get('exclude', {}).get('ips') or []],
+                )
+                index = ScopeIndex(*lists)
+                if path:
+                    self._save_cache(path, digest, lists, index)
+
+            logger.info("Scope loaded",
+                        allowed_domains=len(lists[0]),
+                        allowed_ips=len(lists[2]),
+                        cached=compiled is not None)
+            return stamp, lists, index
+        except (yaml.YAMLError, OSError, AttributeError) as e:
             logger.error("Failed to load scope file", error=str(e))
-            # raise # Don't raise in constructor for tests if file invalid, but in real app handle better
+            return stamp, ([], [], [], []), None
 
-    async def _resolve_ip(self, target: str) -> Optional[str]:
-        """Resolve IP asynchronously to avoid blocking."""
+    def _apply(self, state: "_ScopeState"):
+        """Swap in rules read by ``_read_scope``, all at once."""
+        stamp, lists, index = state
+        self._allowed_domains, self._excluded_domains, self._allowed_ips, self._excluded_ips = (
+            list(entries) for entries in lists
+        )
+        self._index = index
+        self._file_stamp = stamp
+
+    def _save_cache(self, path: str, digest: bytes, lists: scope_cache.RuleLists, index: ScopeIndex):
         try:
-            # Use asyncio's getaddrinfo which runs in a thread pool (safe for async)
-            # or use aiodns if available. For simplicity and stdlib reliance:
-            loop = asyncio.get_running_loop()
-            info = await loop.getaddrinfo(target, None, family=socket.AF_INET)
-            return info[0][4][0] if info else None
-        except socket.gaierror:
-            return None
-        except Exception as e:
-            logger.warning("DNS resolution failed in scope validator", target=target, error=str(e))
+            scope_cache.save(path, digest, lists, index)
+        except OSError as e:
+            logger.debug("Could not write scope cache", path=path, error=str(e))
+
+    def _read_if_changed(self) -> Optional["_ScopeState"]:
+        """The re-read scope if the file's mtime or size changed, else None."""
+        try:
+            stat = os.stat(self.scope_file)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None
+        if stamp == self._file_stamp:
             return None
+        logger.info("Scope file changed, reloading", scope_file=self.scope_file)
+        return self._read_scope()
 
-    async def is_target_allowed(self, target: str) -> bool:
-        """Check if a target is authorized for scanning."""
+    def reload_if_changed(self) -> bool:
+        """Reload the scope file if its mtime or size changed; True if it did."""
         if not self.scope_file:
-            return True
-            
-        # Resolve target to IP if possible
-        target_ip = await self._resolve_ip(target)
+            return False
+        state = self._read_if_changed()
+        if state is None:
+            return False
+        self._apply(state)
+        self.reloads += 1
+        return True
+
+    async def _maybe_reload(self):
+        """With ``auto_reload``, pick up scope file edits without blocking the loop.
+
+        The file is checked at most every ``reload_interval`` seconds, and
+        checked, read and compiled in a worker thread. Concurrent checks wait
+        for the same reload, so none is decided against a half-loaded scope.
+        """
+        if not (self.auto_reload and self.scope_file):
+            return
+        if self._reload_task is None:
+            now = time.monotonic()
+            if now < self._next_stat:
+                return
+            self._next_stat = now + self.reload_interval
+            self._reload_task = asyncio.ensure_future(self._reload_off_loop())
+        task = self._reload_task
+        try:
+            await asyncio.shield(task)
+        finally:
+            if task.done() and self._reload_task is task:
+                self._reload_task = None
 
-        # Check Exclusions first
-        if target in self.excluded_domains:
+    async def _reload_off_loop(self):
+        state = await asyncio.to_thread(self._read_if_changed)
+        if state is not None:
+            self._apply(state)
+            self.reloads += 1
+
+    async def _resolve_ip(self, target: str) -> Optional[str]:
+        """Resolve IP asynchronously to avoid blocking."""
+        # Shared with the engine and modules, so the scan that follows a scope
+        # check does not resolve the target again
+        addresses = await dns_cache.resolve(target)
+        return addresses[0] if addresses else None
+
+    async def is_target_allowed(self, target: str) -> bool:
+        """Check if a target is authorized for scanning.
+
+        Domain rules are checked first; the target is only resolved when they
+        do not decide and the scope has IP rules. Exclusions win over
+        allowances. ``allow.ips`` and ``exclude.ips`` take addresses or CIDRs.
+        """
+        verdict = await self._check(target)
+        if verdict == EXCLUDED:
             logger.warning("Target explicitly excluded", target=target)
-            return False
+        elif verdict == OUT_OF_SCOPE:
+            logger.warning("Target not in authorized scope", target=target)
+        return verdict == ALLOWED
 
-        # Check Allow List
-        if target in self.allowed_domains:
-            return True
-        
-        if target_ip and target_ip in self.allowed_ips:
-            return True
-
-        # Wildcard matching for domains
-        for domain in self.allowed_domains:
-            if domain.startswith("*."):
-                suffix = domain[2:]
-                # Strict wildcard: must be a subdomain (ending with .suffix)
-                if target.endswith("." + suffix):
-                    return True
-
-        logger.warning("Target not in authorized scope", target=target)
-        return False
+    async def check_many(
+        self, targets: Union[Iterable[str], AsyncIterable[str]], concurrency: int = 100
+    ) -> AsyncIterator[Tuple[str, bool]]:
+        """Check a stream of targets, yielding ``(target, allowed)`` pairs.
+
+        Targets the rules decide without DNS are answered immediately; the
+        others are resolved with at most ``concurrency`` lookups in flight.
+        Pairs are yielded as they are decided, so not in input order. Nothing
+        is logged per target.
+        """
+        pending: Dict["asyncio.Task[str]", str] = {}
+
+        async def drain(until: int):
+            while len(pending) > until:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield pending.pop(task), task.result() == ALLOWED
+
+        try:
+            async for target in _aiter(targets):
+                await self._maybe_reload()
+                verdict = self._precheck(target)
+                if verdict is not None:
+                    yield target, verdict == ALLOWED
+                    continue
+                pending[asyncio.ensure_future(self._check(target))] = target
+                async for result in drain(concurrency - 1):
+                    yield result
+            async for result in drain(0):
+                yield result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _check(self, target: str) -> str:
+        """``ALLOWED``, ``EXCLUDED`` or ``OUT_OF_SCOPE``, resolving ``target`` if needed."""
+        await self._maybe_reload()
+        verdict = self._precheck(target)
+        if verdict is not None:
+            return verdict
+        resolved = await self._resolve_ip(target)
+        address = ipaddress.ip_address(resolved) if resolved else None
+        return self._decide(self.index.check_domain(target), address)
+
+    def _precheck(self, target: str) -> Optional[str]:
+        """The verdict for ``target`` if no DNS lookup is needed, else None."""
+        if not self.scope_file:
+            return ALLOWED
+
+        index = self.index
+        try:
+            address = ipaddress.ip_address(target)
+        except ValueError:
+            pass
+        else:
+            return self._decide(None, address)
+
+        allowed = index.check_domain(target)
+        if allowed is False:
+            return EXCLUDED
+        # An allowed name is still refused if it points into excluded IPs
+        if allowed and not index.excluded_ips.size:
+            return ALLOWED
+        if not index.has_ip_rules:
+            return self._decide(allowed, None)
+        return None
+
+    def _decide(self, allowed: Optional[bool], address: Optional[IpAddress]) -> str:
+        """Combine the domain verdict with the verdict for ``address``."""
+        if address is not None:
+            ip_allowed = self.index.check_ip(address)
+            if ip_allowed is False:
+                return EXCLUDED
+            allowed = allowed or ip_allowed
+        return ALLOWED if allowed else OUT_OF_SCOPE
+
+# Auto-reloading validators shared by long-running processes, by scope file
+_shared_validators: Dict[str, ScopeValidator] = {}
+
+def shared_validator(scope_file: str) -> ScopeValidator:
+    """Process-wide ``ScopeValidator`` for ``scope_file`` that follows file edits."""
+    validator = _shared_validators.get(scope_file)
+    if validator is None:
+        validator = _shared_validators[scope_file] = ScopeValidator(scope_file, auto_reload=True)
+    return validator
+
+async def _aiter(targets: Union[Iterable[str], AsyncIterable[str]]) -> AsyncIterator[str]:
+    if hasattr(targets, "__aiter__"):
+        async for target in targets:
+            yield target
+    else:
+        for target in targets:
+            yield target
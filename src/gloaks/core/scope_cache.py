@@ -0,0 +1,122 @@
+import array
+import os
+import struct
+import sys
+from typing import Dict, List, Optional, Set, Tuple
+import structlog
+from gloaks.core.scope_index import CidrIndex, DomainTrie, ScopeIndex
+
+logger = structlog.get_logger()
+
+# File layout, all big-endian:
+#   header     magic, version, SHA-256 of the scope file it was compiled from
+#   lists      allowed domains, excluded domains, allowed IPs, excluded IPs:
+#              count, byte length, UTF-8 entries joined by "\n"
+#   trie       node domains as a list (as above), then one rule byte per node
+#   networks   allowed then excluded: table count, then per table version,
+#              prefix length, count and the packed network addresses
+# Every section loads with a handful of bulk operations (split, dict(zip()),
+# array.frombytes) rather than per-entry parsing, so a cached scope of 100k
+# rules is ready in milliseconds instead of a YAML parse's seconds.
+MAGIC = b"GLKSCOPE"
+VERSION = 1
+_HEADER = struct.Struct(">8sHxx32s")
+_LIST = struct.Struct(">II")
+_TABLES = struct.Struct(">H")
+_TABLE = struct.Struct(">BBI")
+_ADDRESS_BYTES = {4: 4, 6: 16}
+
+RuleLists = Tuple[List[str], List[str], List[str], List[str]]
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "gloaks", "scope")
+
+def cache_path(cache_dir: str, digest: bytes) -> str:
+    """Cache file of the scope whose content hashes to ``digest``."""
+    return os.path.join(cache_dir, f"{digest.hex()}.bin")
+
+def save(path: str, digest: bytes, lists: RuleLists, index: ScopeIndex):
+    """Write a compiled scope next to ``path`` and move it into place."""
+    parts = [_HEADER.pack(MAGIC, VERSION, digest)]
+    for entries in lists:
+        parts.append(_pack_list(entries))
+    nodes = index.domains.nodes
+    parts.append(_pack_list(list(nodes)))
+    parts.append(bytes(nodes.values()))
+    for cidrs in (index.allowed_ips, index.excluded_ips):
+        tables = [(version, length, networks) for version, table in cidrs.tables.items()
+                  for length, networks in table.items()]
+        parts.append(_TABLES.pack(len(tables)))
+        for version, length, networks in tables:
+            size = _ADDRESS_BYTES[version]
+            parts.append(_TABLE.pack(version, length, len(networks)))
+            parts.append(b"".join(network.to_bytes(size, "big") for network in networks))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"".join(parts))
+    os.replace(tmp_path, path)
+
+def load(path: str, digest: bytes) -> Optional[Tuple[RuleLists, ScopeIndex]]:
+    """Compiled scope cached at ``path``, or None if missing, stale or unreadable."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    try:
+        magic, version, cached_digest = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION or cached_digest != digest:
+            return None
+        offset = _HEADER.size
+        lists = []
+        for _ in range(4):
+            entries, offset = _unpack_list(data, offset)
+            lists.append(entries)
+        domains, offset = _unpack_list(data, offset)
+        nodes = dict(zip(domains, data[offset:offset + len(domains)]))
+        offset += len(domains)
+        cidrs = []
+        for _ in range(2):
+            tables, offset = _unpack_tables(data, offset)
+            cidrs.append(CidrIndex(tables))
+    except (struct.error, UnicodeDecodeError, ValueError) as e:
+        logger.warning("Ignoring corrupt scope cache", path=path, error=str(e))
+        return None
+    return tuple(lists), ScopeIndex.from_parts(DomainTrie(nodes), cidrs[0], cidrs[1])
+
+def _pack_list(entries: List[str]) -> bytes:
+    blob = "\n".join(entries).encode("utf-8")
+    return _LIST.pack(len(entries), len(blob)) + blob
+
+def _unpack_list(data: bytes, offset: int) -> Tuple[List[str], int]:
+    count, length = _LIST.unpack_from(data, offset)
+    offset += _LIST.size
+    entries = data[offset:offset + length].decode("utf-8").split("\n") if count else []
+    if len(entries) != count:
+        raise ValueError("list length mismatch")
+    return entries, offset + length
+
+def _unpack_tables(data: bytes, offset: int) -> Tuple[Dict[int, Dict[int, Set[int]]], int]:
+    tables: Dict[int, Dict[int, Set[int]]] = {4: {}, 6: {}}
+    count, = _TABLES.unpack_from(data, offset)
+    offset += _TABLES.size
+    for _ in range(count):
+        version, length, entries = _TABLE.unpack_from(data, offset)
+        offset += _TABLE.size
+        size = _ADDRESS_BYTES[version]
+        raw = data[offset:offset + entries * size]
+        offset += entries * size
+        if version == 4 and array.array("I").itemsize == 4:
+            addresses = array.array("I")
+            addresses.frombytes(raw)
+            if sys.byteorder == "little":
+                addresses.byteswap()
+            tables[4][length] = set(addresses)
+        else:
+            tables[version][length] = {
+                int.from_bytes(raw[i:i + size], "big") for i in range(0, len(raw), size)
+            }
+    return tables, offset
@@ -0,0 +1,157 @@
+import ipaddress
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+import structlog
+
+logger = structlog.get_logger()
+
+# Rule bits stored on trie nodes
+EXACT_ALLOW = 1
+EXACT_EXCLUDE = 2
+WILDCARD_ALLOW = 4
+WILDCARD_EXCLUDE = 8
+EXACT_RULES = EXACT_ALLOW | EXACT_EXCLUDE
+WILDCARD_RULES = WILDCARD_ALLOW | WILDCARD_EXCLUDE
+
+IpAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+class DomainTrie:
+    """Domain rules in a trie of reversed labels (``com`` -> ``example`` -> ``www``).
+
+    ``example.com`` rules match that name only; ``*.example.com`` rules match
+    every name strictly below it, at any depth. Nodes are stored flat, keyed
+    by the domain they spell, so a lookup probes one node per label of the
+    target -- O(label count) whatever the number of rules -- and a compiled
+    trie loads back from a scope cache as a single dict.
+    """
+
+    def __init__(self, nodes: Optional[Dict[str, int]] = None):
+        # domain -> rule bits of the node ending at that domain
+        self.nodes: Dict[str, int] = nodes if nodes is not None else {}
+
+    @property
+    def size(self) -> int:
+        return len(self.nodes)
+
+    def add(self, pattern: str, exclude: bool = False):
+        pattern = normalize_domain(pattern)
+        if pattern.startswith("*."):
+            pattern, rule = pattern[2:], WILDCARD_EXCLUDE if exclude else WILDCARD_ALLOW
+        else:
+            rule = EXACT_EXCLUDE if exclude else EXACT_ALLOW
+        self.nodes[pattern] = self.nodes.get(pattern, 0) | rule
+
+    def match(self, domain: str) -> int:
+        """Bits of every rule matching ``domain`` (0 when none does)."""
+        name = normalize_domain(domain)
+        nodes = self.nodes
+        matched = nodes.get(name, 0) & EXACT_RULES
+        # Wildcards on the ancestors cover the deeper labels
+        dot = name.find(".")
+        while dot != -1:
+            matched |= nodes.get(name[dot + 1:], 0) & WILDCARD_RULES
+            dot = name.find(".", dot + 1)
+        return matched
+
+class CidrIndex:
+    """IPv4 and IPv6 networks indexed by prefix length.
+
+    Each prefix length present gets a hash set of network addresses; a lookup
+    masks the address once per distinct length. Scope files use a handful of
+    lengths, so lookups stay a few set probes however many networks there are.
+    """
+
+    def __init__(self, tables: Optional[Dict[int, Dict[int, Set[int]]]] = None):
+        # version -> prefix length -> network addresses as integers
+        self.tables: Dict[int, Dict[int, Set[int]]] = tables if tables is not None else {4: {}, 6: {}}
+        self._masks: Optional[Dict[int, List[Tuple[int, int]]]] = None
+        self.size = sum(len(networks) for table in self.tables.values() for networks in table.values())
+
+    def add(self, network: str):
+        """Add a network or a single address.
+
+        Raises:
+            ValueError: If ``network`` is neither.
+        """
+        parsed = ipaddress.ip_network(network.strip(), strict=False)
+        networks = self.tables[parsed.version].setdefault(parsed.prefixlen, set())
+        self.size -= len(networks)
+        networks.add(int(parsed.network_address))
+        self.size += len(networks)
+        self._masks = None
+
+    def contains(self, address: IpAddress) -> bool:
+        if self._masks is None:
+            self._masks = {
+                version: [
+                    (length, ((1 << length) - 1) << (bits - length)) for length in sorted(self.tables[version])
+                ]
+                for version, bits in ((4, 32), (6, 128))
+            }
+        value = int(address)
+        table = self.tables[address.version]
+        for length, mask in self._masks[address.version]:
+            if value & mask in table[length]:
+                return True
+        return False
+
+def normalize_domain(domain: str) -> str:
+    return domain.strip().lower().rstrip(".")
+
+class ScopeIndex:
+    """Compiled allow/exclude rules of a scope definition.
+
+    Exclusions take precedence over allowances, for domains and IPs alike.
+    """
+
+    def __init__(
+        self,
+        allowed_domains: Iterable[str] = (),
+        excluded_domains: Iterable[str] = (),
+        allowed_ips: Iterable[str] = (),
+        excluded_ips: Iterable[str] = (),
+    ):
+        self.domains = DomainTrie()
+        for domain in allowed_domains:
+            self.domains.add(domain)
+        for domain in excluded_domains:
+            self.domains.add(domain, exclude=True)
+        self.allowed_ips = self._cidrs(allowed_ips)
+        self.excluded_ips = self._cidrs(excluded_ips)
+
+    @classmethod
+    def from_parts(cls, domains: DomainTrie, allowed_ips: CidrIndex, excluded_ips: CidrIndex) -> "ScopeIndex":
+        """Reassemble an index from already compiled parts (e.g. a scope cache)."""
+        index = cls()
+        index.domains, index.allowed_ips, index.excluded_ips = domains, allowed_ips, excluded_ips
+        return index
+
+    @staticmethod
+    def _cidrs(entries: Iterable[str]) -> CidrIndex:
+        index = CidrIndex()
+        for entry in entries:
+            try:
+                index.add(str(entry))
+            except ValueError:
+                logger.warning("Ignoring invalid scope IP entry", entry=entry)
+        return index
+
+    @property
+    def has_ip_rules(self) -> bool:
+        return bool(self.allowed_ips.size or self.excluded_ips.size)
+
+    def check_domain(self, domain: str) -> Optional[bool]:
+        """False if ``domain`` is excluded, True if allowed, None if no rule matches."""
+        matched = self.domains.match(domain)
+        if matched & (EXACT_EXCLUDE | WILDCARD_EXCLUDE):
+            return False
+        if matched & (EXACT_ALLOW | WILDCARD_ALLOW):
+            return True
+        return None
+
+    def check_ip(self, address: IpAddress) -> Optional[bool]:
+        """False if ``address`` is excluded, True if allowed, None if no rule matches."""
+        if self.excluded_ips.size and self.excluded_ips.contains(address):
+            return False
+        if self.allowed_ips.size and self.allowed_ips.contains(address):
+            return True
+        return None
@@ -0,0 +1,88 @@
+import asyncio
+import multiprocessing
+import structlog
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+logger = structlog.get_logger()
+
+# Engine owned by a pool worker process, built once by _init_worker, and the
+# IP-scope module results it shares across all the chunks it scans
+_worker_engine = None
+_worker_max_concurrent: Optional[int] = None
+_worker_address_results = None
+
+def _init_worker(config_data: Dict[str, Any], modules: List[str], max_concurrent: Optional[int]):
+    """Pool initializer: rebuild the parent's config and engine in this process."""
+    global _worker_engine, _worker_max_concurrent, _worker_address_results
+    from gloaks.core.config import GloaksConfig
+    from gloaks.core.engine import AddressResults, GloaksEngine
+    from gloaks.core.logging_setup import configure_logging
+
+    config = GloaksConfig(**config_data)
+    configure_logging(level=config.log.level, log_format=config.log.format, log_file=config.log.file)
+    _worker_engine = GloaksEngine(config, modules=modules, skip_modules=[])
+    _worker_max_concurrent = max_concurrent
+    if config.engine.group_by_ip:
+        _worker_address_results = AddressResults(config.engine.ip_results_size, config.engine.ip_results_ttl)
+
+def _scan_chunk(targets: List[str]) -> List[Dict[str, Any]]:
+    """Scan one chunk on a fresh event loop and return results in input order."""
+    async def scan() -> List[Dict[str, Any]]:
+        return [
+            result
+            async for result in _worker_engine.run_many(
+                targets, max_concurrent=_worker_max_concurrent, address_results=_worker_address_results
+            )
+        ]
+
+    by_target = defaultdict(deque)
+    for result in asyncio.run(scan()):
+        by_target[result["target"]].append(result)
+    return [by_target[target].popleft() for target in targets]
+
+async def run_sharded(
+    engine,
+    targets: AsyncIterator[str],
+    workers: int,
+    chunk_size: int,
+    max_concurrent: Optional[int] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Scan ``targets`` across ``workers`` processes; see ``GloaksEngine.run_sharded``."""
+    loop = asyncio.get_running_loop()
+    # spawn rather than fork: forking a process with a running event loop (and
+    # whatever threads libraries have started) is not safe
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(engine.config.model_dump(), [m.name for m in engine.modules], max_concurrent),
+    )
+    pending: deque = deque()
+    exhausted = False
+    try:
+        while True:
+            # Keep every worker busy with one chunk queued behind it
+            while not exhausted and len(pending) < workers * 2:
+                chunk = []
+                async for target in targets:
+                    chunk.append(target)
+                    if len(chunk) >= chunk_size:
+                        break
+                if len(chunk) < chunk_size:
+                    exhausted = True
+                if chunk:
+                    pending.append(loop.run_in_executor(pool, _scan_chunk, chunk))
+
+            if not pending:
+                break
+
+            # Chunks are awaited in submission order, so results come out in
+            # input order while later chunks keep running
+            for result in await pending.popleft():
+                yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=not pending, cancel_futures=True)
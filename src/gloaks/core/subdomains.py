@@ -0,0 +1,126 @@
+import asyncio
+import re
+import secrets
+import time
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+# A single DNS label, or a dotted prefix such as "api.eu"
+_LABELS = re.compile(r"^(?!-)[a-z0-9_-]{1,63}(?<!-)(?:\.(?!-)[a-z0-9_-]{1,63}(?<!-))*$")
+
+def read_wordlist(path: str) -> Iterator[str]:
+    """Stream subdomain labels from ``path``, one per line.
+
+    Lines are lowercased; blank lines, ``#`` comments and entries that are not
+    valid labels are skipped. The file is never loaded whole, so wordlists of
+    millions of entries cost no memory.
+
+    Raises:
+        OSError: If the file cannot be opened. This is raised by the call
+            itself, not on first iteration, so callers can check up front.
+    """
+    return _words(open(path, encoding="utf-8", errors="replace"))
+
+def _words(f: IO[str]) -> Iterator[str]:
+    with f:
+        for line in f:
+            word = line.strip().lower().rstrip(".")
+            if word and not word.startswith("#") and _LABELS.match(word):
+                yield word
+
+def make_resolver(nameservers: Optional[List[str]] = None, timeout: float = 2.0, tries: int = 2) -> Any:
+    """``aiodns.DNSResolver`` for brute forcing on the running event loop.
+
+    ``nameservers`` entries are ``ip`` or ``ip:port``; the system resolvers
+    are used when empty.
+    """
+    import aiodns
+
+    return aiodns.DNSResolver(
+        nameservers=nameservers or None, loop=asyncio.get_running_loop(), timeout=timeout, tries=tries
+    )
+
+async def _lookup(resolver: Any, name: str) -> List[str]:
+    """A records of ``name``; empty if it does not exist."""
+    import aiodns
+
+    try:
+        answers = await resolver.query(name, "A")
+    except aiodns.error.DNSError:
+        return []
+    return sorted({answer.host for answer in answers})
+
+async def detect_wildcard(resolver: Any, domain: str, probes: int = 3) -> Set[str]:
+    """Addresses ``domain`` answers for names that cannot exist.
+
+    Resolves ``probes`` random labels; any address they return comes from a
+    wildcard record (``*.domain``). Several probes catch wildcards that rotate
+    through a pool of addresses.
+    """
+    names = [f"{secrets.token_hex(10)}.{domain}" for _ in range(probes)]
+    answers = await asyncio.gather(*[_lookup(resolver, name) for name in names])
+    return {address for addresses in answers for address in addresses}
+
+async def brute_force(
+    resolver: Any,
+    domain: str,
+    words: Iterable[str],
+    window: int = 1000,
+    on_found: Optional[Callable[[str, List[str]], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    wildcard_probes: int = 3,
+) -> Dict[str, Any]:
+    """Resolve ``word.domain`` for every word with a bounded in-flight window.
+
+    ``window`` worker coroutines pull words from one shared iterator, as in
+    ``connect_scan``, so a wordlist of any size is streamed with at most
+    ``window`` queries outstanding. Names whose addresses all belong to the
+    domain's wildcard answer are dropped, and each name is reported once.
+
+    Args:
+        resolver: ``aiodns.DNSResolver`` to query through.
+        domain: Parent domain.
+        words: Labels to prepend, e.g. from ``read_wordlist``.
+        window: Queries in flight at once.
+        on_found: Called with ``(name, addresses)`` for every subdomain found.
+        should_stop: Checked before each query; returning True ends the run.
+        wildcard_probes: Random names resolved to detect wildcard records.
+
+    Returns:
+        Statistics: names queried, found, dropped as wildcard answers, the
+        wildcard addresses and the query rate.
+    """
+    domain = domain.lower().rstrip(".")
+    wildcard = await detect_wildcard(resolver, domain, wildcard_probes) if wildcard_probes else set()
+    word_iter = iter(words)
+    seen: Set[str] = set()
+    stats = {"queried": 0, "found": 0, "wildcard_filtered": 0}
+    started = time.monotonic()
+
+    async def worker():
+        # next() never yields to the loop, so workers can share the iterator
+        for word in word_iter:
+            if should_stop and should_stop():
+                return
+            name = f"{word}.{domain}"
+            if name in seen:
+                continue
+            stats["queried"] += 1
+            addresses = await _lookup(resolver, name)
+            if not addresses:
+                continue
+            if wildcard and set(addresses) <= wildcard:
+                stats["wildcard_filtered"] += 1
+                continue
+            # Checked again: another worker may have found it meanwhile
+            if name in seen:
+                continue
+            seen.add(name)
+            stats["found"] += 1
+            if on_found:
+                on_found(name, addresses)
+
+    await asyncio.gather(*[worker() for _ in range(max(1, window))])
+    elapsed = time.monotonic() - started
+    stats["wildcard_addresses"] = sorted(wildcard)
+    stats["queries_per_second"] = round(stats["queried"] / elapsed, 1) if elapsed > 0 else None
+    return stats
@@ -0,0 +1,156 @@
+import asyncio
+import errno
+import socket
+import struct
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+if TYPE_CHECKING:
+    from gloaks.core.timing import AdaptiveTiming
+
+# SO_LINGER with a zero timeout makes close() send RST instead of FIN, so
+# probed connections never sit in TIME_WAIT and exhaust local ports
+_LINGER_RST = struct.pack("ii", 1, 0)
+
+# Called with (port, socket) on each open connection before it is closed
+OnOpen = Callable[[int, socket.socket], Awaitable[None]]
+
+OPEN = "open"
+CLOSED = "closed"
+FILTERED = "filtered"
+# The probe failed on this host (out of sockets, buffers or local ports), so
+# nothing is known about the port
+ERROR = "error"
+
+# Connect errors meaning the network had no route to the port; any other
+# OSError (EMFILE, ENFILE, ENOBUFS, EADDRNOTAVAIL, ...) is a local failure
+_UNREACHABLE = {errno.EHOSTUNREACH, errno.ENETUNREACH, errno.EHOSTDOWN}
+
+# Retries of a probe that failed locally, and the first back-off delay in
+# seconds (doubled on every retry)
+EXHAUSTED_RETRIES = 3
+EXHAUSTED_BACKOFF = 0.05
+
+async def probe_port(
+    address: str, port: int, timeout: float, on_open: Optional[OnOpen] = None
+) -> Tuple[str, Optional[float]]:
+    """TCP connect probe on a bare non-blocking socket.
+
+    Returns the state -- ``open``, ``closed`` (refused), ``filtered`` (no
+    answer within ``timeout``, or unreachable) or ``error`` (the probe failed
+    locally, e.g. out of file descriptors) -- and the connect round-trip time,
+    which is None unless the port answered. Open connections are reset once
+    ``on_open`` (if given) has used them, or immediately.
+    """
+    loop = asyncio.get_running_loop()
+    family = socket.AF_INET6 if ":" in address else socket.AF_INET
+    sock = None
+    started = loop.time()
+    try:
+        try:
+            # Inside the try: creating the socket is what fails with EMFILE
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RST)
+            await asyncio.wait_for(loop.sock_connect(sock, (address, port)), timeout=timeout)
+        except ConnectionRefusedError:
+            return CLOSED, loop.time() - started
+        except asyncio.TimeoutError:
+            return FILTERED, None
+        except OSError as e:
+            return (FILTERED if e.errno in _UNREACHABLE else ERROR), None
+        rtt = loop.time() - started
+        if on_open is not None:
+            await on_open(port, sock)
+        return OPEN, rtt
+    finally:
+        if sock is not None:
+            sock.close()
+
+async def connect_scan(
+    address: str,
+    ports: Iterable[int],
+    timeout: float,
+    workers: int,
+    on_result: Optional[Callable[[int, str], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    probe_timeout: Optional[Callable[[float], float]] = None,
+    timing: Optional["AdaptiveTiming"] = None,
+    acquire: Optional[Callable[[], Awaitable[None]]] = None,
+    on_open: Optional[OnOpen] = None,
+) -> Dict[str, int]:
+    """Probe ``ports`` on ``address`` with a fixed pool of worker coroutines.
+
+    Workers pull ports from one shared iterator, so memory and scheduling cost
+    stay flat however many ports are scanned (no task per port).
+
+    Args:
+        address: IP address to scan (resolve hostnames beforehand).
+        ports: Ports to probe, in order.
+        timeout: Connect timeout per probe.
+        workers: Number of probes in flight at once.
+        on_result: Called with ``(port, state)`` after every probe.
+        should_stop: Checked before each probe; returning True ends the scan.
+        probe_timeout: Optional hook that adjusts ``timeout`` per probe (e.g.
+            to clamp it to a deadline).
+        timing: Adaptive timing state. When given, it supplies the per-probe
+            timeout in place of ``timeout``, learns from every measured RTT,
+            decides which filtered ports are retransmitted and spaces probes
+            by the template's scan delay.
+        acquire: Awaited before every probe, retransmissions included (e.g.
+            to take a rate limiter token).
+        on_open: Awaited with ``(port, socket)`` on every open connection
+            before it is closed (e.g. to read a banner). The worker waits for
+            it, and ``on_result`` runs after it.
+
+    Probes failing locally (``error``: out of file descriptors, buffers or
+    source ports) are retried after a back-off, up to ``EXHAUSTED_RETRIES``
+    times, and counted as ``error`` rather than filtered if they keep failing.
+
+    Returns:
+        Counts of probed ports per state.
+    """
+    port_iter = iter(ports)
+    counts = {OPEN: 0, CLOSED: 0, FILTERED: 0, ERROR: 0}
+
+    async def probe(port: int) -> str:
+        attempt = 0
+        exhausted = 0
+        while True:
+            if acquire:
+                await acquire()
+            base_timeout = timing.timeout if timing else timeout
+            effective_timeout = probe_timeout(base_timeout) if probe_timeout else base_timeout
+            state, rtt = await probe_port(address, port, effective_timeout, on_open)
+            if state == ERROR:
+                # Back off so in-flight probes can release their sockets
+                if exhausted >= EXHAUSTED_RETRIES or (should_stop and should_stop()):
+                    return state
+                await asyncio.sleep(EXHAUSTED_BACKOFF * 2 ** exhausted)
+                exhausted += 1
+                continue
+            if timing is None:
+                return state
+            if rtt is not None:
+                timing.observe(rtt)
+            if attempt:
+                timing.record_retry(answered=state != FILTERED)
+            if timing.template.scan_delay:
+                await asyncio.sleep(timing.template.scan_delay)
+            if state != FILTERED or not timing.should_retry(attempt):
+                return state
+            if should_stop and should_stop():
+                return state
+            attempt += 1
+
+    async def worker():
+        # next() never yields to the loop, so workers can share the iterator
+        for port in port_iter:
+            if should_stop and should_stop():
+                return
+            state = await probe(port)
+            counts[state] += 1
+            if on_result:
+                on_result(port, state)
+
+    await asyncio.gather(*[worker() for _ in range(max(1, workers))])
+    return counts
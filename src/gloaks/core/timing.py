@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass(frozen=True)
+class TimingTemplate:
+    """Probe timing limits for the port scanner (all durations in seconds)."""
+
+    initial_rtt_timeout: float
+    min_rtt_timeout: float
+    max_rtt_timeout: float
+    max_retries: int
+    scan_delay: float = 0.0
+    # Cap on probes in flight; None leaves port_scan.concurrency in charge
+    max_parallelism: Optional[int] = None
+
+# Modelled on nmap's -T0 .. -T5 templates
+TIMING_TEMPLATES = {
+    "paranoid": TimingTemplate(5.0, 0.1, 10.0, 10, scan_delay=300.0, max_parallelism=1),
+    "sneaky": TimingTemplate(5.0, 0.1, 10.0, 10, scan_delay=15.0, max_parallelism=1),
+    "polite": TimingTemplate(1.0, 0.1, 10.0, 10, scan_delay=0.4, max_parallelism=1),
+    "normal": TimingTemplate(1.0, 0.1, 10.0, 10),
+    "aggressive": TimingTemplate(0.5, 0.1, 1.25, 6),
+    "insane": TimingTemplate(0.25, 0.05, 0.3, 2),
+}
+
+# Filtered ports are retried during this many initial retransmissions; if
+# none of them draws a response, the silence is a firewall rather than packet
+# loss and later filtered ports are not retried at all
+RETRY_PROBE_WINDOW = 10
+
+def get_timing_template(name: str) -> TimingTemplate:
+    """Look up a template by name or nmap-style level (``T4`` / ``4``).
+
+    Raises:
+        ValueError: If the name is unknown.
+    """
+    key = name.strip().lower()
+    if key.lstrip("t").isdigit():
+        level = int(key.lstrip("t"))
+        names = list(TIMING_TEMPLATES)
+        if 0 <= level < len(names):
+            key = names[level]
+    if key not in TIMING_TEMPLATES:
+        raise ValueError(
+            f"Unknown timing template '{name}'. Choose from: {', '.join(TIMING_TEMPLATES)} (or T0-T5)"
+        )
+    return TIMING_TEMPLATES[key]
+
+class AdaptiveTiming:
+    """Per-host probe timeout and retransmission policy driven by measured RTT.
+
+    Connect round-trip times (both accepted and refused connections count) feed
+    a smoothed RTT estimate in the style of RFC 6298; the probe timeout is
+    ``srtt + 4 * rttvar`` clamped to the template's bounds. Responsive hosts
+    thus get short timeouts and filtered ports stop costing a fixed second.
+    """
+
+    def __init__(self, template: TimingTemplate):
+        self.template = template
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self.retries_sent = 0
+        self.retries_recovered = 0
+
+    def observe(self, rtt: float):
+        """Feed one measured connect round-trip time."""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+    @property
+    def timeout(self) -> float:
+        """Current probe timeout."""
+        if self.srtt is None:
+            return self.template.initial_rtt_timeout
+        estimate = self.srtt + 4 * self.rttvar
+        return min(self.template.max_rtt_timeout, max(self.template.min_rtt_timeout, estimate))
+
+    def should_retry(self, attempt: int) -> bool:
+        """Whether a probe that timed out on ``attempt`` retries is worth resending."""
+        if attempt >= self.template.max_retries:
+            return False
+        return self.retries_recovered > 0 or self.retries_sent < RETRY_PROBE_WINDOW
+
+    def record_retry(self, answered: bool):
+        """Track whether a retransmitted probe drew a response."""
+        self.retries_sent += 1
+        if answered:
+            self.retries_recovered += 1
@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import socket
+import ssl
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+# Protocols and cipher strength flagged as weak in assessments
+LEGACY_PROTOCOLS = {"SSLv2", "SSLv3", "TLSv1", "TLSv1.1"}
+MIN_CIPHER_BITS = 128
+
+def _name(entries: Any) -> Dict[str, str]:
+    """Flatten a ``getpeercert()`` subject/issuer into a dict."""
+    return {key: value for rdn in entries or () for key, value in rdn}
+
+def describe_tls(ssl_object: Any) -> Dict[str, Any]:
+    """Summarise a completed handshake from an ``ssl.SSLObject``/``SSLSocket``.
+
+    Certificate details beyond the fingerprint are only available when the
+    certificate was verified (``getpeercert()`` is empty otherwise).
+    """
+    cipher_name, _, cipher_bits = ssl_object.cipher() or (None, None, None)
+    info: Dict[str, Any] = {
+        "protocol": ssl_object.version(),
+        "cipher": cipher_name,
+        "cipher_bits": cipher_bits,
+        "session_reused": ssl_object.session_reused,
+    }
+
+    der = ssl_object.getpeercert(binary_form=True)
+    if der:
+        info["sha256"] = hashlib.sha256(der).hexdigest()
+    cert = ssl_object.getpeercert()
+    if cert:
+        not_after = datetime.fromtimestamp(ssl.cert_time_to_seconds(cert["notAfter"]), timezone.utc)
+        info["certificate"] = {
+            "subject": _name(cert.get("subject")),
+            "issuer": _name(cert.get("issuer")),
+            "subject_alt_names": [value for kind, value in cert.get("subjectAltName", ()) if kind == "DNS"],
+            "serial_number": cert.get("serialNumber"),
+            "not_before": datetime.fromtimestamp(
+                ssl.cert_time_to_seconds(cert["notBefore"]), timezone.utc
+            ).isoformat(),
+            "not_after": not_after.isoformat(),
+        }
+        info["days_to_expiry"] = (not_after - datetime.now(timezone.utc)).days
+
+    chain = certificate_chain(ssl_object)
+    if chain is None:
+        info["chain"] = None
+        info["chain_error"] = "Certificate chain not exposed by this Python/OpenSSL build"
+    else:
+        info["chain"] = chain
+        info["chain_length"] = len(chain)
+    return info
+
+def certificate_chain(ssl_object: Any) -> Optional[List[Dict[str, Any]]]:
+    """Subject, issuer and expiry of each certificate the peer chain consists of.
+
+    Uses the chain as verified locally (leaf first, trust anchor last), or the
+    chain the server sent when the handshake was not verified. Python only
+    exposes these publicly from 3.13, but the underlying ``_ssl`` methods exist
+    from 3.10, so they are used directly. Returns None if neither is available.
+    """
+    sslobj = getattr(ssl_object, "_sslobj", None)
+    if sslobj is None or not hasattr(sslobj, "get_verified_chain"):
+        return None
+    try:
+        certs = sslobj.get_verified_chain() or sslobj.get_unverified_chain() or []
+    except (ssl.SSLError, ValueError):
+        return None
+    chain = []
+    for cert in certs:
+        details = cert.get_info()
+        entry = {"subject": _name(details.get("subject")), "issuer": _name(details.get("issuer"))}
+        if details.get("notAfter"):
+            entry["not_after"] = datetime.fromtimestamp(
+                ssl.cert_time_to_seconds(details["notAfter"]), timezone.utc
+            ).isoformat()
+        chain.append(entry)
+    return chain
+
+def assess(info: Dict[str, Any]) -> list:
+    """Issues worth reporting for a handshake summary."""
+    issues = []
+    if info.get("protocol") in LEGACY_PROTOCOLS:
+        issues.append(f"Legacy protocol {info['protocol']}")
+    if info.get("cipher_bits") is not None and info["cipher_bits"] < MIN_CIPHER_BITS:
+        issues.append(f"Weak cipher {info['cipher']} ({info['cipher_bits']} bits)")
+    if info.get("verified") is False:
+        reason = info.get("verify_error")
+        issues.append(f"Certificate not trusted: {reason}" if reason else "Certificate not trusted")
+    days = info.get("days_to_expiry")
+    if days is not None:
+        if days < 0:
+            issues.append("Certificate expired")
+        elif days < 30:
+            issues.append(f"Certificate expires in {days} days")
+    return issues
+
+class TlsSessionCache:
+    """Process-wide TLS sessions per (address, server name) for resumption.
+
+    Probing several TLS ports on one host resumes the first port's session on
+    the others (when the server shares its session cache or ticket keys),
+    skipping the certificate exchange and key agreement.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._sessions: "OrderedDict[Tuple[str, Optional[str]], ssl.SSLSession]" = OrderedDict()
+        # Sessions can only be resumed through the context that created them
+        self._contexts: Dict[bool, ssl.SSLContext] = {}
+        self.resumed = 0
+        # Handshakes run in worker threads, concurrently with each other
+        self._lock = threading.Lock()
+
+    def context(self, verify: bool) -> ssl.SSLContext:
+        with self._lock:
+            context = self._contexts.get(verify)
+            if context is None:
+                context = ssl.create_default_context()
+                if not verify:
+                    context.check_hostname = False
+                    context.verify_mode = ssl.CERT_NONE
+                self._contexts[verify] = context
+            return context
+
+    def get(self, key: Tuple[str, Optional[str]]) -> Optional[ssl.SSLSession]:
+        with self._lock:
+            return self._sessions.get(key)
+
+    def put(self, key: Tuple[str, Optional[str]], session: Optional[ssl.SSLSession]):
+        if session is None:
+            return
+        with self._lock:
+            self._sessions[key] = session
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+            self.resumed = 0
+
+    async def handshake(
+        self, address: str, port: int, server_name: Optional[str], timeout: float, reuse: bool = True
+    ) -> Dict[str, Any]:
+        """Connect, handshake and describe the TLS endpoint at ``address:port``.
+
+        The certificate is verified against ``server_name``; if verification
+        fails, the handshake is repeated without verification so protocol and
+        cipher are still reported, with ``verified`` False. Runs in a thread
+        because asyncio's TLS transports cannot offer a session to resume.
+
+        Raises:
+            OSError: If the connection or handshake fails.
+        """
+        try:
+            info = await asyncio.to_thread(self._handshake, address, port, server_name, timeout, True, reuse)
+            info["verified"] = True
+        except ssl.SSLCertVerificationError as e:
+            info = await asyncio.to_thread(self._handshake, address, port, server_name, timeout, False, reuse)
+            info["verified"] = False
+            info["verify_error"] = e.verify_message
+        return info
+
+    def _handshake(
+        self, address: str, port: int, server_name: Optional[str], timeout: float, verify: bool, reuse: bool
+    ) -> Dict[str, Any]:
+        key = (address, server_name)
+        started = time.monotonic()
+        with socket.create_connection((address, port), timeout=timeout) as sock:
+            session = self.get(key) if reuse and verify else None
+            with self.context(verify).wrap_socket(sock, server_hostname=server_name, session=session) as tls:
+                info = describe_tls(tls)
+                info["handshake_ms"] = round((time.monotonic() - started) * 1000, 2)
+                if info["session_reused"]:
+                    with self._lock:
+                        self.resumed += 1
+                elif reuse and verify:
+                    # TLS 1.3 tickets arrive after the handshake; give them a
+                    # moment so the next port can resume
+                    if tls.version() == "TLSv1.3":
+                        tls.settimeout(0.05)
+                        try:
+                            tls.recv(1)
+                        except (OSError, ssl.SSLError):
+                            pass
+                    self.put(key, tls.session)
+        return info
+
+# Shared by every TLS probe in the process
+tls_sessions = TlsSessionCache()
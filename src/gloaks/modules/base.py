@@ -1,11 +1,26 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 import structlog
 
 logger = structlog.get_logger()
 
 class ReconModule(ABC):
     """Base class for all reconnaissance modules."""
+
+    # Artifacts exchanged through the scan context. The engine runs a module only
+    # once every artifact it ``requires`` has been settled by its producer, and
+    # settles the module's ``provides`` once it returns (even on failure, in
+    # which case the artifact is simply absent). Requirements with no producer
+    # in the current scan are ignored, so modules must tolerate missing keys.
+    requires: Tuple[str, ...] = ()
+    provides: Tuple[str, ...] = ()
+
+    # What the results depend on: "host" modules look at the name itself
+    # (virtual hosts, DNS records, SNI), "ip" modules only at the first
+    # resolved address. In batch scans the engine runs an "ip" module once per
+    # address and hands its results to every target resolving to it.
+    scope: str = "host"
     
     @property
     @abstractmethod
@@ -25,13 +40,33 @@ class ReconModule(ABC):
         """Brief description of what the module does."""
         pass
 
+    @classmethod
+    def from_config(cls, config: Any, http_client: Optional[Any] = None) -> "ReconModule":
+        """Build the module for an engine.
+
+        Args:
+            config: The engine's ``GloaksConfig``.
+            http_client: Shared ``httpx.AsyncClient``, if the engine has one.
+
+        Override this when the constructor needs arguments.
+        """
+        return cls()
+
     @abstractmethod
-    async def run(self, target: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    async def run(
+        self, target: str, config: Dict[str, Any], context: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """Execute reconnaissance and return results.
         
         Args:
             target: The target domain or IP address.
-            config: Module-specific configuration dictionary.
+            config: Module-specific configuration dictionary. When a timeout
+                applies, the engine adds an absolute ``deadline`` (event loop
+                time) that the module should honour via ``time_remaining``.
+            context: Artifacts shared between the modules of one scan (e.g.
+                ``resolved_ips``). Modules read what they ``require`` from it
+                and write what they ``provide`` into it. Individual findings
+                are reported through ``emit``.
             
         Returns:
             A dictionary containing the results.
@@ -43,3 +78,26 @@ class ReconModule(ABC):
         Override this if specific validation is needed.
         """
         return True
+
+    @staticmethod
+    def time_remaining(config: Dict[str, Any], timeout: float) -> float:
+        """Clamp ``timeout`` to the time left before the engine's deadline."""
+        deadline = config.get("deadline")
+        if deadline is None:
+            return timeout
+        return max(0.0, min(timeout, deadline - asyncio.get_running_loop().time()))
+
+    @staticmethod
+    def deadline_passed(config: Dict[str, Any]) -> bool:
+        """Whether the engine's deadline for this module has been reached."""
+        deadline = config.get("deadline")
+        return deadline is not None and asyncio.get_running_loop().time() >= deadline
+
+    def emit(self, context: Optional[Dict[str, Any]], finding: Dict[str, Any]):
+        """Report a single finding (e.g. one open port) as soon as it is discovered.
+
+        The engine delivers findings to ``run_stream`` consumers ahead of the
+        module's final result; outside a streaming scan this is a no-op.
+        """
+        if context and "on_finding" in context:
+            context["on_finding"](self.name, finding)
@@ -1,8 +1,11 @@
 import asyncio
 import aiodns
 import structlog
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
+from gloaks.core.resolver import dns_cache
+from gloaks.core.subdomains import brute_force, make_resolver, read_wordlist
 from gloaks.modules.base import ReconModule
+from gloaks.utils.validators import InputValidator
 
 logger = structlog.get_logger()
 
@@ -13,15 +16,18 @@ class DnsEnumModule(ReconModule):
 
     @property
     def version(self) -> str:
-        return "1.0.0"
+        return "1.1.0"
 
     @property
     def description(self) -> str:
-        return "Enumerates DNS records (A, AAAA, MX, NS, TXT)."
+        return "Enumerates DNS records (A, AAAA, MX, NS, TXT) and, with a wordlist, subdomains."
 
-    async def run(self, target: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    async def run(
+        self, target: str, config: Dict[str, Any], context: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """Perform DNS enumeration."""
-        resolver = aiodns.DNSResolver(loop=asyncio.get_running_loop())
+        # One resolver (and c-ares channel) per event loop, shared across scans
+        resolver = dns_cache.dns_resolver()
         record_types = ["A", "AAAA", "MX", "NS", "TXT"]
         results = {}
         
@@ -42,6 +48,8 @@ class DnsEnumModule(ReconModule):
                     parsed = [r.text.decode('utf-8') if isinstance(r.text, bytes) else r.text for r in res]
                 
                 results[record_type] = parsed
+                if parsed:
+                    self.emit(context, {"record_type": record_type, "values": parsed})
             except aiodns.error.DNSError:
                 # Record not found or error
                 results[record_type] = []
@@ -49,6 +57,62 @@ class DnsEnumModule(ReconModule):
                 logger.debug("DNS query error", record_type=record_type, error=str(e))
                 results[record_type] = []
 
-        await asyncio.gather(*[query(rt) for rt in record_types])
+        # Queries still outstanding at the deadline are dropped so the records
+        # gathered so far can be returned
+        remaining = self.time_remaining(config, float("inf"))
+        tasks = {asyncio.create_task(query(rt)): rt for rt in record_types}
+        try:
+            _, unfinished = await asyncio.wait(tasks, timeout=None if remaining == float("inf") else remaining)
+        finally:
+            for task in tasks:
+                task.cancel()
+        for task in unfinished:
+            results[tasks[task]] = []
+
+        if config.get("subdomain_wordlist") and not InputValidator.is_valid_ip(target):
+            results["subdomains"], results["subdomain_stats"] = await self._brute_force(target, config, context)
         
         return results
+
+    async def _brute_force(
+        self, target: str, config: Dict[str, Any], context: Optional[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Resolve the configured wordlist under ``target``, streaming hits as findings.
+
+        A wordlist that cannot be read is reported under ``error`` in the
+        stats, leaving the record results intact.
+        """
+        try:
+            words = read_wordlist(config["subdomain_wordlist"])
+        except OSError as e:
+            logger.warning("Cannot read subdomain wordlist", wordlist=config["subdomain_wordlist"], error=str(e))
+            return [], {"error": f"Cannot read wordlist: {e}"}
+
+        resolver = make_resolver(
+            config.get("nameservers"), config.get("query_timeout", 2.0), config.get("query_tries", 2)
+        )
+        found: List[Dict[str, Any]] = []
+
+        def on_found(name: str, addresses: List[str]):
+            entry = {"subdomain": name, "addresses": addresses}
+            found.append(entry)
+            self.emit(context, entry)
+
+        logger.info("Starting subdomain brute force", target=target, wordlist=config["subdomain_wordlist"])
+        try:
+            stats = await brute_force(
+                resolver,
+                target,
+                words,
+                window=config.get("subdomain_window", 1000),
+                on_found=on_found,
+                should_stop=lambda: self.deadline_passed(config),
+                wildcard_probes=config.get("wildcard_probes", 3),
+            )
+        finally:
+            # aiodns < 4 has no close()
+            close = getattr(resolver, "close", None)
+            if close is not None:
+                await close()
+        logger.info("Subdomain brute force finished", target=target, **{k: stats[k] for k in ("queried", "found")})
+        return found, stats
@@ -1,27 +1,78 @@
-from typing import Any, Dict
+import asyncio
+from typing import Any, Dict, Optional
 import httpx
 import structlog
+from gloaks.core.geo_batch import geo_batcher
+from gloaks.core.geo_cache import geo_cache
+from gloaks.core.geodb import open_database
 from gloaks.modules.base import ReconModule
+from gloaks.utils.validators import InputValidator
 
 logger = structlog.get_logger()
 
 class GeolocationModule(ReconModule):
+    requires = ("resolved_ips",)
+    scope = "ip"
+
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None, api_key: Optional[str] = None):
+        self.http_client = http_client
+        self.api_key = api_key
+
+    @classmethod
+    def from_config(cls, config: Any, http_client: Optional[httpx.AsyncClient] = None) -> "GeolocationModule":
+        geo_batcher.configure(window=config.geolocation.batch_window, max_batch=config.geolocation.batch_size)
+        geo_cache.configure(
+            max_entries=config.geolocation.cache_size,
+            ttl=config.geolocation.cache_ttl,
+            persistent=config.geolocation.persistent_cache,
+        )
+        return cls(http_client=http_client, api_key=config.geolocation.api_key)
+
     @property
     def name(self) -> str:
         return "geolocation"
 
     @property
     def version(self) -> str:
-        return "1.0.0"
+        return "1.3.0"
 
     @property
     def description(self) -> str:
-        return "Retrieves geolocation data for a target IP/Domain using ip-api.com."
+        return "Retrieves geolocation data for a target IP/Domain using ip-api.com or a local database."
 
-    async def run(self, target: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    async def run(
+        self, target: str, config: Dict[str, Any], context: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """Fetch geolocation data asynchronously."""
+        # Look up the address the engine resolved so the provider does not
+        # have to resolve the hostname again on its side
+        resolved_ips = (context or {}).get("resolved_ips")
+        if resolved_ips:
+            target = resolved_ips[0]
+
         provider = config.get("provider", "ip-api")
-        timeout = config.get("timeout", 5.0)
+        if provider == "offline":
+            return self._lookup_offline(target, config.get("database"))
+
+        # Repeat scans are answered from the cache while results are fresh
+        use_cache = config.get("cache_ttl", 86400.0) > 0 and InputValidator.is_valid_ip(target)
+        if not use_cache:
+            return await self._lookup_online(target, provider, config)
+
+        results, tier = await geo_cache.lookup(target)
+        if results is None:
+            results = await self._lookup_online(target, provider, config)
+            if "error" not in results:
+                await geo_cache.put(target, results)
+        stats = geo_cache.stats()
+        logger.debug("Geolocation cache", target=target, result=tier, **stats)
+        # Which tier answered, with the process-wide counters at that point
+        results["cache"] = {"result": tier, **stats}
+        return results
+
+    async def _lookup_online(self, target: str, provider: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Query the ip-api service, batched with concurrent lookups unless disabled."""
+        timeout = self.time_remaining(config, config.get("timeout", 5.0))
         
         if not self.api_key:
              logger.warning("No API key configured for Geolocation module. Results may be limited and HTTP will be used for the free tier.")
@@ -31,6 +82,20 @@ class GeolocationModule(ReconModule):
         # The paid API (pro.ip-api.com) requires HTTPS and an API key.
         url = f"https://pro.ip-api.com/json/{target}?key={self.api_key}" if self.api_key else f"http://ip-api.com/json/{target}"
         
+        if config.get("batch_window", 0.05) > 0:
+            # Coalesced with concurrent lookups from other scans into one /batch request
+            batch_url = f"https://pro.ip-api.com/batch?key={self.api_key}" if self.api_key else "http://ip-api.com/batch"
+            logger.info("Starting geolocation scan", target=target, provider=provider, url=batch_url, batched=True)
+            try:
+                data = await geo_batcher.lookup(target, batch_url, timeout, client=self.http_client)
+            except (httpx.RequestError, httpx.HTTPStatusError, ValueError) as exc:
+                logger.error("Geolocation batch request failed", error=str(exc))
+                return {"error": str(exc)}
+            except asyncio.TimeoutError:
+                logger.error("Geolocation batch request timed out", target=target)
+                return {"error": "Geolocation lookup timed out"}
+            return self._parse_response(data)
+
         logger.info("Starting geolocation scan", target=target, provider=provider, url=url)
         
         try:
@@ -51,6 +116,21 @@ class GeolocationModule(ReconModule):
             logger.error("Geolocation request failed", error=str(exc))
             return {"error": str(exc)}
 
+    def _lookup_offline(self, target: str, database: Optional[str]) -> Dict[str, Any]:
+        """Answer from the local memory-mapped database; no network involved."""
+        if not database:
+            return {"error": "No geolocation database configured for the offline provider"}
+        if not InputValidator.is_valid_ip(target):
+            return {"error": f"Target did not resolve: {target}"}
+        try:
+            location = open_database(database).lookup(target)
+        except (OSError, ValueError) as exc:
+            logger.error("Offline geolocation lookup failed", database=database, error=str(exc))
+            return {"error": str(exc)}
+        if location is None:
+            return {"error": f"No location found for {target}"}
+        return location
+
     def _parse_response(self, data: Dict[str, Any]) -> Dict[str, Any]:
         if data.get("status") == "fail":
             logger.warning("Geolocation lookup failed", reason=data.get("message"))
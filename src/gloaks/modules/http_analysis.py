@@ -1,13 +1,32 @@
+import asyncio
 import httpx
 from typing import Any, Dict, List, Optional
 import structlog
+from gloaks.core.ratelimit import rate_limiter
+from gloaks.core.tls import describe_tls
 from gloaks.modules.base import ReconModule
+from gloaks.utils.fingerprints import default_engine
 
 logger = structlog.get_logger()
 
+# Scheme probed for each default port, in order of preference
+DEFAULT_PORTS = {"https": 443, "http": 80}
+
+# Statuses meaning the server won't answer HEAD, so head_first retries with GET
+HEAD_REJECTED = {405, 501}
+
 class HttpAnalysisModule(ReconModule):
+    requires = ("open_ports",)
+    provides = ("tls_handshakes",)
+
     def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
         self.http_client = http_client
+        # Compiled once per process and shared by every instance
+        self.fingerprints = default_engine()
+
+    @classmethod
+    def from_config(cls, config: Any, http_client: Optional[httpx.AsyncClient] = None) -> "HttpAnalysisModule":
+        return cls(http_client=http_client)
 
     @property
     def name(self) -> str:
@@ -15,88 +34,273 @@ class HttpAnalysisModule(ReconModule):
 
     @property
     def version(self) -> str:
-        return "1.0.0"
+        return "1.3.0"
 
     @property
     def description(self) -> str:
         return "Analyzes HTTP headers and checks for common security misconfigurations."
 
-    async def run(self, target: str, config: Dict[str, Any]) -> Dict[str, Any]:
-        """Perform HTTP header analysis."""
-        timeout = config.get("timeout", 5.0)
+    async def run(
+        self, target: str, config: Dict[str, Any], context: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Perform HTTP header analysis.
+
+        Candidate URLs (HTTPS before HTTP, default ports before extra ones) are
+        raced Happy Eyeballs style: each gets ``fallback_delay`` seconds before
+        the next one starts, and a failure starts the next one immediately. In
+        ``best`` mode the first response wins and the other probes are
+        cancelled; in ``all`` mode every candidate is probed. Either way each
+        probe is recorded under ``probes``.
+        """
+        timeout = self.time_remaining(config, config.get("timeout", 5.0))
         follow_redirects = config.get("follow_redirects", True)
-        
-        # Determine scheme - try HTTPS first
-        url = f"https://{target}"
-        
-        logger.info("Starting HTTP analysis", target=target)
-        
+
+        urls = self._candidate_urls(target, config, context or {})
+        # Rate limits are per address, shared with the other modules
+        resolved_ips = (context or {}).get("resolved_ips")
+        address = resolved_ips[0] if resolved_ips else target
+        if not urls:
+            logger.info("Skipping HTTP analysis, no web ports open", target=target)
+            return {"status": "skipped", "reason": "No open HTTP/HTTPS ports"}
+
+        logger.info("Starting HTTP analysis", target=target, urls=urls)
+
+        # MITM Vulnerability Fix: verify=True to ensure SSL certificate validation
+        # Use shared client if available, usually created in app/cli context
+        client_context = None
+        client = self.http_client
+        if not client:
+            client = httpx.AsyncClient(verify=True, follow_redirects=follow_redirects)
+            client_context = client
+
         try:
-            # MITM Vulnerability Fix: verify=True to ensure SSL certificate validation
-            # Use shared client if available, usually created in app/cli context
-            client_context = None
-            client = self.http_client
-            
-            if not client:
-                 client = httpx.AsyncClient(verify=True, follow_redirects=follow_redirects)
-                 client_context = client
-            
-            try:
-                # If using shared client, we might need to adjust verify/redirects per request? 
-                # Httpx client is immutable for some configs. 
-                # We can't change verify on existing client easily per request if it differs using high level API?
-                # Actually Client(verify=True) is default.
-                # If shared client has different settings, we might need to respect them or create new one.
-                # For this optimization, assuming shared client has secure defaults.
-                
-                try:
-                    response = await client.get(url, timeout=timeout)
-                except (httpx.ConnectError, httpx.TimeoutException):
-                    # Fallback to HTTP
-                    logger.info("HTTPS failed, falling back to HTTP", target=target)
-                    url = f"http://{target}"
-                    response = await client.get(url, timeout=timeout)
-
-                headers = response.headers
-                
-                # Check for security headers
-                security_headers = {
-                    "Strict-Transport-Security": "strict_transport_security",
-                    "Content-Security-Policy": "content_security_policy",
-                    "X-Frame-Options": "x_frame_options",
-                    "X-Content-Type-Options": "x_content_type_options",
-                    "Referrer-Policy": "referrer_policy"
-                }
-                
-                header_results = {}
-                missing_headers = []
-                
-                for header_name, key in security_headers.items():
-                    if header_name in headers:
-                        header_results[key] = True
-                    else:
-                        header_results[key] = False
-                        missing_headers.append(header_name)
-            finally:
-                if client_context:
-                    await client_context.aclose()
-                
-            # Server technology detection
-            technologies = []
-            if "Server" in headers:
-                technologies.append(f"Server: {headers['Server']}")
-            if "X-Powered-By" in headers:
-                technologies.append(f"Powered-By: {headers['X-Powered-By']}")
-
-            return {
-                "status_code": response.status_code,
-                "url": str(response.url),
-                "headers": dict(headers),
-                "security_headers": header_results,
-                "missing_headers": missing_headers,
-                "technologies": technologies
+            if config.get("probe_mode", "best") == "all":
+                probes = await self._probe_all(client, urls, timeout, config, address)
+            else:
+                probes = await self._probe_best(client, urls, timeout, config, address)
+        finally:
+            if client_context:
+                await client_context.aclose()
+
+        # Prefer the earliest candidate that answered (only one can have in "best" mode)
+        answered = [probe for probe in probes if "response" in probe]
+        probe_summary = [
+            {k: v for k, v in probe.items() if k not in ("response", "body", "tls")} for probe in probes
+        ]
+
+        # Hand the handshakes to the TLS module so it need not repeat them
+        if context is not None:
+            context["tls_handshakes"] = {
+                httpx.URL(probe["url"]).port or DEFAULT_PORTS["https"]: probe["tls"]
+                for probe in probes if probe.get("tls")
             }
+        if not answered:
+            errors = [probe["error"] for probe in probes if "error" in probe]
+            logger.error("HTTP analysis failed", errors=errors)
+            return {"error": errors[-1] if errors else "No response", "probes": probe_summary}
+
+        response = answered[0]["response"]
+        headers = response.headers
+
+        # Check for security headers
+        security_headers = {
+            "Strict-Transport-Security": "strict_transport_security",
+            "Content-Security-Policy": "content_security_policy",
+            "X-Frame-Options": "x_frame_options",
+            "X-Content-Type-Options": "x_content_type_options",
+            "Referrer-Policy": "referrer_policy"
+        }
+
+        header_results = {}
+        missing_headers = []
+
+        for header_name, key in security_headers.items():
+            if header_name in headers:
+                header_results[key] = True
+            else:
+                header_results[key] = False
+                missing_headers.append(header_name)
+
+        # Server technology detection
+        technologies = []
+        if "Server" in headers:
+            technologies.append(f"Server: {headers['Server']}")
+        if "X-Powered-By" in headers:
+            technologies.append(f"Powered-By: {headers['X-Powered-By']}")
+        cookies = [cookie.split(";", 1)[0].strip() for cookie in headers.get_list("set-cookie")]
+        body = answered[0]["body"].decode("utf-8", errors="replace")
+        fingerprints = self.fingerprints.match(headers, cookies, body)
+
+        results = {
+            "status_code": response.status_code,
+            "url": str(response.url),
+            "headers": dict(headers),
+            "security_headers": header_results,
+            "missing_headers": missing_headers,
+            "technologies": technologies,
+            "fingerprints": fingerprints,
+            "ttfb_ms": answered[0]["ttfb_ms"],
+            "probes": probe_summary,
+        }
+        if config.get("max_body_bytes", 0) > 0:
+            results["body_sample"] = body
+        return results
 
+    async def _fetch(
+        self, client: httpx.AsyncClient, url: str, timeout: float, config: Dict[str, Any], address: str
+    ) -> Dict[str, Any]:
+        """Probe one URL, returning a probe record instead of raising request errors.
+
+        The response is streamed: only its headers and at most ``max_body_bytes``
+        of the body are read before the connection is released. Each request
+        first takes a token for ``address`` from the shared rate limiter.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            response = None
+            if config.get("head_first", False):
+                await rate_limiter.acquire(address)
+                started = loop.time()
+                response = await client.send(client.build_request("HEAD", url, timeout=timeout), stream=True)
+                if response.status_code in HEAD_REJECTED:
+                    await response.aclose()
+                    response = None
+            if response is None:
+                await rate_limiter.acquire(address)
+                started = loop.time()
+                response = await client.send(client.build_request("GET", url, timeout=timeout), stream=True)
+            ttfb = loop.time() - started
+            try:
+                # After a redirect the connection may be another server's
+                tls = self._tls_details(response) if self._same_endpoint(url, response.url) else None
+                body = await self._read_body(response, config.get("max_body_bytes", 0))
+            finally:
+                await response.aclose()
         except httpx.RequestError as exc:
-            logger.error("HTTP analysis failed", error=str(exc))
-            return {"error": str(exc)}
+            return {"url": url, "error": str(exc)}
+        return {
+            "url": url,
+            "status_code": response.status_code,
+            "ttfb_ms": round(ttfb * 1000, 2),
+            "response": response,
+            "body": body,
+            "tls": tls,
+        }
+
+    @staticmethod
+    def _same_endpoint(url: str, final_url: httpx.URL) -> bool:
+        """Whether ``final_url`` is served over HTTPS by the host and port ``url`` probed."""
+        probed = httpx.URL(url)
+        return (
+            final_url.scheme == "https" and probed.scheme == "https"
+            and final_url.host == probed.host
+            and (final_url.port or DEFAULT_PORTS["https"]) == (probed.port or DEFAULT_PORTS["https"])
+        )
+
+    @staticmethod
+    def _tls_details(response: httpx.Response) -> Optional[Dict[str, Any]]:
+        """Describe the TLS handshake of the connection ``response`` came over."""
+        stream = response.extensions.get("network_stream")
+        ssl_object = stream.get_extra_info("ssl_object") if stream is not None else None
+        if ssl_object is None:
+            return None
+        info = describe_tls(ssl_object)
+        # The client only completes handshakes it could verify
+        info["verified"] = bool(ssl_object.getpeercert())
+        return info
+
+    @staticmethod
+    async def _read_body(response: httpx.Response, max_bytes: int) -> bytes:
+        """Read at most ``max_bytes`` of a streamed response body."""
+        if max_bytes <= 0 or response.request.method == "HEAD":
+            return b""
+        chunks = []
+        received = 0
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            received += len(chunk)
+            if received >= max_bytes:
+                break
+        return b"".join(chunks)[:max_bytes]
+
+    async def _probe_all(
+        self, client: httpx.AsyncClient, urls: List[str], timeout: float, config: Dict[str, Any], address: str
+    ) -> List[Dict[str, Any]]:
+        """Probe every candidate URL at once."""
+        return list(await asyncio.gather(*[self._fetch(client, url, timeout, config, address) for url in urls]))
+
+    async def _probe_best(
+        self, client: httpx.AsyncClient, urls: List[str], timeout: float, config: Dict[str, Any], address: str
+    ) -> List[Dict[str, Any]]:
+        """Race candidate URLs with staggered starts until one answers."""
+        fallback_delay = config.get("fallback_delay", 0.25)
+        queued = list(urls)
+        started: Dict[asyncio.Task, str] = {}
+        probes: Dict[str, Dict[str, Any]] = {}
+
+        def start_next():
+            url = queued.pop(0)
+            started[asyncio.create_task(self._fetch(client, url, timeout, config, address))] = url
+
+        start_next()
+        pending = set(started)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=fallback_delay if queued else None, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # Head start used up without an answer: bring in the next candidate
+                    start_next()
+                    pending = {task for task in started if not task.done()}
+                    continue
+
+                for task in done:
+                    probes[started[task]] = task.result()
+                if any("response" in probes[started[task]] for task in done):
+                    break
+                if queued:
+                    start_next()
+                    pending = {task for task in started if not task.done()}
+        finally:
+            # Cancel the losers
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            for task in pending:
+                probes[started[task]] = {"url": started[task], "status": "cancelled"}
+
+        return [probes[url] for url in urls if url in probes]
+
+    @classmethod
+    def _candidate_urls(cls, target: str, config: Dict[str, Any], context: Dict[str, Any]) -> List[str]:
+        """URLs worth probing, in order of preference.
+
+        Default ports follow ``_candidate_schemes``; extra ports are probed only
+        when the port scan found them open.
+        """
+        urls = [f"{scheme}://{target}" for scheme in cls._candidate_schemes(context)]
+        open_ports = context.get("open_ports", ())
+        for scheme, key in (("https", "extra_https_ports"), ("http", "extra_http_ports")):
+            for port in config.get(key, ()):
+                if port in open_ports and port != DEFAULT_PORTS[scheme]:
+                    urls.append(f"{scheme}://{target}:{port}")
+        return urls
+
+    @staticmethod
+    def _candidate_schemes(context: Dict[str, Any]) -> List[str]:
+        """Schemes worth probing given what the port scan found.
+
+        A scheme is dropped only when the port scan actually probed its default
+        port and found it closed; without port scan results both are tried.
+        """
+        if "open_ports" not in context:
+            return list(DEFAULT_PORTS)
+
+        open_ports = set(context["open_ports"])
+        scanned_ports = set(context.get("scanned_ports", ()))
+        return [
+            scheme for scheme, port in DEFAULT_PORTS.items()
+            if port in open_ports or port not in scanned_ports
+        ]
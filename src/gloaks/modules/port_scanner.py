@@ -1,68 +1,142 @@
 import asyncio
-import socket
 import structlog
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+from gloaks.core.banners import grab_banner, identify_service
+from gloaks.core.ratelimit import rate_limiter
+from gloaks.core.resolver import dns_cache
+from gloaks.core.tcp_connect import ERROR, OPEN, connect_scan
+from gloaks.core.timing import AdaptiveTiming, get_timing_template
 from gloaks.modules.base import ReconModule
+from gloaks.utils.ports import parse_port_spec
 
 logger = structlog.get_logger()
 
 class PortScanModule(ReconModule):
+    requires = ("resolved_ips",)
+    scope = "ip"
+    provides = ("open_ports",)
+
     @property
     def name(self) -> str:
         return "port_scan"
 
     @property
     def version(self) -> str:
-        return "1.0.0"
+        return "1.3.0"
 
     @property
     def description(self) -> str:
-        return "Scans for open TCP ports using asyncio."
+        return "Scans for open TCP ports with non-blocking connect probes."
 
-    async def run(self, target: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    async def run(
+        self, target: str, config: Dict[str, Any], context: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """Execute concurrent port scan."""
-        ports = config.get("default_ports", [80, 443])
+        context = context if context is not None else {}
+        ports = self._ports(config)
         timeout = config.get("timeout", 1.0)
         concurrency = config.get("concurrency", 100)
+        timing = None
+        if config.get("timing"):
+            timing = AdaptiveTiming(get_timing_template(config["timing"]))
+            if timing.template.max_parallelism:
+                concurrency = min(concurrency, timing.template.max_parallelism)
+
+        # Connect to an address resolved once up front (by the engine, or via
+        # the shared cache when run standalone) instead of making every probe
+        # look the hostname up again
+        resolved_ips = context.get("resolved_ips")
+        if resolved_ips is None:
+            resolved_ips = await dns_cache.resolve(target)
+        if not resolved_ips:
+            logger.warning("Skipping port scan, target did not resolve", target=target)
+            context["open_ports"] = []
+            context["scanned_ports"] = []
+            return {"open_ports": [], "scanned_count": 0, "error": "Target did not resolve"}
+        address = resolved_ips[0]
         
-        logger.info("Starting port scan", ports_count=len(ports), target=target, concurrency=concurrency)
+        logger.info("Starting port scan", ports_count=len(ports), target=target, address=address, concurrency=concurrency)
         
-        semaphore = asyncio.Semaphore(concurrency)
         open_ports = []
-        
-        async def scan_port(port: int):
-            async with semaphore:
-                writer = None
-                try:
-                    conn = asyncio.open_connection(target, port)
-                    reader, writer = await asyncio.wait_for(conn, timeout=timeout)
-                    
-                    # If we get here, the port is open
-                    logger.debug("Port open", port=port)
-                    open_ports.append({
-                        "port": port,
-                        "state": "open",
-                        "protocol": "tcp"
-                    })
-                    
-                except (asyncio.TimeoutError, ConnectionRefusedError, OSError):
-                     # Port is closed or filtered
-                     pass
-                except Exception as e:
-                    logger.debug("Error scanning port", port=port, error=str(e))
-                finally:
-                    if writer:
-                        writer.close()
-                        try:
-                            await writer.wait_closed()
-                        except Exception:
-                            pass
-
-        # Create tasks
-        tasks = [scan_port(port) for port in ports]
-        await asyncio.gather(*tasks)
+        scanned_ports = []
+        service_hints: Dict[int, Dict[str, Any]] = {}
+
+        def on_result(port: int, state: str):
+            if state == ERROR:
+                # Unknown state: not reported as scanned, so dependants still try it
+                return
+            scanned_ports.append(port)
+            if state == OPEN:
+                logger.debug("Port open", port=port)
+                entry = {
+                    "port": port,
+                    "state": "open",
+                    "protocol": "tcp"
+                }
+                entry.update(service_hints.pop(port, {}))
+                open_ports.append(entry)
+                self.emit(context, entry)
+
+        # Past the deadline, leave the remaining ports unscanned and report
+        # what we have instead of being cancelled with nothing
+        counts = await connect_scan(
+            address,
+            ports,
+            timeout=timeout,
+            workers=min(concurrency, len(ports)),
+            on_result=on_result,
+            should_stop=lambda: self.deadline_passed(config),
+            probe_timeout=lambda t: self.time_remaining(config, t),
+            timing=timing,
+            acquire=lambda: rate_limiter.acquire(address),
+            on_open=self._banner_grabber(config, service_hints) if config.get("banners") else None,
+        )
         
         # Sort results by port number
         open_ports.sort(key=lambda x: x["port"])
-        
-        return {"open_ports": open_ports, "scanned_count": len(ports)}
+
+        context["open_ports"] = [entry["port"] for entry in open_ports]
+        context["scanned_ports"] = scanned_ports
+
+        results = {
+            "open_ports": open_ports,
+            "scanned_count": len(scanned_ports),
+            "closed_count": counts["closed"],
+            "filtered_count": counts["filtered"],
+        }
+        if counts[ERROR]:
+            logger.warning("Port probes failed locally", failed=counts[ERROR], address=address)
+            results["error_count"] = counts[ERROR]
+        if timing is not None and timing.srtt is not None:
+            results["srtt_ms"] = round(timing.srtt * 1000, 2)
+        if len(scanned_ports) + counts[ERROR] < len(ports):
+            logger.warning("Port scan stopped at deadline", scanned=len(scanned_ports), total=len(ports))
+            results["partial"] = True
+        return results
+
+    def _banner_grabber(self, config: Dict[str, Any], service_hints: Dict[int, Dict[str, Any]]):
+        """``on_open`` hook reading each open port's banner into ``service_hints``.
+
+        Banners are read on the scan's own connection, under a separate
+        concurrency limit and a byte and time budget per port.
+        """
+        semaphore = asyncio.Semaphore(config.get("banner_concurrency", 10))
+        max_bytes = config.get("banner_bytes", 512)
+        timeout = config.get("banner_timeout", 2.0)
+        send_probe = config.get("banner_probe", True)
+
+        async def on_open(port: int, sock):
+            async with semaphore:
+                data = await grab_banner(sock, max_bytes, self.time_remaining(config, timeout), send_probe)
+            if data:
+                service_hints[port] = identify_service(data)
+
+        return on_open
+
+    @staticmethod
+    def _ports(config: Dict[str, Any]) -> List[int]:
+        """Ports to probe: the ``ports`` spec when set, else ``default_ports``."""
+        spec = config.get("ports")
+        if spec:
+            return parse_port_spec(spec)
+        return list(dict.fromkeys(config.get("default_ports", [80, 443])))
@@ -0,0 +1,122 @@
+from importlib.metadata import EntryPoint, entry_points
+from typing import Dict, Iterable, List, Optional, Type
+import structlog
+from gloaks.modules.base import ReconModule
+
+logger = structlog.get_logger()
+
+# Entry point group third-party packages register ReconModule subclasses under.
+# The entry point name must match the module's ``name``.
+ENTRY_POINT_GROUP = "gloaks.modules"
+
+# Built-in modules in default execution order. They are declared as entry points
+# in pyproject.toml too; this table keeps them available (and ordered) when the
+# package metadata is missing, e.g. when running from a source checkout.
+BUILTIN_MODULES = {
+    "geolocation": "gloaks.modules.geolocation:GeolocationModule",
+    "port_scan": "gloaks.modules.port_scanner:PortScanModule",
+    "http_analysis": "gloaks.modules.http_analysis:HttpAnalysisModule",
+    "dns_enumeration": "gloaks.modules.dns_enum:DnsEnumModule",
+    "tls": "gloaks.modules.tls:TlsModule",
+}
+
+class ModuleRegistry:
+    """Registry of available recon modules.
+
+    Discovery only reads entry point metadata; a module's code (and its
+    third-party dependencies such as aiodns or httpx) is imported the first
+    time it is actually selected for a scan.
+    """
+
+    def __init__(self):
+        self._entry_points: Optional[Dict[str, EntryPoint]] = None
+        self._loaded: Dict[str, Type[ReconModule]] = {}
+
+    def _discover(self) -> Dict[str, EntryPoint]:
+        if self._entry_points is None:
+            found = {
+                name: EntryPoint(name=name, value=value, group=ENTRY_POINT_GROUP)
+                for name, value in BUILTIN_MODULES.items()
+            }
+            for ep in entry_points(group=ENTRY_POINT_GROUP):
+                found[ep.name] = ep
+
+            # Built-ins first in their canonical order, then plugins by name
+            ordered = [name for name in BUILTIN_MODULES if name in found]
+            ordered += sorted(name for name in found if name not in BUILTIN_MODULES)
+            self._entry_points = {name: found[name] for name in ordered}
+        return self._entry_points
+
+    def names(self) -> List[str]:
+        """All registered module names, in default execution order."""
+        return list(self._discover())
+
+    def select(self, modules: Optional[Iterable[str]] = None, skip: Optional[Iterable[str]] = None) -> List[str]:
+        """Resolve an include/exclude selection to module names.
+
+        Args:
+            modules: Names to run; None selects every registered module.
+            skip: Names to leave out of the selection.
+
+        Raises:
+            ValueError: If any name is not a registered module.
+        """
+        available = self.names()
+        requested = list(modules) if modules is not None else available
+        skipped = set(skip or ())
+
+        unknown = sorted((set(requested) | skipped) - set(available))
+        if unknown:
+            raise ValueError(
+                f"Unknown module(s): {', '.join(unknown)}. Available: {', '.join(available)}"
+            )
+
+        # Keep default execution order regardless of how names were given
+        wanted = set(requested) - skipped
+        return [name for name in available if name in wanted]
+
+    def load(self, name: str) -> Type[ReconModule]:
+        """Import and return the module class registered under ``name``.
+
+        Raises:
+            ValueError: If ``name`` is unknown, or its entry point cannot be
+                imported or does not name a ReconModule subclass.
+        """
+        if name not in self._loaded:
+            ep = self._discover().get(name)
+            if ep is None:
+                raise ValueError(f"Unknown module: {name}")
+
+            try:
+                cls = ep.load()
+            except Exception as e:
+                raise ValueError(f"Entry point '{name}' ({ep.value}) could not be loaded: {e}") from e
+            if not (isinstance(cls, type) and issubclass(cls, ReconModule)):
+                raise ValueError(f"Entry point '{name}' ({ep.value}) is not a ReconModule subclass")
+
+            logger.debug("Loaded recon module", module=name, source=ep.value)
+            self._loaded[name] = cls
+        return self._loaded[name]
+
+    def load_selected(self, names: Iterable[str], explicit: bool) -> List[Type[ReconModule]]:
+        """Load the module classes for a selection made with ``select``.
+
+        A broken third-party plugin that was only picked up because every
+        module runs by default is skipped with a warning, so it cannot break
+        scans with the built-in modules. Modules the user asked for by name,
+        and built-ins, still raise.
+
+        Raises:
+            ValueError: As ``load``.
+        """
+        classes = []
+        for name in names:
+            try:
+                classes.append(self.load(name))
+            except ValueError as e:
+                if explicit or name in BUILTIN_MODULES:
+                    raise
+                logger.warning("Skipping module plugin that failed to load", module=name, error=str(e))
+        return classes
+
+registry = ModuleRegistry()
@@ -0,0 +1,89 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+import structlog
+from gloaks.core.ratelimit import rate_limiter
+from gloaks.core.tls import assess, tls_sessions
+from gloaks.modules.base import ReconModule
+from gloaks.utils.validators import InputValidator
+
+logger = structlog.get_logger()
+
+class TlsModule(ReconModule):
+    requires = ("open_ports", "tls_handshakes")
+
+    @property
+    def name(self) -> str:
+        return "tls"
+
+    @property
+    def version(self) -> str:
+        return "1.0.0"
+
+    @property
+    def description(self) -> str:
+        return "Reports TLS protocol, cipher and certificate details of HTTPS ports."
+
+    async def run(
+        self, target: str, config: Dict[str, Any], context: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Assess every TLS port of the target.
+
+        Ports HTTP analysis already connected to reuse its handshake. The rest
+        are handshaken here: the first one alone, the others afterwards so they
+        can resume its TLS session.
+        """
+        context = context if context is not None else {}
+        ports = self._ports(config, context)
+        if not ports:
+            return {"status": "skipped", "reason": "No open TLS ports"}
+
+        resolved_ips = context.get("resolved_ips")
+        address = resolved_ips[0] if resolved_ips else target
+        # SNI and certificate checks use the name that was asked for
+        server_name = target if not InputValidator.is_valid_ip(target) else address
+        timeout = config.get("timeout", 5.0)
+        reuse = config.get("session_reuse", True)
+
+        logger.info("Starting TLS assessment", target=target, ports=ports)
+
+        shared = context.get("tls_handshakes", {})
+        endpoints: Dict[int, Dict[str, Any]] = {}
+        for port in ports:
+            if port in shared:
+                endpoints[port] = dict(shared[port], source="http_analysis")
+
+        async def probe(port: int):
+            await rate_limiter.acquire(address)
+            try:
+                info = await tls_sessions.handshake(
+                    address, port, server_name, self.time_remaining(config, timeout), reuse=reuse
+                )
+                info["source"] = "handshake"
+            except (OSError, ValueError) as e:
+                logger.debug("TLS handshake failed", port=port, error=str(e))
+                info = {"error": str(e) or type(e).__name__}
+            endpoints[port] = info
+
+        remaining = [port for port in ports if port not in endpoints]
+        if remaining:
+            await probe(remaining[0])
+            await asyncio.gather(*[probe(port) for port in remaining[1:]])
+
+        results: List[Dict[str, Any]] = []
+        for port in ports:
+            entry = {"port": port, **endpoints[port]}
+            if "error" not in entry:
+                entry["issues"] = assess(entry)
+                self.emit(context, entry)
+            results.append(entry)
+        return {"endpoints": results}
+
+    @staticmethod
+    def _ports(config: Dict[str, Any], context: Dict[str, Any]) -> List[int]:
+        """Configured TLS ports the port scan did not find closed."""
+        candidates = list(dict.fromkeys(config.get("ports", [443])))
+        if "open_ports" not in context:
+            return candidates
+        open_ports = set(context["open_ports"])
+        scanned_ports = set(context.get("scanned_ports", ()))
+        return [port for port in candidates if port in open_ports or port not in scanned_ports]
@@ -0,0 +1,255 @@
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+# Wappalyzer-style signatures. Every pattern is a regex searched
+# case-insensitively; an empty pattern only requires the header or cookie to be
+# present. The first capturing group of a pattern, if any, is the version.
+# Cookie names are literal; a trailing "*" matches any name with that prefix
+# (e.g. WordPress's per-user "wp-settings-1").
+SIGNATURES: Dict[str, Dict[str, Any]] = {
+    # Web servers
+    "nginx": {"category": "Web servers", "headers": {"Server": r"nginx(?:/([\d.]+))?"}},
+    "Apache HTTP Server": {"category": "Web servers", "headers": {"Server": r"Apache(?:/([\d.]+))?(?!-Coyote)"}},
+    "Microsoft IIS": {"category": "Web servers", "headers": {"Server": r"Microsoft-IIS(?:/([\d.]+))?"}},
+    "LiteSpeed": {"category": "Web servers", "headers": {"Server": r"LiteSpeed"}},
+    "Caddy": {"category": "Web servers", "headers": {"Server": r"Caddy"}},
+    "OpenResty": {"category": "Web servers", "headers": {"Server": r"openresty(?:/([\d.]+))?"}, "implies": ["nginx"]},
+    "Apache Tomcat": {"category": "Web servers", "headers": {"Server": r"Apache-Coyote(?:/([\d.]+))?"}, "implies": ["Java"]},
+    "Jetty": {"category": "Web servers", "headers": {"Server": r"Jetty(?:\(([\d.]+))?"}, "implies": ["Java"]},
+    "Gunicorn": {"category": "Web servers", "headers": {"Server": r"gunicorn(?:/([\d.]+))?"}, "implies": ["Python"]},
+    "uvicorn": {"category": "Web servers", "headers": {"Server": r"uvicorn"}, "implies": ["Python"]},
+    "Kestrel": {"category": "Web servers", "headers": {"Server": r"Kestrel"}, "implies": ["ASP.NET"]},
+    # CDNs and proxies
+    "Cloudflare": {"category": "CDN", "headers": {"Server": r"cloudflare", "CF-RAY": ""}, "cookies": {"__cf_bm": "", "__cfduid": ""}},
+    "Amazon CloudFront": {"category": "CDN", "headers": {"X-Amz-Cf-Id": "", "Via": r"\(CloudFront\)"}},
+    "Fastly": {"category": "CDN", "headers": {"X-Served-By": r"cache-", "Fastly-Debug-Digest": ""}},
+    "Akamai": {"category": "CDN", "headers": {"X-Akamai-Transformed": "", "Server": r"AkamaiGHost"}},
+    "Varnish": {"category": "Caching", "headers": {"Via": r"varnish(?: \(Varnish/([\d.]+)\))?", "X-Varnish": ""}},
+    "Envoy": {"category": "Reverse proxies", "headers": {"Server": r"envoy", "X-Envoy-Upstream-Service-Time": ""}},
+    # Languages and frameworks
+    "PHP": {"category": "Programming languages", "headers": {"X-Powered-By": r"PHP(?:/([\d.]+))?"}, "cookies": {"PHPSESSID": ""}},
+    "ASP.NET": {
+        "category": "Web frameworks",
+        "headers": {"X-Powered-By": r"ASP\.NET", "X-AspNet-Version": r"([\d.]+)"},
+        "cookies": {"ASP.NET_SessionId": "", ".AspNetCore.Session": ""},
+    },
+    "Java": {"category": "Programming languages", "cookies": {"JSESSIONID": ""}},
+    "Python": {"category": "Programming languages"},
+    "Express": {"category": "Web frameworks", "headers": {"X-Powered-By": r"Express"}, "implies": ["Node.js"]},
+    "Node.js": {"category": "Programming languages"},
+    "Next.js": {"category": "Web frameworks", "headers": {"X-Powered-By": r"Next\.js ?([\d.]+)?"}, "body": [r"/_next/static/"], "implies": ["React"]},
+    "Nuxt.js": {"category": "Web frameworks", "body": [r"window\.__NUXT__", r"/_nuxt/"], "implies": ["Vue.js"]},
+    "Django": {"category": "Web frameworks", "cookies": {"csrftoken": "", "django_language": ""}, "body": [r"csrfmiddlewaretoken"], "implies": ["Python"]},
+    "Flask": {"category": "Web frameworks", "headers": {"Server": r"Werkzeug(?:/([\d.]+))?"}, "implies": ["Python"]},
+    "Ruby on Rails": {"category": "Web frameworks", "headers": {"X-Powered-By": r"Phusion Passenger"}, "cookies": {"_rails_session": ""}, "body": [r"csrf-param\" content=\"authenticity_token"]},
+    "Laravel": {"category": "Web frameworks", "cookies": {"laravel_session": "", "XSRF-TOKEN": ""}, "implies": ["PHP"]},
+    "Spring": {"category": "Web frameworks", "headers": {"X-Application-Context": ""}, "implies": ["Java"]},
+    # CMS and applications
+    "WordPress": {
+        "category": "CMS",
+        "headers": {"Link": r"rel=\"https://api\.w\.org/\"", "X-Pingback": r"/xmlrpc\.php"},
+        "cookies": {"wordpress_logged_in_*": "", "wp-settings-*": ""},
+        "body": [r"<meta name=\"generator\" content=\"WordPress ?([\d.]+)?", r"/wp-(?:content|includes)/"],
+        "implies": ["PHP"],
+    },
+    "Drupal": {
+        "category": "CMS",
+        "headers": {"X-Generator": r"Drupal(?: ([\d.]+))?", "X-Drupal-Cache": ""},
+        "body": [r"<meta name=\"Generator\" content=\"Drupal ?([\d.]+)?", r"/sites/default/files/"],
+        "implies": ["PHP"],
+    },
+    "Joomla": {"category": "CMS", "body": [r"<meta name=\"generator\" content=\"Joomla! ?([\d.]+)?"], "implies": ["PHP"]},
+    "Shopify": {"category": "Ecommerce", "headers": {"X-ShopId": "", "X-Shopify-Stage": ""}, "body": [r"cdn\.shopify\.com"]},
+    "Magento": {"category": "Ecommerce", "cookies": {"frontend": "", "X-Magento-Vary": ""}, "body": [r"Mage\.Cookies"], "implies": ["PHP"]},
+    "Grafana": {"category": "Monitoring", "cookies": {"grafana_session": ""}, "body": [r"window\.grafanaBootData"]},
+    "Jenkins": {"category": "CI", "headers": {"X-Jenkins": r"([\d.]+)", "X-Hudson": ""}, "implies": ["Java"]},
+    "GitLab": {"category": "Development", "cookies": {"_gitlab_session": ""}, "body": [r"gon\.gitlab_url"]},
+    "phpMyAdmin": {"category": "Database managers", "cookies": {"phpMyAdmin": ""}, "body": [r"<title>phpMyAdmin"], "implies": ["PHP"]},
+    # JavaScript libraries
+    "React": {"category": "JavaScript frameworks", "body": [r"data-reactroot", r"react(?:\.production)?\.min\.js"]},
+    "Vue.js": {"category": "JavaScript frameworks", "body": [r"data-v-[0-9a-f]{8}", r"vue(?:@([\d.]+))?(?:/dist/vue)?(?:\.runtime)?\.min\.js"]},
+    "Angular": {"category": "JavaScript frameworks", "body": [r"ng-version=\"([\d.]+)\""]},
+    "jQuery": {"category": "JavaScript libraries", "body": [r"jquery[.-]([\d.]+?)(?:\.min)?\.js"]},
+    "Bootstrap": {"category": "UI frameworks", "body": [r"bootstrap(?:@([\d.]+))?(?:/dist/css/bootstrap)?(?:\.min)?\.css"]},
+}
+
+# Characters with a special meaning in a regex outside of escapes
+_REGEX_SPECIAL = set("()[]{}|^$.*+?")
+
+def _required_literal(pattern: str) -> Optional[str]:
+    """Longest literal run every match of ``pattern`` must contain (lowercased).
+
+    Groups, classes and quantified characters end a run; a top-level
+    alternation means no single literal is required and yields None.
+    """
+    runs: List[str] = []
+    current = ""
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            escaped = pattern[i + 1:i + 2]
+            i += 2
+            if escaped and not escaped.isalnum() and depth == 0:
+                current += escaped
+            else:
+                runs.append(current)
+                current = ""
+            continue
+        if char not in _REGEX_SPECIAL:
+            if depth == 0:
+                current += char
+            i += 1
+            continue
+
+        if char in "?*{" and current:
+            # The preceding character is optional (or repeated a variable number of times)
+            current = current[:-1]
+        if char == "{":
+            i = pattern.find("}", i) if "}" in pattern[i:] else len(pattern)
+        elif char == "|" and depth == 0:
+            return None
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "[":
+            # Skip the class, including a leading ] or escaped characters
+            i += 2 if pattern[i + 1:i + 2] == "]" else 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+        runs.append(current)
+        current = ""
+        i += 1
+    runs.append(current)
+
+    longest = max(runs, key=len)
+    return longest.lower() if len(longest) >= 3 else None
+
+def _lowercase_pattern(pattern: str) -> str:
+    """``pattern`` with its literals lowercased, for matching lowercased text.
+
+    Escapes are left alone (``\\D`` is not ``\\d``). Searching lowercased text
+    case-sensitively keeps ``re``'s fast literal-prefix scan, which
+    ``re.IGNORECASE`` disables.
+    """
+    parts = re.split(r"(\\.)", pattern)
+    return "".join(part if part.startswith("\\") else part.lower() for part in parts)
+
+class FingerprintEngine:
+    """Technology detection over headers, cookies and a body prefix.
+
+    Header and cookie signatures are compiled into one alternation of named
+    groups per header (and one for the cookie jar), so each input is scanned
+    in a single regex pass however many signatures target it; a signature's
+    own pattern only runs again on the matched text to pull out its version.
+
+    Header values and cookies are short, but body prefixes are not, and
+    CPython's ``re`` tries every branch of an alternation at every position.
+    Body signatures are therefore indexed by the literal each one requires:
+    the lowercased body is checked for those literals with plain substring
+    searches, and only the signatures whose literal is present run their
+    (lowercased) regex over it.
+    """
+
+    def __init__(self, signatures: Mapping[str, Mapping[str, Any]]):
+        self.signatures = signatures
+        # Compiled per-signature patterns, by group name
+        self._patterns: Dict[str, Tuple[str, "re.Pattern[str]"]] = {}
+        self._header_matchers: Dict[str, "re.Pattern[str]"] = {}
+        self._cookie_matcher = None
+        # (required literal or None, signature name, compiled pattern)
+        self._body_patterns: List[Tuple[Optional[str], str, "re.Pattern[str]"]] = []
+
+        headers: Dict[str, List[Tuple[str, str]]] = {}
+        cookies: List[Tuple[str, str]] = []
+        for name, signature in signatures.items():
+            for header, pattern in signature.get("headers", {}).items():
+                headers.setdefault(header.lower(), []).append((name, pattern))
+            for cookie, pattern in signature.get("cookies", {}).items():
+                # Cookies are matched as "name=value" lines
+                cookie_name = re.escape(cookie[:-1]) + "[^=]*" if cookie.endswith("*") else re.escape(cookie)
+                cookies.append((name, rf"^{cookie_name}=(?:{pattern or '.*'})"))
+            for pattern in signature.get("body", ()):
+                self._body_patterns.append(
+                    (_required_literal(pattern), name, re.compile(_lowercase_pattern(pattern)))
+                )
+
+        for header, entries in headers.items():
+            self._header_matchers[header] = self._combine(entries)
+        if cookies:
+            self._cookie_matcher = self._combine(cookies)
+
+    def _combine(self, entries: Iterable[Tuple[str, str]]) -> "re.Pattern[str]":
+        alternatives = []
+        for name, pattern in entries:
+            group = f"s{len(self._patterns)}"
+            self._patterns[group] = (name, re.compile(pattern, re.IGNORECASE | re.MULTILINE))
+            alternatives.append(f"(?P<{group}>{pattern})")
+        return re.compile("|".join(alternatives), re.IGNORECASE | re.MULTILINE)
+
+    def match(
+        self, headers: Mapping[str, str], cookies: Iterable[str] = (), body: str = ""
+    ) -> List[Dict[str, Optional[str]]]:
+        """Technologies detected in a response.
+
+        Args:
+            headers: Response headers (case-insensitive names are expected).
+            cookies: ``name=value`` strings for the cookies the response set.
+            body: Bounded prefix of the response body.
+
+        Returns:
+            ``{"name", "version", "category"}`` dicts sorted by name, including
+            technologies implied by the ones detected.
+        """
+        found: Dict[str, Optional[str]] = {}
+        for header, value in headers.items():
+            matcher = self._header_matchers.get(header.lower())
+            if matcher is not None:
+                self._collect(matcher, value, found)
+        if self._cookie_matcher is not None:
+            jar = "\n".join(cookies)
+            if jar:
+                self._collect(self._cookie_matcher, jar, found)
+        if body:
+            self._match_body(body, found)
+
+        # Follow implications, e.g. WordPress -> PHP
+        pending = list(found)
+        while pending:
+            for implied in self.signatures[pending.pop()].get("implies", ()):
+                if implied not in found:
+                    found[implied] = None
+                    pending.append(implied)
+
+        return [
+            {"name": name, "version": found[name], "category": self.signatures[name].get("category")}
+            for name in sorted(found)
+        ]
+
+    def _match_body(self, body: str, found: Dict[str, Optional[str]]):
+        lowered = body.lower()
+        for literal, name, pattern in self._body_patterns:
+            if found.get(name) or (literal is not None and literal not in lowered):
+                continue
+            match = pattern.search(lowered)
+            if match:
+                found[name] = (match.group(1) if match.groups() else None) or found.get(name)
+
+    def _collect(self, matcher: "re.Pattern[str]", text: str, found: Dict[str, Optional[str]]):
+        for match in matcher.finditer(text):
+            name, pattern = self._patterns[match.lastgroup]
+            if found.get(name):
+                continue
+            version_match = pattern.match(match.group(match.lastgroup))
+            version = None
+            if version_match and version_match.groups():
+                version = version_match.group(1)
+            found[name] = version or found.get(name)
+
+@lru_cache(maxsize=1)
+def default_engine() -> FingerprintEngine:
+    """The built-in signature set, compiled once per process."""
+    return FingerprintEngine(SIGNATURES)
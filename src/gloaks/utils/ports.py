@@ -0,0 +1,64 @@
+from typing import List
+
+# The 100 TCP ports most often found open, most frequent first (the order of
+# nmap's --top-ports, from nmap-services frequency data)
+TOP_PORTS = [
+    80, 23, 443, 21, 22, 25, 3389, 110, 445, 139, 143, 53, 135, 3306, 8080, 1723, 111, 995, 993, 5900,
+    1025, 587, 8888, 199, 1720, 465, 548, 113, 81, 6001, 10000, 514, 5060, 179, 1026, 2000, 8443, 8000, 32768, 554,
+    26, 1433, 49152, 2001, 515, 8008, 49154, 1027, 5666, 646, 5000, 5631, 631, 49153, 8081, 2049, 88, 79, 5800, 106,
+    2121, 1110, 49155, 6000, 513, 990, 5357, 427, 49156, 543, 544, 5101, 144, 7, 389, 8009, 3128, 444, 9999, 5009,
+    7070, 5190, 3000, 5432, 1900, 3986, 13, 1029, 9, 5051, 6646, 49157, 1028, 873, 1755, 2717, 4899, 9100, 119, 37,
+]
+
+MAX_PORT = 65535
+
+def parse_port_spec(spec: str) -> List[int]:
+    """Expand a port specification into a deduplicated list of ports.
+
+    The spec is a comma-separated list of single ports (``443``), inclusive
+    ranges (``8000-8100``, open-ended ``-1024`` / ``60000-``), ``all`` for
+    every port, and ``top:N`` for the N most commonly open ports. Order is
+    preserved so ``top:`` entries are probed first.
+
+    Raises:
+        ValueError: If the spec is malformed or a port is out of range.
+    """
+    ports: List[int] = []
+    for part in (p.strip() for p in spec.split(",")):
+        if not part:
+            continue
+
+        if part.lower() == "all":
+            ports.extend(range(1, MAX_PORT + 1))
+        elif part.lower().startswith("top:"):
+            count = _to_int(part[4:], part)
+            if not 1 <= count <= len(TOP_PORTS):
+                raise ValueError(f"Invalid port spec '{part}': top:N supports 1-{len(TOP_PORTS)}")
+            ports.extend(TOP_PORTS[:count])
+        elif "-" in part:
+            low, _, high = part.partition("-")
+            start = _to_int(low, part) if low.strip() else 1
+            end = _to_int(high, part) if high.strip() else MAX_PORT
+            if start > end:
+                raise ValueError(f"Invalid port range '{part}'")
+            _check_port(start, part)
+            _check_port(end, part)
+            ports.extend(range(start, end + 1))
+        else:
+            port = _to_int(part, part)
+            _check_port(port, part)
+            ports.append(port)
+
+    if not ports:
+        raise ValueError(f"Port spec '{spec}' selects no ports")
+    return list(dict.fromkeys(ports))
+
+def _to_int(value: str, part: str) -> int:
+    try:
+        return int(value.strip())
+    except ValueError:
+        raise ValueError(f"Invalid port spec '{part}'") from None
+
+def _check_port(port: int, part: str):
+    if not 1 <= port <= MAX_PORT:
+        raise ValueError(f"Port out of range in '{part}': {port}")
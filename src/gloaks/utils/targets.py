@@ -0,0 +1,172 @@
+import asyncio
+import concurrent.futures
+import ipaddress
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, Optional, Union
+from gloaks.utils.validators import InputValidator
+
+IpNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+# Largest CIDR range expanded by default (a /8, or a /104 for IPv6)
+MAX_NETWORK_SIZE = 2 ** 24
+
+_URL_TAIL = re.compile(r"[/?#]")
+
+def parse_target(raw: str) -> Union[str, IpNetwork]:
+    """Normalise one target entry.
+
+    Accepts domains, IPs, URLs (scheme, credentials, port, path, query and
+    fragment are dropped) and CIDR ranges. Domains are lowercased, stripped of
+    a trailing dot and IDNA-encoded; IPs are returned in canonical form.
+
+    Returns:
+        The normalised domain or IP, or the network for a CIDR range.
+
+    Raises:
+        ValueError: If the entry is not a valid target.
+    """
+    value = raw.strip()
+    if "://" in value:
+        value = value.split("://", 1)[1]
+    elif "/" in value:
+        try:
+            return ipaddress.ip_network(value, strict=False)
+        except ValueError:
+            pass
+
+    host = _URL_TAIL.split(value, 1)[0].rsplit("@", 1)[-1]
+    if host.startswith("["):
+        host = host[1:].split("]", 1)[0]
+    elif host.count(":") == 1:
+        host = host.split(":", 1)[0]
+
+    try:
+        return str(ipaddress.ip_address(host))
+    except ValueError:
+        pass
+
+    host = host.lower().rstrip(".")
+    try:
+        host = host.encode("idna").decode("ascii")
+    except UnicodeError:
+        raise ValueError(f"Invalid domain '{raw.strip()}'")
+    if not InputValidator.is_valid_domain(host):
+        raise ValueError(f"Invalid target format: '{raw.strip()}'")
+    return host
+
+class RecentSet:
+    """Set of the ``maxsize`` most recently seen keys.
+
+    Memory stays bounded however long the stream; a duplicate is only missed
+    if more than ``maxsize`` distinct keys arrived since its first sighting.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._keys: "OrderedDict[str, None]" = OrderedDict()
+
+    def add(self, key: str) -> bool:
+        """Record ``key``; True if it was not already present."""
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            return False
+        self._keys[key] = None
+        if len(self._keys) > self.maxsize:
+            self._keys.popitem(last=False)
+        return True
+
+def iter_targets(
+    lines: Iterable[str],
+    dedupe_window: int = 100000,
+    max_network_size: int = MAX_NETWORK_SIZE,
+    on_invalid: Optional[Callable[[str, str], None]] = None,
+) -> Iterator[str]:
+    """Stream normalised, deduplicated targets from ``lines``.
+
+    Blank lines and ``#`` comments are skipped. CIDR ranges are expanded
+    lazily into their host addresses, so a /8 costs no more memory than the
+    deduplication window. Entries, ranges and the addresses a range expands
+    to are deduplicated together over the last ``dedupe_window`` distinct
+    ones, so an address listed on its own and inside a range is yielded once.
+
+    Args:
+        lines: Raw target entries, e.g. an open file or stdin.
+        dedupe_window: Distinct entries remembered for deduplication.
+        max_network_size: Ranges with more addresses than this are rejected.
+        on_invalid: Called with ``(entry, reason)`` for every rejected entry.
+    """
+    seen = RecentSet(dedupe_window)
+    for line in lines:
+        entry = line.strip()
+        if not entry or entry.startswith("#"):
+            continue
+        try:
+            target = parse_target(entry)
+        except ValueError as e:
+            if on_invalid:
+                on_invalid(entry, str(e))
+            continue
+
+        if isinstance(target, str):
+            if seen.add(target):
+                yield target
+            continue
+
+        if target.num_addresses > max_network_size:
+            if on_invalid:
+                on_invalid(entry, f"Range larger than {max_network_size} addresses")
+            continue
+        if seen.add(str(target)):
+            for address in target.hosts():
+                if seen.add(str(address)):
+                    yield str(address)
+
+async def aiter_targets(lines: Iterable[str], queue_size: int = 1024, **kwargs: Any) -> AsyncIterator[str]:
+    """``iter_targets`` for async consumers, reading ``lines`` on a thread.
+
+    Reading stdin or a slow file blocks, so the lines are consumed by a
+    daemon thread and handed to the event loop through a queue of at most
+    ``queue_size`` targets. Keyword arguments go to ``iter_targets``;
+    ``on_invalid`` is called from the reader thread.
+    """
+    loop = asyncio.get_running_loop()
+    queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    done = object()
+
+    def put(item: Any) -> bool:
+        if stop.is_set():
+            return False
+        try:
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+        except (RuntimeError, concurrent.futures.CancelledError):
+            # The loop closed or the consumer went away
+            return False
+        return True
+
+    def read():
+        try:
+            for target in iter_targets(lines, **kwargs):
+                if not put(target):
+                    return
+        except Exception as e:
+            put(e)
+            return
+        put(done)
+
+    threading.Thread(target=read, name="gloaks-targets", daemon=True).start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Unblock a reader waiting on a full queue so it can see the stop flag
+        stop.set()
+        while not queue.empty():
+            queue.get_nowait()
@@ -8,6 +8,7 @@ from sqlalchemy.pool import StaticPool
 from gloaks.api.app import app, get_session
 from gloaks.api.models import Scan
 import pytest_asyncio
+import asyncio
 import os
 
 # Setup Test Database (Async)
@@ -129,3 +130,72 @@ async def test_scan_task_failure(MockEngine):
     finally:
         async with test_engine.begin() as conn:
             await conn.run_sync(SQLModel.metadata.drop_all)
+
+@patch("gloaks.api.app.GloaksEngine")
+@pytest.mark.asyncio
+async def test_scan_task_persists_partial_results(MockEngine):
+    from gloaks.api.app import run_scan_task
+
+    async with test_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    try:
+        async_session_factory = sessionmaker(
+            test_engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+        async with async_session_factory() as session:
+            session.add(Scan(id="test-partial-id", target="example.com", status="pending"))
+            await session.commit()
+
+        seen_mid_scan = {}
+
+        async def fake_run(target, cancellation_token=None, on_event=None):
+            on_event({"type": "module", "target": target, "module": "port_scan", "data": {"open_ports": []}})
+            await asyncio.sleep(0.05)
+            async with async_session_factory() as session:
+                scan = await session.get(Scan, "test-partial-id")
+                seen_mid_scan.update(scan.results or {})
+            return {"target": target, "modules": {"port_scan": {"open_ports": []}, "geolocation": {}}}
+
+        MockEngine.return_value.run.side_effect = fake_run
+
+        await run_scan_task("test-partial-id", "example.com", {}, None, async_session_factory)
+
+        assert seen_mid_scan["modules"] == {"port_scan": {"open_ports": []}}
+        async with async_session_factory() as session:
+            scan = await session.get(Scan, "test-partial-id")
+            assert scan.status == "completed"
+            assert set(scan.results["modules"]) == {"port_scan", "geolocation"}
+    finally:
+        async with test_engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.drop_all)
+
+@patch("gloaks.api.app.run_scan_task")
+@pytest.mark.asyncio
+async def test_create_scan_rejects_unknown_modules(mock_task, client):
+    response = client.post("/scans",
+                          json={"target": "example.com", "config": {"skip_modules": ["no_such_module"]}},
+                          headers={"X-API-Key": "gloaks-secret-123"})
+    assert response.status_code == 422
+    assert "no_such_module" in response.json()["detail"]
+
+@patch("gloaks.api.app.run_scan_task")
+@pytest.mark.asyncio
+async def test_create_scan_enforces_scope(mock_task, client, tmp_path, monkeypatch):
+    from gloaks.api import app as app_module
+    from gloaks.core.config import load_config
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    scope_file = tmp_path / "scope.yaml"
+    scope_file.write_text('allow:\n  domains:\n    - "*.example.com"\n')
+    config = load_config()
+    config.scope_file = str(scope_file)
+    monkeypatch.setattr(app_module, "load_config", lambda: config)
+    app_module.request_history.clear()
+    headers = {"X-API-Key": "gloaks-secret-123"}
+
+    response = client.post("/scans", json={"target": "evil.org"}, headers=headers)
+    assert response.status_code == 403
+    response = client.post("/scans", json={"target": "www.example.com"}, headers=headers)
+    assert response.status_code == 200
@@ -0,0 +1,40 @@
+import subprocess
+import sys
+
+# Cumulative import time allowed for gloaks.cli.main, in microseconds. The
+# module only needs click (~25ms locally); the headroom absorbs slow CI hosts.
+IMPORT_BUDGET_US = 150_000
+
+# Modules that must not be loaded just to parse arguments or print help
+HEAVY_MODULES = (
+    "fastapi", "uvicorn", "sqlmodel", "sqlalchemy", "httpx", "aiodns",
+    "pydantic_settings", "rich", "structlog", "gloaks.core.engine",
+)
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *code], capture_output=True, text=True, check=True)
+
+def test_cli_import_time_within_budget():
+    result = _run(["-X", "importtime", "-c", "import gloaks.cli.main"])
+
+    # Lines look like: "import time:  self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == "gloaks.cli.main":
+            cumulative = int(fields[1])
+            break
+    else:
+        raise AssertionError("gloaks.cli.main missing from -X importtime output")
+
+    assert cumulative < IMPORT_BUDGET_US, f"gloaks.cli.main took {cumulative}us to import"
+
+def test_cli_help_does_not_import_heavy_modules():
+    code = (
+        "import sys\n"
+        "from gloaks.cli.main import cli\n"
+        "for args in (['--help'], ['scan', '--help'], ['api', '--help']):\n"
+        "    cli(args, standalone_mode=False)\n"
+        f"print('loaded:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    result = _run(["-c", code])
+    assert result.stdout.strip().splitlines()[-1] == "loaded:"
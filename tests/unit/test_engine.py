@@ -1,12 +1,14 @@
+import asyncio
 import pytest
-from gloaks.core.engine import GloaksEngine
+from gloaks.core.engine import AddressResults, GloaksEngine
 from gloaks.core.config import GloaksConfig
+from gloaks.modules.base import ReconModule
 
 @pytest.mark.asyncio
 async def test_engine_initialization():
     config = GloaksConfig()
     engine = GloaksEngine(config)
-    assert len(engine.modules) == 4
+    assert len(engine.modules) == 5
     assert engine.modules[0].name == "geolocation"
 
 @pytest.mark.asyncio
@@ -26,3 +28,405 @@ async def test_engine_run_modules():
     assert results["target"] == "invalid-target-12345.local"
     assert "geolocation" in results["modules"]
     assert "port_scan" in results["modules"]
+
+class SlowModule(ReconModule):
+    """Stub module that records how many targets are being scanned at once."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    @property
+    def name(self) -> str:
+        return "slow"
+
+    @property
+    def version(self) -> str:
+        return "0.0.1"
+
+    @property
+    def description(self) -> str:
+        return "Sleeps briefly."
+
+    async def run(self, target, config, context=None):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return {"seen": target}
+
+@pytest.mark.asyncio
+async def test_engine_run_many_respects_concurrency_limit():
+    engine = GloaksEngine(GloaksConfig())
+    module = SlowModule()
+    engine.modules = [module]
+
+    targets = (f"10.0.0.{i}" for i in range(20))
+    results = [r async for r in engine.run_many(targets, max_concurrent=3)]
+
+    assert len(results) == 20
+    assert {r["target"] for r in results} == {f"10.0.0.{i}" for i in range(20)}
+    assert module.peak == 3
+
+@pytest.mark.asyncio
+async def test_engine_run_many_accepts_async_iterables():
+    engine = GloaksEngine(GloaksConfig())
+    engine.modules = [SlowModule()]
+
+    async def targets():
+        for i in range(5):
+            yield f"10.0.0.{i}"
+
+    results = [r async for r in engine.run_many(targets())]
+    assert sorted(r["modules"]["slow"]["seen"] for r in results) == [f"10.0.0.{i}" for i in range(5)]
+
+class ArtifactModule(ReconModule):
+    """Stub module that publishes and/or consumes scan context artifacts."""
+
+    def __init__(self, name, requires=(), provides=(), delay=0.0):
+        self._name = name
+        self.requires = requires
+        self.provides = provides
+        self.delay = delay
+        self.seen_context = None
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def version(self) -> str:
+        return "0.0.1"
+
+    @property
+    def description(self) -> str:
+        return "Exchanges artifacts."
+
+    async def run(self, target, config, context=None):
+        self.seen_context = dict(context)
+        await asyncio.sleep(self.delay)
+        for artifact in self.provides:
+            context[artifact] = f"{artifact} from {self.name}"
+        return {}
+
+@pytest.mark.asyncio
+async def test_engine_runs_modules_in_dependency_order():
+    engine = GloaksEngine(GloaksConfig())
+    consumer = ArtifactModule("consumer", requires=("open_ports",))
+    producer = ArtifactModule("producer", requires=("resolved_ips",), provides=("open_ports",), delay=0.01)
+    engine.modules = [consumer, producer]
+
+    results = await engine.run("127.0.0.1")
+
+    assert results["resolved_ips"] == ["127.0.0.1"]
+    assert producer.seen_context["resolved_ips"] == ["127.0.0.1"]
+    assert consumer.seen_context["open_ports"] == "open_ports from producer"
+
+@pytest.mark.asyncio
+async def test_engine_ignores_requirements_without_producer():
+    engine = GloaksEngine(GloaksConfig())
+    consumer = ArtifactModule("consumer", requires=("open_ports",))
+    engine.modules = [consumer]
+
+    results = await engine.run("127.0.0.1")
+
+    assert results["modules"]["consumer"] == {}
+    assert "open_ports" not in consumer.seen_context
+
+@pytest.mark.asyncio
+async def test_engine_rejects_dependency_cycles():
+    engine = GloaksEngine(GloaksConfig())
+    engine.modules = [
+        ArtifactModule("a", requires=("y",), provides=("x",)),
+        ArtifactModule("b", requires=("x",), provides=("y",)),
+    ]
+
+    with pytest.raises(ValueError, match="cycle"):
+        await engine.run("127.0.0.1")
+
+class SleepyModule(ArtifactModule):
+    """Stub module that ignores deadlines and sleeps for a fixed time."""
+
+    async def run(self, target, config, context=None):
+        await asyncio.sleep(self.delay)
+        return {"done": True}
+
+@pytest.mark.asyncio
+async def test_engine_cancellation_token_stops_inflight_modules():
+    engine = GloaksEngine(GloaksConfig())
+    engine.modules = [SleepyModule("fast", delay=0), SleepyModule("slow", delay=30)]
+    token = asyncio.Event()
+
+    loop = asyncio.get_running_loop()
+    loop.call_later(0.05, token.set)
+    started = loop.time()
+    results = await engine.run("127.0.0.1", cancellation_token=token)
+
+    assert loop.time() - started < 5
+    assert results["status"] == "cancelled"
+    assert results["modules"]["fast"] == {"done": True}
+    assert results["modules"]["slow"] == {"status": "cancelled"}
+
+@pytest.mark.asyncio
+async def test_engine_module_timeout_returns_partial_results():
+    config = GloaksConfig()
+    config.engine.module_timeouts = {"slow": 0.05}
+    engine = GloaksEngine(config)
+    engine.modules = [SleepyModule("fast", delay=0), SleepyModule("slow", delay=30)]
+
+    results = await engine.run("127.0.0.1")
+
+    assert results["modules"]["fast"] == {"done": True}
+    assert results["modules"]["slow"] == {"status": "timeout"}
+    assert "status" not in results
+
+@pytest.mark.asyncio
+async def test_engine_scan_timeout_marks_scan():
+    config = GloaksConfig()
+    config.engine.scan_timeout = 0.05
+    engine = GloaksEngine(config)
+    engine.modules = [SleepyModule("slow", delay=30)]
+
+    results = await engine.run("127.0.0.1")
+
+    assert results["status"] == "timeout"
+    assert results["modules"]["slow"] == {"status": "timeout"}
+
+class FindingModule(ArtifactModule):
+    """Stub module that reports findings before returning."""
+
+    async def run(self, target, config, context=None):
+        for port in (22, 80):
+            self.emit(context, {"port": port})
+            await asyncio.sleep(0)
+        return {"open_ports": [22, 80]}
+
+@pytest.mark.asyncio
+async def test_engine_run_stream_yields_findings_before_results():
+    engine = GloaksEngine(GloaksConfig())
+    engine.modules = [FindingModule("ports"), SleepyModule("slow", delay=0.05)]
+
+    events = [event async for event in engine.run_stream("127.0.0.1")]
+    kinds = [(e["type"], e.get("module")) for e in events]
+
+    assert kinds == [
+        ("finding", "ports"),
+        ("finding", "ports"),
+        ("module", "ports"),
+        ("module", "slow"),
+        ("complete", None),
+    ]
+    assert events[0]["data"] == {"port": 22}
+    assert events[-1]["results"]["modules"]["ports"] == {"open_ports": [22, 80]}
+
+@pytest.mark.asyncio
+async def test_engine_run_stream_close_cancels_scan():
+    engine = GloaksEngine(GloaksConfig())
+    slow = SleepyModule("slow", delay=30)
+    engine.modules = [FindingModule("ports"), slow]
+
+    stream = engine.run_stream("127.0.0.1")
+    first = await stream.__anext__()
+    await stream.aclose()
+
+    assert first["type"] == "finding"
+
+@pytest.mark.asyncio
+async def test_run_sharded_preserves_input_order():
+    config = GloaksConfig()
+    config.engine.skip_modules = ["geolocation", "port_scan", "http_analysis", "dns_enumeration", "tls"]
+    engine = GloaksEngine(config)
+    targets = [f"192.0.2.{i}" for i in range(1, 12)] + ["192.0.2.1"]
+
+    results = [r async for r in engine.run_sharded(targets, workers=2, chunk_size=3)]
+
+    assert [r["target"] for r in results] == targets
+    assert results[0]["resolved_ips"] == ["192.0.2.1"]
+
+@pytest.mark.asyncio
+async def test_run_sharded_rejects_invalid_workers():
+    engine = GloaksEngine(GloaksConfig())
+    with pytest.raises(ValueError):
+        async for _ in engine.run_sharded(["192.0.2.1"], workers=0):
+            pass
+
+class AddressModule(ArtifactModule):
+    """Stub module that counts its runs and publishes a per-target artifact."""
+
+    def __init__(self, name, scope, provides=(), delay=0.0):
+        super().__init__(name, requires=("resolved_ips",), provides=provides, delay=delay)
+        self.scope = scope
+        self.runs = []
+
+    async def run(self, target, config, context=None):
+        self.runs.append(target)
+        await asyncio.sleep(self.delay)
+        self.emit(context, {"seen": target})
+        for artifact in self.provides:
+            context[artifact] = [target]
+        return {"seen": target}
+
+def _fake_resolution(engine, monkeypatch, addresses):
+    async def resolve(target):
+        return [addresses[target]]
+    monkeypatch.setattr(engine, "_resolve_target", resolve)
+
+@pytest.mark.asyncio
+async def test_run_many_scans_each_address_once(monkeypatch):
+    engine = GloaksEngine(GloaksConfig())
+    ports = AddressModule("ports", "ip", provides=("open_ports",), delay=0.01)
+    web = AddressModule("web", "host")
+    consumer = ArtifactModule("consumer", requires=("open_ports",))
+    engine.modules = [ports, web, consumer]
+    addresses = {"a.test": "10.0.0.1", "b.test": "10.0.0.1", "c.test": "10.0.0.1", "d.test": "10.0.0.2"}
+    _fake_resolution(engine, monkeypatch, addresses)
+
+    shared = AddressResults()
+    results = {r["target"]: r async for r in engine.run_many(addresses, max_concurrent=4, address_results=shared)}
+
+    assert sorted(ports.runs) == ["10.0.0.1", "10.0.0.2"]
+    assert sorted(web.runs) == sorted(addresses)
+    assert shared.hits == 2
+    for target, address in addresses.items():
+        assert results[target]["modules"]["ports"] == {"seen": address}
+        assert results[target]["modules"]["web"] == {"seen": target}
+    # Artifacts of the shared run reach the dependants of every target
+    assert consumer.seen_context["open_ports"] in (["10.0.0.1"], ["10.0.0.2"])
+
+@pytest.mark.asyncio
+async def test_run_many_without_grouping_scans_every_target(monkeypatch):
+    config = GloaksConfig()
+    config.engine.group_by_ip = False
+    engine = GloaksEngine(config)
+    ports = AddressModule("ports", "ip")
+    engine.modules = [ports]
+    addresses = {"a.test": "10.0.0.1", "b.test": "10.0.0.1"}
+    _fake_resolution(engine, monkeypatch, addresses)
+
+    results = [r async for r in engine.run_many(addresses)]
+
+    assert len(results) == 2
+    assert sorted(ports.runs) == ["a.test", "b.test"]
+
+@pytest.mark.asyncio
+async def test_shared_address_run_survives_cancelled_target(monkeypatch):
+    engine = GloaksEngine(GloaksConfig())
+    shared = AddressResults()
+    ports = AddressModule("ports", "ip", delay=0.05)
+    engine.modules = [ports]
+    _fake_resolution(engine, monkeypatch, {"a.test": "10.0.0.1", "b.test": "10.0.0.1"})
+    token = asyncio.Event()
+    asyncio.get_running_loop().call_later(0.01, token.set)
+
+    first, second = await asyncio.gather(
+        engine.run("a.test", cancellation_token=token, address_results=shared),
+        engine.run("b.test", address_results=shared),
+    )
+
+    assert first["modules"]["ports"] == {"status": "cancelled"}
+    assert second["modules"]["ports"] == {"seen": "10.0.0.1"}
+    assert ports.runs == ["10.0.0.1"]
+
+def test_address_results_carry_over_between_event_loops(monkeypatch):
+    # Like a shard worker scanning successive chunks, each on a fresh loop
+    engine = GloaksEngine(GloaksConfig())
+    ports = AddressModule("ports", "ip", provides=("open_ports",))
+    engine.modules = [ports]
+    _fake_resolution(engine, monkeypatch, {"a.test": "10.0.0.1", "b.test": "10.0.0.1"})
+    shared = AddressResults()
+
+    async def scan(targets):
+        return [r async for r in engine.run_many(targets, address_results=shared)]
+
+    first, = asyncio.run(scan(["a.test"]))
+    second, = asyncio.run(scan(["b.test"]))
+
+    assert ports.runs == ["10.0.0.1"]
+    assert second["modules"]["ports"] == first["modules"]["ports"] == {"seen": "10.0.0.1"}
+    assert shared.hits == 1
+
+@pytest.mark.asyncio
+async def test_failed_address_runs_are_retried(monkeypatch):
+    class FlakyModule(AddressModule):
+        async def run(self, target, config, context=None):
+            self.runs.append(target)
+            if len(self.runs) == 1:
+                raise RuntimeError("boom")
+            return {"seen": target}
+
+    engine = GloaksEngine(GloaksConfig())
+    flaky = FlakyModule("ports", "ip")
+    engine.modules = [flaky]
+    _fake_resolution(engine, monkeypatch, {"a.test": "10.0.0.1", "b.test": "10.0.0.1"})
+    shared = AddressResults()
+
+    first = await engine.run("a.test", address_results=shared)
+    second = await engine.run("b.test", address_results=shared)
+
+    assert first["modules"]["ports"] == {"error": "boom"}
+    assert second["modules"]["ports"] == {"seen": "10.0.0.1"}
+    assert len(flaky.runs) == 2
+
+@pytest.mark.asyncio
+async def test_abandoned_address_run_is_cancelled(monkeypatch):
+    class StuckModule(AddressModule):
+        cancelled = False
+
+        async def run(self, target, config, context=None):
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+
+    engine = GloaksEngine(GloaksConfig())
+    stuck = StuckModule("ports", "ip")
+    engine.modules = [stuck]
+    _fake_resolution(engine, monkeypatch, {"a.test": "10.0.0.1"})
+    shared = AddressResults()
+    token = asyncio.Event()
+    asyncio.get_running_loop().call_later(0.05, token.set)
+
+    results = await engine.run("a.test", cancellation_token=token, address_results=shared)
+    await asyncio.sleep(0)
+
+    assert results["modules"]["ports"] == {"status": "cancelled"}
+    assert stuck.cancelled
+    assert len(shared) == 0
+
+@pytest.mark.asyncio
+async def test_partial_address_results_are_not_reused(monkeypatch):
+    class PartialModule(AddressModule):
+        async def run(self, target, config, context=None):
+            self.runs.append(target)
+            return {"open_ports": [], "partial": True}
+
+    engine = GloaksEngine(GloaksConfig())
+    partial = PartialModule("ports", "ip")
+    engine.modules = [partial]
+    _fake_resolution(engine, monkeypatch, {"a.test": "10.0.0.1", "b.test": "10.0.0.1"})
+    shared = AddressResults()
+
+    await engine.run("a.test", address_results=shared)
+    await engine.run("b.test", address_results=shared)
+
+    assert partial.runs == ["10.0.0.1", "10.0.0.1"]
+    assert shared.hits == 0
+
+@pytest.mark.asyncio
+async def test_address_results_expire():
+    now = [0.0]
+    shared = AddressResults(ttl=60, clock=lambda: now[0])
+    runs = []
+
+    async def run():
+        runs.append(now[0])
+        return {"seen": True}, {}, []
+
+    await shared.get(("ports", "10.0.0.1"), run)
+    now[0] = 59
+    await shared.get(("ports", "10.0.0.1"), run)
+    now[0] = 61
+    await shared.get(("ports", "10.0.0.1"), run)
+
+    assert runs == [0.0, 61]
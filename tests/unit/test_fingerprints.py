@@ -0,0 +1,88 @@
+import time
+import httpx
+from gloaks.utils.fingerprints import FingerprintEngine, SIGNATURES, _required_literal, default_engine
+
+# Average matching cost allowed per response, in microseconds. Matching runs on
+# every response of a batch sweep; the headroom absorbs slow CI hosts.
+MATCH_BUDGET_US = 1000
+
+HEADERS = httpx.Headers({
+    "Server": "nginx/1.18.0 (Ubuntu)",
+    "X-Powered-By": "PHP/7.4.3",
+    "Content-Type": "text/html; charset=UTF-8",
+    "Link": '<https://example.com/wp-json/>; rel="https://api.w.org/"',
+    "Cache-Control": "no-cache",
+})
+COOKIES = ["PHPSESSID=abc123", "wordpress_test_cookie=WP+Cookie+check"]
+BODY = (
+    "<!DOCTYPE html><html><head>"
+    '<meta name="generator" content="WordPress 6.4.2" />'
+    '<script src="/wp-includes/js/jquery/jquery-3.7.1.min.js"></script>'
+    "</head><body>" + "<p>lorem ipsum dolor sit amet</p>" * 400 + "</body></html>"
+)
+
+def by_name(matches):
+    return {m["name"]: m for m in matches}
+
+def test_matches_headers_cookies_and_body_with_versions():
+    found = by_name(default_engine().match(HEADERS, COOKIES, BODY))
+
+    assert found["nginx"]["version"] == "1.18.0"
+    assert found["PHP"]["version"] == "7.4.3"
+    assert found["WordPress"]["version"] == "6.4.2"
+    assert found["jQuery"]["version"] == "3.7.1"
+    assert found["WordPress"]["category"] == "CMS"
+
+def test_implied_technologies_are_added():
+    found = by_name(default_engine().match({"X-Powered-By": "Express"}))
+    assert set(found) == {"Express", "Node.js"}
+    assert found["Node.js"]["version"] is None
+
+def test_similar_server_tokens_are_told_apart():
+    assert [m["name"] for m in default_engine().match({"Server": "Apache-Coyote/1.1"})] == ["Apache Tomcat", "Java"]
+    assert by_name(default_engine().match({"Server": "Apache/2.4.41"}))["Apache HTTP Server"]["version"] == "2.4.41"
+
+def test_presence_only_and_cookie_signatures():
+    engine = FingerprintEngine({
+        "Thing": {"category": "Test", "headers": {"X-Thing": ""}},
+        "Jar": {"category": "Test", "cookies": {"jar.id": ""}},
+    })
+    assert [m["name"] for m in engine.match({"x-thing": "1"})] == ["Thing"]
+    assert [m["name"] for m in engine.match({}, ["jar.id=42"])] == ["Jar"]
+    # The cookie name is literal, not a pattern
+    assert engine.match({}, ["jarxid=42"]) == []
+
+def test_cookie_name_prefixes_match_real_wordpress_cookies():
+    engine = default_engine()
+    for cookie in ("wp-settings-1=libraryContent%3Dbrowse", "wp-settings-time-1=1700000000",
+                   "wordpress_logged_in_5c0f3c6e0c0c4b0d8e6f=admin%7C1700000000"):
+        assert "WordPress" in by_name(engine.match({}, [cookie])), cookie
+    # Only the prefix is a wildcard
+    assert engine.match({}, ["my-wp-settings-1=x"]) == []
+
+def test_no_false_positives_on_plain_response():
+    assert default_engine().match({"Content-Type": "text/html"}, [], "<html><body>hello</body></html>") == []
+
+def test_required_literal_extraction():
+    assert _required_literal(r"<meta name=\"generator\" content=\"WordPress ?([\d.]+)?") == '<meta name="generator" content="wordpress'
+    assert _required_literal(r"/wp-(?:content|includes)/") == "/wp-"
+    assert _required_literal(r"cdn\.shopify\.com") == "cdn.shopify.com"
+    assert _required_literal(r"ab{2,3}cdef") == "cdef"
+    assert _required_literal(r"foo|barbaz") is None
+    assert _required_literal(r"[a-z]+") is None
+
+def test_body_matching_is_case_insensitive():
+    found = by_name(default_engine().match({}, [], '<META NAME="Generator" CONTENT="Drupal 10.1">'))
+    assert found["Drupal"]["version"] == "10.1"
+
+def test_matching_cost_per_response_within_budget():
+    engine = FingerprintEngine(SIGNATURES)
+    engine.match(HEADERS, COOKIES, BODY)
+
+    rounds = 500
+    started = time.perf_counter()
+    for _ in range(rounds):
+        engine.match(HEADERS, COOKIES, BODY)
+    per_response_us = (time.perf_counter() - started) / rounds * 1e6
+
+    assert per_response_us < MATCH_BUDGET_US, f"fingerprint matching took {per_response_us:.0f}us per response"
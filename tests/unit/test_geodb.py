@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from click.testing import CliRunner
+from gloaks.cli.main import cli
+from gloaks.core.geodb import GeoDatabase, build_database
+from gloaks.modules.geolocation import GeolocationModule
+
+RANGES = [
+    ("10.0.0.0", "10.0.0.255", ("Testland", "Alpha", "ISP A", 1.5, 2.5)),
+    ("10.0.2.0", "10.0.2.255", ("Testland", "Beta", "", 3.0, 4.0)),
+    ("192.0.2.0", "192.0.2.127", ("Testland", "Alpha", "ISP A", 1.5, 2.5)),
+    ("2001:db8::", "2001:db8::ffff", ("Sixland", "Gamma", "ISP 6", -1.0, -2.0)),
+]
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "geo.db")
+    counts = build_database(RANGES, path)
+    assert counts == {"ipv4_ranges": 3, "ipv6_ranges": 1, "locations": 3}
+    db = GeoDatabase(path)
+    yield db
+    db.close()
+
+def test_lookup_finds_covering_range(database):
+    assert database.lookup("10.0.0.42") == {
+        "country": "Testland", "city": "Alpha", "isp": "ISP A", "lat": 1.5, "lon": 2.5, "ip": "10.0.0.42",
+    }
+    assert database.lookup("10.0.2.255")["city"] == "Beta"
+    assert database.lookup("10.0.2.0")["isp"] is None
+    assert database.lookup("192.0.2.1")["city"] == "Alpha"
+    assert database.lookup("2001:db8::1")["country"] == "Sixland"
+
+def test_lookup_misses_gaps_and_edges(database):
+    assert database.lookup("9.255.255.255") is None
+    assert database.lookup("10.0.1.7") is None
+    assert database.lookup("255.255.255.255") is None
+    assert database.lookup("2001:db8::1:0") is None
+    with pytest.raises(ValueError):
+        database.lookup("not-an-ip")
+
+def test_build_rejects_overlapping_ranges(tmp_path):
+    location = ("X", "Y", "", 0.0, 0.0)
+    with pytest.raises(ValueError):
+        build_database([("10.0.0.0", "10.0.0.10", location), ("10.0.0.5", "10.0.0.20", location)], str(tmp_path / "db"))
+
+def test_rejects_foreign_files(tmp_path):
+    path = tmp_path / "junk.db"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError):
+        GeoDatabase(str(path))
+
+def test_geodb_build_cli_and_offline_provider(tmp_path):
+    csv_path = tmp_path / "ranges.csv"
+    csv_path.write_text(
+        "network,country,city,latitude,longitude\n"
+        "198.51.100.0/24,Testland,Delta,5.0,6.0\n"
+    )
+    db_path = tmp_path / "geo.db"
+
+    result = CliRunner().invoke(cli, ["geodb", "build", str(csv_path), str(db_path)])
+    assert result.exit_code == 0, result.output
+    assert "1 IPv4" in result.output
+
+    module = GeolocationModule()
+    config = {"provider": "offline", "database": str(db_path)}
+
+    found = asyncio.run(module.run("example.com", config, {"resolved_ips": ["198.51.100.7"]}))
+    assert found["city"] == "Delta"
+    missing = asyncio.run(module.run("203.0.113.1", config))
+    assert "error" in missing
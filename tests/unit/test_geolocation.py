@@ -0,0 +1,224 @@
+import asyncio
+import json
+from pathlib import Path
+import subprocess
+import sys
+import httpx
+import pytest
+import pytest_asyncio
+from gloaks.core.geo_batch import GeoBatcher
+from gloaks.core.geo_cache import GeoCache, geo_cache
+from gloaks.modules.geolocation import GeolocationModule
+
+@pytest.fixture(autouse=True)
+def clear_geo_cache():
+    geo_cache.clear()
+    yield
+    geo_cache.clear()
+
+class BatchServer:
+    """Stand-in for ip-api's /batch endpoint."""
+
+    def __init__(self):
+        self.batches = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        queries = json.loads(request.content)
+        self.batches.append(queries)
+        return httpx.Response(200, json=[
+            {"status": "success", "query": q, "country": "Testland", "city": f"City {q}", "isp": "ISP", "lat": 1.0, "lon": 2.0}
+            for q in queries
+        ])
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_batch():
+    server = BatchServer()
+    batcher = GeoBatcher(window=0.05)
+    ips = [f"192.0.2.{i}" for i in range(1, 6)] + ["192.0.2.1"]
+
+    async with server.client() as client:
+        records = await asyncio.gather(*[
+            batcher.lookup(ip, "http://ip-api.com/batch", 5.0, client=client) for ip in ips
+        ])
+
+    assert server.batches == [[f"192.0.2.{i}" for i in range(1, 6)]]
+    assert [r["query"] for r in records] == ips
+    assert batcher.requests == 1
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_without_waiting():
+    server = BatchServer()
+    batcher = GeoBatcher(window=10.0, max_batch=3)
+
+    async with server.client() as client:
+        records = await asyncio.wait_for(asyncio.gather(*[
+            batcher.lookup(f"192.0.2.{i}", "http://ip-api.com/batch", 5.0, client=client) for i in range(3)
+        ]), timeout=1)
+
+    assert len(server.batches) == 1
+    assert len(records) == 3
+
+@pytest.mark.asyncio
+async def test_batch_failure_reaches_every_caller():
+    def handler(request):
+        raise httpx.ConnectError("unreachable", request=request)
+
+    batcher = GeoBatcher(window=0.01)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        results = await asyncio.gather(*[
+            batcher.lookup(ip, "http://ip-api.com/batch", 5.0, client=client) for ip in ("192.0.2.1", "192.0.2.2")
+        ], return_exceptions=True)
+
+    assert all(isinstance(r, httpx.ConnectError) for r in results)
+
+@pytest.mark.asyncio
+async def test_geolocation_module_uses_batch_endpoint():
+    server = BatchServer()
+    async with server.client() as client:
+        module = GeolocationModule(http_client=client)
+        results = await asyncio.gather(*[
+            module.run(f"host{i}.example", {"batch_window": 0.05}, {"resolved_ips": [f"192.0.2.{i}"]})
+            for i in range(1, 4)
+        ])
+
+    assert len(server.batches) == 1
+    assert [r["ip"] for r in results] == ["192.0.2.1", "192.0.2.2", "192.0.2.3"]
+    assert results[0]["city"] == "City 192.0.2.1"
+
+@pytest.mark.asyncio
+async def test_geolocation_module_reuses_cached_results():
+    server = BatchServer()
+    async with server.client() as client:
+        module = GeolocationModule(http_client=client)
+        first = await module.run("192.0.2.9", {"batch_window": 0.01})
+        second = await module.run("192.0.2.9", {"batch_window": 0.01})
+        await module.run("192.0.2.9", {"batch_window": 0.01, "cache_ttl": 0})
+
+    assert first.pop("cache") == {"result": "miss", "memory_hits": 0, "persistent_hits": 0, "misses": 1, "entries": 1}
+    assert second.pop("cache") == {"result": "memory", "memory_hits": 1, "persistent_hits": 0, "misses": 1, "entries": 1}
+    assert first == second
+    assert len(server.batches) == 2
+    assert geo_cache.memory_hits == 1
+
+def test_default_config_keeps_geolocation_cache_off_the_database():
+    code = (
+        "import asyncio, sys\n"
+        "from gloaks.core.config import load_config\n"
+        "from gloaks.core.geo_cache import geo_cache\n"
+        "from gloaks.modules.geolocation import GeolocationModule\n"
+        "GeolocationModule.from_config(load_config())\n"
+        "asyncio.run(geo_cache.put('192.0.2.1', {'ip': '192.0.2.1'}))\n"
+        "asyncio.run(geo_cache.get('192.0.2.1'))\n"
+        "print('loaded:' + ','.join(m for m in ('sqlmodel', 'sqlalchemy') if m in sys.modules))\n"
+    )
+    # Run from the repository root so config/default.yaml is picked up
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        cwd=Path(__file__).resolve().parents[2],
+    )
+    assert result.stdout.strip().splitlines()[-1] == "loaded:"
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest_asyncio.fixture
+async def sql_store():
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import StaticPool
+    from gloaks.core.geo_store import SqlGeoStore
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    yield SqlGeoStore(engine)
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_persistent_tier_survives_a_fresh_memory_cache(sql_store):
+    clock = FakeClock()
+    record = {"country": "Testland", "city": "Alpha", "ip": "192.0.2.1"}
+
+    first_run = GeoCache(ttl=3600, persistent=True, store=sql_store, clock=clock)
+    await first_run.put("192.0.2.1", record)
+
+    # A new process starts with an empty memory tier
+    second_run = GeoCache(ttl=3600, persistent=True, store=sql_store, clock=clock)
+    clock.now += 1800
+    assert await second_run.get("192.0.2.1") == record
+    assert second_run.persistent_hits == 1
+    assert await second_run.get("192.0.2.1") == record
+    assert second_run.memory_hits == 1
+
+    third_run = GeoCache(ttl=3600, persistent=True, store=sql_store, clock=clock)
+    clock.now += 3600
+    assert await third_run.get("192.0.2.1") is None
+    assert third_run.misses == 1
+
+@pytest.mark.asyncio
+async def test_memory_tier_evicts_least_recently_used():
+    cache = GeoCache(max_entries=2, ttl=60)
+    for ip in ("192.0.2.1", "192.0.2.2", "192.0.2.3"):
+        await cache.put(ip, {"ip": ip})
+
+    assert await cache.get("192.0.2.1") is None
+    assert await cache.get("192.0.2.3") == {"ip": "192.0.2.3"}
+
+@pytest.mark.asyncio
+async def test_malformed_batch_response_fails_every_caller():
+    def handler(request):
+        # One record for two queries
+        return httpx.Response(200, json=[{"status": "success", "query": "192.0.2.1"}])
+
+    batcher = GeoBatcher(window=0.01)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        results = await asyncio.gather(*[
+            batcher.lookup(ip, "http://ip-api.com/batch", 5.0, client=client) for ip in ("192.0.2.1", "192.0.2.2")
+        ], return_exceptions=True)
+
+    assert all(isinstance(r, ValueError) and "expected 2 records" in str(r) for r in results)
+
+@pytest.mark.asyncio
+async def test_abandoned_lookups_leave_no_unretrieved_errors():
+    sent = asyncio.Event()
+
+    async def handler(request):
+        sent.set()
+        await asyncio.sleep(0.05)
+        raise httpx.ConnectError("unreachable", request=request)
+
+    loop = asyncio.get_running_loop()
+    unhandled = []
+    loop.set_exception_handler(lambda _, context: unhandled.append(context))
+    batcher = GeoBatcher(window=0.01)
+    try:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            with pytest.raises(asyncio.TimeoutError):
+                await batcher.lookup("192.0.2.1", "http://ip-api.com/batch", 0.03, client=client)
+            await asyncio.wait_for(sent.wait(), 1)
+            # The batch still fails after its only caller gave up
+            while batcher._tasks:
+                await asyncio.sleep(0.01)
+        import gc
+        gc.collect()
+        await asyncio.sleep(0)
+    finally:
+        loop.set_exception_handler(None)
+
+    assert unhandled == []
+
+@pytest.mark.asyncio
+async def test_aclose_cancels_pending_batches():
+    batcher = GeoBatcher(window=10.0)
+    lookup = asyncio.create_task(batcher.lookup("192.0.2.1", "http://ip-api.com/batch", 30.0))
+    await asyncio.sleep(0)
+
+    await batcher.aclose()
+
+    assert not batcher._tasks
+    with pytest.raises(asyncio.CancelledError):
+        await lookup
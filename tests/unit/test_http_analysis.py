@@ -1,15 +1,16 @@
+import asyncio
 import pytest
-from unittest.mock import AsyncMock, patch, MagicMock
 from gloaks.modules.http_analysis import HttpAnalysisModule
 import httpx
 
+def mock_client(handler) -> httpx.AsyncClient:
+    """Client whose requests are answered by ``handler`` instead of the network."""
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
 @pytest.mark.asyncio
 async def test_http_analysis_secure_headers():
     # Mock response with all security headers
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.url = "https://example.com"
-    mock_response.headers = httpx.Headers({
+    headers = {
         "Strict-Transport-Security": "max-age=31536000",
         "Content-Security-Policy": "default-src 'self'",
         "X-Frame-Options": "DENY",
@@ -17,15 +18,18 @@ async def test_http_analysis_secure_headers():
         "Referrer-Policy": "strict-origin-when-cross-origin",
         "Server": "nginx",
         "X-Powered-By": "PHP/7.4"
-    })
+    }
+    requests = []
 
-    mock_client = AsyncMock(spec=httpx.AsyncClient)
-    mock_client.get.return_value = mock_response
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, headers=headers)
 
-    module = HttpAnalysisModule(http_client=mock_client)
+    module = HttpAnalysisModule(http_client=mock_client(handler))
     results = await module.run("example.com", {})
 
     assert results["status_code"] == 200
+    assert results["url"] == "https://example.com"
     assert results["security_headers"]["strict_transport_security"] is True
     assert results["security_headers"]["content_security_policy"] is True
     assert results["security_headers"]["x_frame_options"] is True
@@ -33,23 +37,13 @@ async def test_http_analysis_secure_headers():
     assert results["security_headers"]["referrer_policy"] is True
     assert len(results["missing_headers"]) == 0
     assert "Server: nginx" in results["technologies"]
+    assert results["ttfb_ms"] >= 0
+    assert len(requests) == 1
 
 @pytest.mark.asyncio
 async def test_http_analysis_missing_headers():
     # Mock response with NO security headers
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.url = "http://example.com"
-    mock_response.headers = httpx.Headers({}) # Empty
-
-    mock_client = AsyncMock(spec=httpx.AsyncClient)
-    # Simulate HTTPS failure then HTTP success if logic dictates, 
-    # but here we inject client so logic uses it.
-    # The module tries HTTPS first. We can mock that.
-    
-    mock_client.get.return_value = mock_response
-
-    module = HttpAnalysisModule(http_client=mock_client)
+    module = HttpAnalysisModule(http_client=mock_client(lambda request: httpx.Response(200)))
     results = await module.run("example.com", {})
 
     assert results["security_headers"]["strict_transport_security"] is False
@@ -57,21 +51,134 @@ async def test_http_analysis_missing_headers():
 
 @pytest.mark.asyncio
 async def test_http_analysis_https_fallback():
-    # Mock first call raises error, second call succeeds
-    mock_client = AsyncMock(spec=httpx.AsyncClient)
-    
-    secure_response = MagicMock()
-    secure_response.status_code = 200
-    secure_response.headers = httpx.Headers({})
-    secure_response.url = "http://example.com"
-
-    # side_effect: first call raises ConnectError, second returns response
-    mock_client.get.side_effect = [httpx.ConnectError("Connection refused"), secure_response]
-
-    module = HttpAnalysisModule(http_client=mock_client)
+    # HTTPS is refused, HTTP answers
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.url.scheme == "https":
+            raise httpx.ConnectError("Connection refused", request=request)
+        return httpx.Response(200)
+
+    module = HttpAnalysisModule(http_client=mock_client(handler))
     results = await module.run("example.com", {})
 
     assert results["status_code"] == 200
     assert str(results["url"]) == "http://example.com"
     # Verify two calls were made
-    assert mock_client.get.call_count == 2
+    assert len(requests) == 2
+
+@pytest.mark.asyncio
+async def test_http_analysis_only_probes_open_ports():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200)
+
+    module = HttpAnalysisModule(http_client=mock_client(handler))
+    context = {"open_ports": [80], "scanned_ports": [80, 443]}
+    results = await module.run("example.com", {}, context)
+
+    assert results["status_code"] == 200
+    assert [str(r.url) for r in requests] == ["http://example.com"]
+
+@pytest.mark.asyncio
+async def test_http_analysis_skipped_without_open_web_ports():
+    requests = []
+
+    module = HttpAnalysisModule(http_client=mock_client(lambda request: requests.append(request)))
+    context = {"open_ports": [22], "scanned_ports": [22, 80, 443]}
+    results = await module.run("example.com", {}, context)
+
+    assert results["status"] == "skipped"
+    assert requests == []
+
+@pytest.mark.asyncio
+async def test_http_analysis_races_slow_https():
+    async def handler(request):
+        if request.url.scheme == "https":
+            await asyncio.sleep(30)  # silently dropped
+        return httpx.Response(200)
+
+    module = HttpAnalysisModule(http_client=mock_client(handler))
+    results = await asyncio.wait_for(module.run("example.com", {"fallback_delay": 0.05}), timeout=2)
+
+    assert results["url"] == "http://example.com"
+    assert results["probes"][0] == {"url": "https://example.com", "status": "cancelled"}
+    assert results["probes"][1]["url"] == "http://example.com"
+    assert results["probes"][1]["status_code"] == 200
+
+@pytest.mark.asyncio
+async def test_http_analysis_probes_open_extra_ports_in_all_mode():
+    module = HttpAnalysisModule(http_client=mock_client(lambda request: httpx.Response(200)))
+    context = {"open_ports": [443, 8080, 8443], "scanned_ports": [80, 443, 8000, 8080, 8443]}
+    config = {"probe_mode": "all", "extra_http_ports": [8080, 8000], "extra_https_ports": [8443]}
+    results = await module.run("example.com", config, context)
+
+    assert [probe["url"] for probe in results["probes"]] == [
+        "https://example.com", "https://example.com:8443", "http://example.com:8080",
+    ]
+    assert results["url"] == "https://example.com"
+
+@pytest.mark.asyncio
+async def test_http_analysis_reads_only_the_body_budget():
+    served = 0
+
+    async def endless_body():
+        nonlocal served
+        for _ in range(10_000):
+            served += 1
+            yield b"x" * 1024
+
+    module = HttpAnalysisModule(
+        http_client=mock_client(lambda request: httpx.Response(200, content=endless_body()))
+    )
+    results = await module.run("example.com", {"max_body_bytes": 2000})
+
+    assert results["body_sample"] == "x" * 2000
+    assert served < 10
+
+    served = 0
+    results = await module.run("example.com", {})
+    assert "body_sample" not in results
+    assert served == 0
+
+@pytest.mark.asyncio
+async def test_http_analysis_head_first_falls_back_to_get():
+    methods = []
+
+    def handler(request):
+        methods.append(request.method)
+        if request.method == "HEAD":
+            return httpx.Response(405)
+        return httpx.Response(200, headers={"Server": "nginx"})
+
+    module = HttpAnalysisModule(http_client=mock_client(handler))
+    results = await module.run("example.com", {"head_first": True})
+
+    assert methods == ["HEAD", "GET"]
+    assert results["status_code"] == 200
+    assert "Server: nginx" in results["technologies"]
+
+@pytest.mark.asyncio
+async def test_http_analysis_shares_handshake_only_for_probed_endpoint(monkeypatch):
+    monkeypatch.setattr(HttpAnalysisModule, "_tls_details", staticmethod(lambda response: {"protocol": "TLSv1.3"}))
+
+    def handler(request):
+        if request.url.host == "redirected.test":
+            return httpx.Response(301, headers={"Location": "https://cdn.other.test/"})
+        return httpx.Response(200)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True)
+    module = HttpAnalysisModule(http_client=client)
+
+    context = {}
+    await module.run("example.com", {}, context)
+    assert context["tls_handshakes"] == {443: {"protocol": "TLSv1.3"}}
+
+    # The certificate after the redirect is the CDN's, not the target's
+    context = {}
+    results = await module.run("redirected.test", {}, context)
+    assert results["url"] == "https://cdn.other.test/"
+    assert context["tls_handshakes"] == {}
@@ -0,0 +1,213 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from gloaks.core import tcp_connect
+from gloaks.core.banners import identify_service
+from gloaks.modules.port_scanner import PortScanModule
+
+@pytest_asyncio.fixture
+async def listening_port():
+    server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    yield port
+    server.close()
+    await server.wait_closed()
+
+@pytest.mark.asyncio
+async def test_port_scan_finds_open_port(listening_port):
+    module = PortScanModule()
+    context = {"resolved_ips": ["127.0.0.1"]}
+    results = await module.run("localhost", {"default_ports": [listening_port], "timeout": 1.0}, context)
+
+    assert [p["port"] for p in results["open_ports"]] == [listening_port]
+    assert context["open_ports"] == [listening_port]
+    assert "partial" not in results
+
+@pytest.mark.asyncio
+async def test_port_scan_stops_at_deadline(listening_port):
+    module = PortScanModule()
+    deadline = asyncio.get_running_loop().time() - 1
+    results = await module.run("127.0.0.1", {"default_ports": [listening_port], "deadline": deadline})
+
+    assert results["partial"] is True
+    assert results["scanned_count"] == 0
+
+@pytest.mark.asyncio
+async def test_port_scan_reports_closed_ports(listening_port):
+    # Bind and release a port so it is (almost certainly) closed
+    probe = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+    closed_port = probe.sockets[0].getsockname()[1]
+    probe.close()
+    await probe.wait_closed()
+
+    module = PortScanModule()
+    config = {"ports": f"{listening_port},{closed_port}", "timeout": 1.0}
+    results = await module.run("127.0.0.1", config)
+
+    assert [p["port"] for p in results["open_ports"]] == [listening_port]
+    assert results["scanned_count"] == 2
+    assert results["closed_count"] == 1
+
+@pytest.mark.asyncio
+async def test_connect_scan_uses_bounded_worker_pool(listening_port, monkeypatch):
+    in_flight = 0
+    peak = 0
+    original_probe = tcp_connect.probe_port
+
+    async def counting_probe(address, port, timeout, on_open=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            return await original_probe(address, port, timeout, on_open)
+        finally:
+            in_flight -= 1
+
+    monkeypatch.setattr(tcp_connect, "probe_port", counting_probe)
+    seen = []
+    counts = await tcp_connect.connect_scan(
+        "127.0.0.1", range(listening_port, listening_port + 40), timeout=0.5, workers=4,
+        on_result=lambda port, state: seen.append(port),
+    )
+
+    assert peak == 4
+    assert sorted(seen) == list(range(listening_port, listening_port + 40))
+    assert counts["open"] >= 1
+
+@pytest.mark.asyncio
+async def test_port_scan_with_timing_template_measures_rtt(listening_port):
+    module = PortScanModule()
+    results = await module.run("127.0.0.1", {"default_ports": [listening_port], "timing": "insane"})
+
+    assert [p["port"] for p in results["open_ports"]] == [listening_port]
+    assert results["srtt_ms"] >= 0
+
+@pytest.mark.asyncio
+async def test_connect_scan_retransmits_dropped_probes(monkeypatch):
+    from gloaks.core.timing import AdaptiveTiming, TIMING_TEMPLATES
+
+    attempts = []
+
+    async def lossy_probe(address, port, timeout, on_open=None):
+        attempts.append((port, timeout))
+        # The first probe to port 80 is "lost"; its retransmission answers
+        if port == 80 and len([a for a in attempts if a[0] == 80]) == 1:
+            return tcp_connect.FILTERED, None
+        return tcp_connect.CLOSED, 0.01
+
+    monkeypatch.setattr(tcp_connect, "probe_port", lossy_probe)
+    timing = AdaptiveTiming(TIMING_TEMPLATES["aggressive"])
+    counts = await tcp_connect.connect_scan("192.0.2.1", [22, 80], timeout=5.0, workers=1, timing=timing)
+
+    assert counts == {"open": 0, "closed": 2, "filtered": 0, "error": 0}
+    assert [port for port, _ in attempts] == [22, 80, 80]
+    # Timeouts come from the estimator, not the fixed timeout argument
+    assert attempts[0][1] == TIMING_TEMPLATES["aggressive"].initial_rtt_timeout
+    assert attempts[1][1] < 5.0
+    assert timing.retries_recovered == 1
+
+@pytest.mark.asyncio
+async def test_probe_reports_local_socket_exhaustion_as_error(monkeypatch):
+    import errno, socket
+
+    def no_descriptors(*args, **kwargs):
+        raise OSError(errno.EMFILE, "Too many open files")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(socket, "socket", no_descriptors)
+        state, rtt = await tcp_connect.probe_port("192.0.2.1", 80, timeout=1.0)
+
+    assert (state, rtt) == (tcp_connect.ERROR, None)
+
+@pytest.mark.asyncio
+async def test_connect_scan_backs_off_and_counts_local_errors(monkeypatch):
+    attempts = []
+
+    async def exhausted_probe(address, port, timeout, on_open=None):
+        attempts.append(port)
+        # Port 22 recovers once other probes release their sockets; 80 never does
+        if port == 22 and attempts.count(22) > 2:
+            return tcp_connect.CLOSED, 0.01
+        return tcp_connect.ERROR, None
+
+    monkeypatch.setattr(tcp_connect, "probe_port", exhausted_probe)
+    monkeypatch.setattr(tcp_connect, "EXHAUSTED_BACKOFF", 0)
+    counts = await tcp_connect.connect_scan("192.0.2.1", [22, 80], timeout=1.0, workers=1)
+
+    assert counts == {"open": 0, "closed": 1, "filtered": 0, "error": 1}
+    assert attempts.count(22) == 3
+    assert attempts.count(80) == 1 + tcp_connect.EXHAUSTED_RETRIES
+
+@pytest.mark.asyncio
+async def test_port_scan_grabs_banners_on_scan_connection():
+    connections = 0
+
+    async def ssh(reader, writer):
+        nonlocal connections
+        connections += 1
+        writer.write(b"SSH-2.0-OpenSSH_8.9p1 Ubuntu-3ubuntu0.6\r\n")
+        await writer.drain()
+        await reader.read()
+        writer.close()
+
+    async def http(reader, writer):
+        nonlocal connections
+        connections += 1
+        # Silent until asked
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.0 200 OK\r\nServer: nginx/1.25.3\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    servers = [await asyncio.start_server(handler, "127.0.0.1", 0) for handler in (ssh, http)]
+    ssh_port, http_port = (server.sockets[0].getsockname()[1] for server in servers)
+    try:
+        config = {"ports": f"{ssh_port},{http_port}", "timeout": 1.0, "banners": True, "banner_timeout": 1.0}
+        results = await PortScanModule().run("127.0.0.1", config)
+    finally:
+        for server in servers:
+            server.close()
+
+    entries = {entry["port"]: entry for entry in results["open_ports"]}
+    assert entries[ssh_port]["service"] == "ssh"
+    assert entries[ssh_port]["product"] == "OpenSSH"
+    assert entries[ssh_port]["version"] == "8.9p1"
+    assert entries[http_port]["service"] == "http"
+    assert entries[http_port]["product"] == "nginx"
+    # One connection per port: banners reuse the scan's connection
+    assert connections == 2
+
+@pytest.mark.asyncio
+async def test_banner_read_is_bounded():
+    async def chatty(reader, writer):
+        writer.write(b"x" * 100000)
+        await writer.drain()
+        await asyncio.sleep(5)
+
+    server = await asyncio.start_server(chatty, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        config = {"default_ports": [port], "banners": True, "banner_bytes": 64, "banner_timeout": 0.2}
+        started = asyncio.get_running_loop().time()
+        results = await PortScanModule().run("127.0.0.1", config)
+        elapsed = asyncio.get_running_loop().time() - started
+    finally:
+        server.close()
+
+    assert results["open_ports"][0]["banner"] == "x" * 64
+    assert "service" not in results["open_ports"][0]
+    assert elapsed < 1.0
+
+@pytest.mark.parametrize("banner, service, product, version", [
+    (b"220 mail.example.com ESMTP Postfix (Ubuntu)\r\n", "smtp", "Postfix", None),
+    (b"220 ProFTPD 1.3.5 Server (Debian)\r\n", "ftp", "ProFTPD", "1.3.5"),
+    (b"220 (vsFTPd 3.0.3)\r\n", "ftp", "vsFTPd", "3.0.3"),
+    (b"HTTP/1.1 404 Not Found\r\nServer: Microsoft-IIS/10.0\r\n\r\n", "http", "Microsoft-IIS", "10.0"),
+    (b"+OK Dovecot ready.\r\n", "pop3", None, None),
+])
+def test_identify_service(banner, service, product, version):
+    hints = identify_service(banner)
+
+    assert hints["service"] == service
+    assert hints.get("product") == product
+    assert hints.get("version") == version
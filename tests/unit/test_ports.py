@@ -0,0 +1,27 @@
+import pytest
+from gloaks.utils.ports import TOP_PORTS, parse_port_spec
+
+def test_parse_port_spec_single_ports_and_ranges():
+    assert parse_port_spec("22, 80,8000-8003") == [22, 80, 8000, 8001, 8002, 8003]
+
+def test_parse_port_spec_open_ended_ranges():
+    assert parse_port_spec("-3") == [1, 2, 3]
+    assert parse_port_spec("65534-") == [65534, 65535]
+
+def test_parse_port_spec_all_and_top():
+    assert len(parse_port_spec("all")) == 65535
+    assert parse_port_spec("top:5") == TOP_PORTS[:5]
+
+def test_top_ports_are_frequency_ordered_past_the_first_twenty():
+    assert len(set(TOP_PORTS)) == 100
+    # The next most common ports, not the lowest-numbered ones
+    assert parse_port_spec("top:25")[20:] == [1025, 587, 8888, 199, 1720]
+    assert TOP_PORTS[-1] == 37
+
+def test_parse_port_spec_deduplicates_preserving_order():
+    assert parse_port_spec("top:3,80,1-2") == [80, 23, 443, 1, 2]
+
+@pytest.mark.parametrize("spec", ["", "http", "0", "70000", "10-5", "top:0", "top:1000", "1-x"])
+def test_parse_port_spec_rejects_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_port_spec(spec)
@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from gloaks.core import tcp_connect
+from gloaks.core.ratelimit import HostRateLimiter, rate_limiter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record the limiter's sleeps instead of waiting them out."""
+    recorded = []
+
+    async def fake_sleep(delay):
+        recorded.append(delay)
+
+    monkeypatch.setattr("gloaks.core.ratelimit.asyncio.sleep", fake_sleep)
+    return recorded
+
+@pytest.mark.asyncio
+async def test_disabled_limiter_never_waits(sleeps):
+    limiter = HostRateLimiter()
+    for _ in range(100):
+        await limiter.acquire("192.0.2.1")
+    assert sleeps == []
+
+@pytest.mark.asyncio
+async def test_host_bucket_allows_burst_then_paces(sleeps):
+    clock = FakeClock()
+    limiter = HostRateLimiter(host_rate=10, host_burst=5, clock=clock)
+
+    for _ in range(5):
+        await limiter.acquire("192.0.2.1")
+    assert sleeps == []
+
+    # Reservations queue up: the 6th waits 0.1s, the 7th 0.2s
+    await limiter.acquire("192.0.2.1")
+    await limiter.acquire("192.0.2.1")
+    assert sleeps == pytest.approx([0.1, 0.2])
+
+    # Other hosts are unaffected
+    await limiter.acquire("192.0.2.2")
+    assert len(sleeps) == 2
+
+    clock.now += 10
+    await limiter.acquire("192.0.2.1")
+    assert len(sleeps) == 2
+
+@pytest.mark.asyncio
+async def test_network_bucket_is_shared_by_neighbours(sleeps):
+    clock = FakeClock()
+    limiter = HostRateLimiter(network_rate=1, network_burst=2, ipv4_prefix=24, clock=clock)
+
+    await limiter.acquire("192.0.2.1")
+    await limiter.acquire("192.0.2.200")
+    await limiter.acquire("192.0.2.7")
+    await limiter.acquire("198.51.100.1")
+
+    assert sleeps == pytest.approx([1.0])
+
+def test_reconfiguring_with_same_values_keeps_buckets():
+    limiter = HostRateLimiter(host_rate=1, host_burst=1)
+    asyncio.run(limiter.acquire("192.0.2.1"))
+
+    limiter.configure(host_rate=1, host_burst=1)
+    assert len(limiter._buckets) == 1
+    limiter.configure(host_rate=2)
+    assert len(limiter._buckets) == 0
+
+@pytest.mark.asyncio
+async def test_port_scan_probes_acquire_from_shared_limiter(monkeypatch):
+    from gloaks.modules.port_scanner import PortScanModule
+
+    acquired = []
+
+    async def fake_probe(address, port, timeout, on_open=None):
+        return tcp_connect.CLOSED, 0.001
+
+    async def fake_acquire(address, tokens=1.0):
+        acquired.append(address)
+
+    monkeypatch.setattr(tcp_connect, "probe_port", fake_probe)
+    monkeypatch.setattr(rate_limiter, "acquire", fake_acquire)
+
+    results = await PortScanModule().run("192.0.2.5", {"ports": "1-10"})
+
+    assert results["closed_count"] == 10
+    assert acquired == ["192.0.2.5"] * 10
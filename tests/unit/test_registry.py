@@ -0,0 +1,73 @@
+import subprocess
+import sys
+from importlib.metadata import EntryPoint
+import pytest
+from gloaks.core.config import GloaksConfig
+from gloaks.core.engine import GloaksEngine
+from gloaks.modules import registry as registry_module
+from gloaks.modules.base import ReconModule
+from gloaks.modules.registry import ModuleRegistry
+
+class PluginModule(ReconModule):
+    @property
+    def name(self) -> str:
+        return "plugin"
+
+    @property
+    def version(self) -> str:
+        return "0.0.1"
+
+    @property
+    def description(self) -> str:
+        return "Third-party test module."
+
+    async def run(self, target, config, context=None):
+        return {"plugin": True}
+
+def test_registry_lists_builtins_in_default_order():
+    assert ModuleRegistry().names()[:4] == ["geolocation", "port_scan", "http_analysis", "dns_enumeration"]
+
+def test_registry_select_and_skip():
+    reg = ModuleRegistry()
+    assert reg.select(["dns_enumeration", "port_scan"]) == ["port_scan", "dns_enumeration"]
+    assert "geolocation" not in reg.select(skip=["geolocation"])
+
+def test_registry_rejects_unknown_modules():
+    with pytest.raises(ValueError, match="nope"):
+        ModuleRegistry().select(["port_scan", "nope"])
+
+def test_registry_discovers_entry_point_plugins(monkeypatch):
+    plugin = EntryPoint(name="plugin", value=f"{__name__}:PluginModule", group=registry_module.ENTRY_POINT_GROUP)
+    monkeypatch.setattr(registry_module, "entry_points", lambda group: [plugin])
+
+    reg = ModuleRegistry()
+    assert reg.names()[-1] == "plugin"
+    assert reg.load("plugin") is PluginModule
+
+def test_engine_selects_modules():
+    engine = GloaksEngine(GloaksConfig(), modules=["port_scan", "dns_enumeration"], skip_modules=["dns_enumeration"])
+    assert [m.name for m in engine.modules] == ["port_scan"]
+
+def test_engine_only_imports_selected_modules():
+    code = (
+        "import sys\n"
+        "from gloaks.core.config import GloaksConfig\n"
+        "from gloaks.core.engine import GloaksEngine\n"
+        "GloaksEngine(GloaksConfig(), modules=['port_scan'])\n"
+        "print('imported:' + ','.join(m for m in ('aiodns', 'httpx', 'gloaks.modules.dns_enum') if m in sys.modules))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == "imported:"
+
+def test_engine_skips_broken_plugins_unless_requested(monkeypatch):
+    broken = EntryPoint(name="broken", value="gloaks_missing_plugin:Module", group=registry_module.ENTRY_POINT_GROUP)
+    monkeypatch.setattr(registry_module, "entry_points", lambda group: [broken])
+    monkeypatch.setattr(registry_module, "registry", ModuleRegistry())
+    monkeypatch.setattr("gloaks.core.engine.registry", registry_module.registry)
+
+    engine = GloaksEngine(GloaksConfig())
+    assert "broken" not in [m.name for m in engine.modules]
+    assert "port_scan" in [m.name for m in engine.modules]
+
+    with pytest.raises(ValueError, match="gloaks_missing_plugin:Module"):
+        GloaksEngine(GloaksConfig(), modules=["port_scan", "broken"])
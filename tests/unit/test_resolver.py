@@ -0,0 +1,135 @@
+import asyncio
+import types
+import pytest
+from gloaks.core.resolver import DnsCache
+
+class FakeDns:
+    """Lookup stub that counts queries and answers from a table."""
+
+    def __init__(self, answers, ttl=30.0, delay=0.0):
+        self.answers = answers
+        self.ttl = ttl
+        self.delay = delay
+        self.calls = []
+
+    async def __call__(self, host):
+        self.calls.append(host)
+        await asyncio.sleep(self.delay)
+        return list(self.answers.get(host, [])), self.ttl
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.mark.asyncio
+async def test_dns_cache_serves_repeat_lookups_from_cache():
+    dns = FakeDns({"example.com": ["93.184.216.34"]})
+    cache = DnsCache(lookup=dns)
+
+    assert await cache.resolve("example.com") == ["93.184.216.34"]
+    assert await cache.resolve("EXAMPLE.com.") == ["93.184.216.34"]
+    assert dns.calls == ["example.com"]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+@pytest.mark.asyncio
+async def test_dns_cache_honours_record_ttl():
+    clock = FakeClock()
+    dns = FakeDns({"example.com": ["93.184.216.34"]}, ttl=30.0)
+    cache = DnsCache(lookup=dns, clock=clock)
+
+    await cache.resolve("example.com")
+    clock.now += 29
+    await cache.resolve("example.com")
+    clock.now += 2
+    await cache.resolve("example.com")
+
+    assert len(dns.calls) == 2
+
+@pytest.mark.asyncio
+async def test_dns_cache_caches_negative_answers():
+    clock = FakeClock()
+    dns = FakeDns({})
+    cache = DnsCache(lookup=dns, clock=clock, negative_ttl=10.0)
+
+    assert await cache.resolve("missing.example.com") == []
+    assert await cache.resolve("missing.example.com") == []
+    assert len(dns.calls) == 1
+
+    clock.now += 11
+    await cache.resolve("missing.example.com")
+    assert len(dns.calls) == 2
+
+@pytest.mark.asyncio
+async def test_dns_cache_coalesces_concurrent_lookups():
+    dns = FakeDns({"example.com": ["93.184.216.34"]}, delay=0.01)
+    cache = DnsCache(lookup=dns)
+
+    results = await asyncio.gather(*[cache.resolve("example.com") for _ in range(50)])
+
+    assert all(r == ["93.184.216.34"] for r in results)
+    assert len(dns.calls) == 1
+    assert cache.coalesced == 49
+
+@pytest.mark.asyncio
+async def test_dns_cache_evicts_least_recently_used():
+    dns = FakeDns({f"h{i}.example.com": ["10.0.0.1"] for i in range(3)})
+    cache = DnsCache(lookup=dns, max_entries=2)
+
+    await cache.resolve("h0.example.com")
+    await cache.resolve("h1.example.com")
+    await cache.resolve("h0.example.com")  # h1 is now least recently used
+    await cache.resolve("h2.example.com")
+    await cache.resolve("h0.example.com")
+    await cache.resolve("h1.example.com")
+
+    assert dns.calls == ["h0.example.com", "h1.example.com", "h2.example.com", "h1.example.com"]
+
+@pytest.mark.asyncio
+async def test_dns_cache_passes_ip_literals_through():
+    dns = FakeDns({})
+    cache = DnsCache(lookup=dns)
+
+    assert await cache.resolve("192.0.2.1") == ["192.0.2.1"]
+    assert await cache.resolve("2001:db8::1") == ["2001:db8::1"]
+    assert dns.calls == []
+
+class FakeAddrInfo:
+    """c-ares getaddrinfo stub; the real resolver applies the hosts file first."""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.calls = []
+
+    async def getaddrinfo(self, host, **kwargs):
+        self.calls.append(host)
+        return types.SimpleNamespace(nodes=[
+            types.SimpleNamespace(addr=(address.encode(), 0), ttl=ttl) for address, ttl in self.nodes
+        ])
+
+@pytest.mark.asyncio
+async def test_dns_cache_resolves_through_system_lookup_order():
+    clock = FakeClock()
+    cache = DnsCache(clock=clock, default_ttl=300.0)
+    resolver = FakeAddrInfo([("2001:db8::1", 60), ("192.0.2.1", 30)])
+    cache.dns_resolver = lambda: resolver
+
+    assert await cache.resolve("app.example") == ["192.0.2.1", "2001:db8::1"]
+    clock.now += 31
+    await cache.resolve("app.example")
+    assert resolver.calls == ["app.example", "app.example"]
+
+    # Hosts-file answers have no TTL and are kept for default_ttl
+    resolver.nodes = [("10.0.0.7", 0)]
+    await cache.resolve("intranet.example")
+    clock.now += 299
+    assert await cache.resolve("intranet.example") == ["10.0.0.7"]
+    assert resolver.calls.count("intranet.example") == 1
+
+@pytest.mark.asyncio
+async def test_dns_cache_resolves_local_names():
+    # localhost comes from /etc/hosts
+    cache = DnsCache()
+    assert "127.0.0.1" in await cache.resolve("localhost")
@@ -1,31 +1,224 @@
+import asyncio
+import ipaddress
+import threading
+import time
 import pytest
+from gloaks.core.resolver import dns_cache
 from gloaks.core.scope import ScopeValidator
+from gloaks.core.scope_index import ScopeIndex
 
-def test_scope_validation_allow_domain():
+@pytest.mark.asyncio
+async def test_scope_validation_allow_domain():
     validator = ScopeValidator()
     validator.scope_file = "TEST_MODE" # Simulate loaded scope
     validator.allowed_domains = ["example.com"]
-    assert validator.is_target_allowed("example.com") is True
-    assert validator.is_target_allowed("evil.com") is False
+    assert await validator.is_target_allowed("example.com") is True
+    assert await validator.is_target_allowed("evil.com") is False
 
-def test_scope_validation_wildcard():
+@pytest.mark.asyncio
+async def test_scope_validation_wildcard():
     validator = ScopeValidator()
     validator.scope_file = "TEST_MODE"
     validator.allowed_domains = ["*.example.com"]
-    assert validator.is_target_allowed("sub.example.com") is True
+    assert await validator.is_target_allowed("sub.example.com") is True
 
-def test_scope_validation_wildcard_strict():
+@pytest.mark.asyncio
+async def test_scope_validation_wildcard_strict():
     validator = ScopeValidator()
     validator.scope_file = "TEST_MODE"
     validator.allowed_domains = ["*.example.com"]
-    assert validator.is_target_allowed("example.com") is False
+    assert await validator.is_target_allowed("example.com") is False
 
-def test_scope_validation_exclusion():
+@pytest.mark.asyncio
+async def test_scope_validation_exclusion():
     validator = ScopeValidator()
     validator.scope_file = "TEST_MODE"
     validator.allowed_domains = ["*.example.com"]
     validator.excluded_domains = ["secret.example.com"]
     
     # Logic check: exclusion takes precedence
-    assert validator.is_target_allowed("secret.example.com") is False
-    assert validator.is_target_allowed("public.example.com") is True
+    assert await validator.is_target_allowed("secret.example.com") is False
+    assert await validator.is_target_allowed("public.example.com") is True
+
+@pytest.mark.asyncio
+async def test_scope_validation_wildcard_exclusion_and_case():
+    validator = ScopeValidator()
+    validator.scope_file = "TEST_MODE"
+    validator.allowed_domains = ["*.example.com", "example.com"]
+    validator.excluded_domains = ["*.internal.example.com"]
+
+    assert await validator.is_target_allowed("WWW.Example.com.") is True
+    assert await validator.is_target_allowed("a.b.example.com") is True
+    assert await validator.is_target_allowed("db.internal.example.com") is False
+    # The wildcard exclusion does not cover its own apex
+    assert await validator.is_target_allowed("internal.example.com") is True
+
+@pytest.mark.asyncio
+async def test_scope_validation_cidr():
+    validator = ScopeValidator()
+    validator.scope_file = "TEST_MODE"
+    validator.allowed_ips = ["10.0.0.0/8", "192.0.2.7", "2001:db8::/32"]
+    validator.excluded_ips = ["10.1.0.0/16"]
+
+    assert await validator.is_target_allowed("10.2.3.4") is True
+    assert await validator.is_target_allowed("192.0.2.7") is True
+    assert await validator.is_target_allowed("192.0.2.8") is False
+    assert await validator.is_target_allowed("10.1.2.3") is False
+    assert await validator.is_target_allowed("2001:db8::1") is True
+
+@pytest.mark.asyncio
+async def test_scope_resolves_only_when_ip_rules_decide(monkeypatch):
+    resolved = []
+
+    async def fake_resolve(host):
+        resolved.append(host)
+        return {"app.example.net": ["10.0.0.5"], "db.example.com": ["10.1.0.9"]}.get(host, [])
+
+    monkeypatch.setattr(dns_cache, "resolve", fake_resolve)
+    validator = ScopeValidator()
+    validator.scope_file = "TEST_MODE"
+    validator.allowed_domains = ["*.example.com"]
+    validator.allowed_ips = ["10.0.0.0/8"]
+
+    assert await validator.is_target_allowed("www.example.com") is True
+    assert resolved == []
+    assert await validator.is_target_allowed("app.example.net") is True
+    assert resolved == ["app.example.net"]
+
+    # An excluded network overrides a domain allowance
+    validator.excluded_ips = ["10.1.0.0/16"]
+    assert await validator.is_target_allowed("db.example.com") is False
+
+def test_scope_index_lookup_cost_is_independent_of_size():
+    domains = [f"host{i}.corp{i % 100}.example.com" for i in range(100000)]
+    networks = [f"10.{i // 256}.{i % 256}.0/24" for i in range(50000)]
+    index = ScopeIndex(allowed_domains=domains + ["*.dev.example.org"], allowed_ips=networks)
+
+    started = time.perf_counter()
+    for _ in range(10000):
+        assert index.check_domain("host99999.corp99.example.com") is True
+        assert index.check_domain("a.b.dev.example.org") is True
+        assert index.check_domain("unknown.example.com") is None
+        assert index.check_ip(ipaddress.ip_address("10.195.79.1")) is True
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 1.0
+
+@pytest.mark.asyncio
+async def test_check_many_bounds_lookups_in_flight(monkeypatch):
+    in_flight = 0
+    peak = 0
+
+    async def slow_resolve(host):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return ["10.0.0.1"] if host.startswith("in") else ["192.0.2.1"]
+
+    monkeypatch.setattr(dns_cache, "resolve", slow_resolve)
+    validator = ScopeValidator()
+    validator.scope_file = "TEST_MODE"
+    validator.allowed_domains = ["*.example.com"]
+    validator.excluded_domains = ["bad.example.com"]
+    validator.allowed_ips = ["10.0.0.0/8"]
+
+    targets = ["www.example.com", "bad.example.com", "10.1.1.1"]
+    targets += [f"in{i}.example.net" for i in range(20)] + [f"out{i}.example.net" for i in range(20)]
+    results = dict([pair async for pair in validator.check_many(targets, concurrency=5)])
+
+    assert len(results) == len(targets)
+    assert results["www.example.com"] is True
+    assert results["bad.example.com"] is False
+    assert results["10.1.1.1"] is True
+    assert all(results[f"in{i}.example.net"] for i in range(20))
+    assert not any(results[f"out{i}.example.net"] for i in range(20))
+    assert peak == 5
+
+def test_scope_check_command(tmp_path, monkeypatch):
+    from click.testing import CliRunner
+    from gloaks.cli.main import cli
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    scope_file = tmp_path / "scope.yaml"
+    scope_file.write_text('allow:\n  domains:\n    - "*.example.com"\n  ips:\n    - 192.0.2.0/24\n')
+    targets = "www.example.com\n# comment\n192.0.2.9\n198.51.100.1\nnot a target\n"
+
+    result = CliRunner().invoke(cli, ["scope", "check", str(scope_file)], input=targets)
+
+    assert result.exit_code == 0, result.output
+    lines = set(result.stdout.splitlines())
+    assert {"allowed\twww.example.com", "allowed\t192.0.2.9", "denied\t198.51.100.1", "invalid\tnot a target"} <= lines
+
+    result = CliRunner().invoke(cli, ["scope", "check", "--allowed-only", str(scope_file)], input=targets)
+    assert sorted(result.stdout.split()) == ["192.0.2.9", "www.example.com"]
+
+def test_compiled_scope_is_cached_by_content(tmp_path, monkeypatch):
+    import yaml
+    from gloaks.core import scope_cache
+
+    scope_file = tmp_path / "scope.yaml"
+    scope_file.write_text(
+        'allow:\n  domains:\n    - "*.example.com"\n  ips:\n    - 10.0.0.0/8\n    - 2001:db8::/32\n'
+        'exclude:\n  domains:\n    - db.example.com\n  ips:\n    - 10.9.0.0/16\n'
+    )
+    cache_dir = tmp_path / "cache"
+    first = ScopeValidator(str(scope_file), cache_dir=str(cache_dir))
+    assert len(list(cache_dir.iterdir())) == 1
+
+    # A second load never parses the YAML
+    def no_yaml(*args, **kwargs):
+        raise AssertionError("YAML parsed despite a valid cache")
+
+    monkeypatch.setattr(yaml, "load", no_yaml)
+    second = ScopeValidator(str(scope_file), cache_dir=str(cache_dir))
+
+    assert second.allowed_domains == first.allowed_domains == ["*.example.com"]
+    assert second.excluded_ips == ["10.9.0.0/16"]
+    for target in ("www.example.com", "db.example.com", "example.org"):
+        assert second.index.check_domain(target) == first.index.check_domain(target)
+    for address in ("10.1.2.3", "10.9.1.1", "2001:db8::1", "192.0.2.1"):
+        ip = ipaddress.ip_address(address)
+        assert second.index.check_ip(ip) == first.index.check_ip(ip)
+
+    # A cache from another format version is ignored
+    path = next(cache_dir.iterdir())
+    monkeypatch.setattr(scope_cache, "VERSION", scope_cache.VERSION + 1)
+    assert scope_cache.load(str(path), bytes.fromhex(path.stem)) is None
+
+@pytest.mark.asyncio
+async def test_auto_reload_follows_scope_file_edits(tmp_path):
+    scope_file = tmp_path / "scope.yaml"
+    scope_file.write_text('allow:\n  domains:\n    - a.example.com\n')
+    validator = ScopeValidator(str(scope_file), cache=False, auto_reload=True, reload_interval=0)
+
+    assert await validator.is_target_allowed("a.example.com") is True
+    assert await validator.is_target_allowed("b.example.com") is False
+
+    scope_file.write_text('allow:\n  domains:\n    - b.example.com\n    - c.example.com\n')
+    assert await validator.is_target_allowed("b.example.com") is True
+    assert await validator.is_target_allowed("a.example.com") is False
+    assert validator.reloads == 1
+
+@pytest.mark.asyncio
+async def test_auto_reload_reads_scope_off_the_event_loop(tmp_path, monkeypatch):
+    scope_file = tmp_path / "scope.yaml"
+    scope_file.write_text('allow:\n  domains:\n    - a.example.com\n')
+    validator = ScopeValidator(str(scope_file), cache=False, auto_reload=True, reload_interval=0)
+    reader_threads = []
+    read_scope = ScopeValidator._read_scope
+
+    def recording_read(self):
+        reader_threads.append(threading.get_ident())
+        return read_scope(self)
+
+    monkeypatch.setattr(ScopeValidator, "_read_scope", recording_read)
+    scope_file.write_text('allow:\n  domains:\n    - b.example.com\n    - c.example.com\n')
+
+    # Concurrent checks share one reload and all see the new rules
+    verdicts = await asyncio.gather(*[validator.is_target_allowed("b.example.com") for _ in range(5)])
+
+    assert verdicts == [True] * 5
+    assert validator.reloads == 1
+    assert len(reader_threads) == 1 and reader_threads[0] != threading.get_ident()
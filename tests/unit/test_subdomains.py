@@ -0,0 +1,149 @@
+import asyncio
+import socket
+import struct
+import pytest
+import pytest_asyncio
+from gloaks.core.resolver import dns_cache
+from gloaks.core.subdomains import brute_force, make_resolver, read_wordlist
+from gloaks.modules.dns_enum import DnsEnumModule
+
+class StubDnsServer(asyncio.DatagramProtocol):
+    """Authoritative-looking UDP DNS server answering A queries from a dict.
+
+    Keys are names or ``*.domain`` wildcards; everything else is NXDOMAIN.
+    """
+
+    def __init__(self, records):
+        self.records = records
+        self.queries = []
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        query_id, = struct.unpack(">H", data[:2])
+        labels, i = [], 12
+        while data[i]:
+            labels.append(data[i + 1:i + 1 + data[i]].decode())
+            i += 1 + data[i]
+        question = data[12:i + 5]
+        qtype, = struct.unpack(">H", data[i + 1:i + 3])
+        name = ".".join(labels).lower()
+        self.queries.append(name)
+
+        addresses = self.records.get(name)
+        if addresses is None:
+            wildcard = "*." + name.split(".", 1)[-1]
+            addresses = self.records.get(wildcard)
+        if qtype != 1:
+            answers = []
+        else:
+            answers = addresses or []
+        rcode = 0 if addresses is not None else 3
+        header = struct.pack(">HHHHHH", query_id, 0x8180 | rcode, 1, len(answers), 0, 0)
+        records = b"".join(
+            b"\xc0\x0c" + struct.pack(">HHIH", 1, 1, 60, 4) + socket.inet_aton(address) for address in answers
+        )
+        self.transport.sendto(header + question + records, addr)
+
+@pytest_asyncio.fixture
+async def dns_server():
+    """Start a stub server; yields ``(protocol, "127.0.0.1:port")``."""
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(
+        lambda: StubDnsServer({}), local_addr=("127.0.0.1", 0)
+    )
+    yield protocol, f"127.0.0.1:{transport.get_extra_info('sockname')[1]}"
+    transport.close()
+
+@pytest.mark.asyncio
+async def test_brute_force_finds_subdomains_once(dns_server):
+    server, nameserver = dns_server
+    server.records.update({
+        "www.example.test": ["10.0.0.1"],
+        "mail.example.test": ["10.0.0.2", "10.0.0.3"],
+    })
+    found = []
+    resolver = make_resolver([nameserver], timeout=1.0, tries=1)
+
+    stats = await brute_force(
+        resolver, "example.test", ["www", "ftp", "mail", "www", "www"],
+        window=2, on_found=lambda name, addresses: found.append((name, addresses)),
+    )
+
+    assert sorted(found) == [("mail.example.test", ["10.0.0.2", "10.0.0.3"]), ("www.example.test", ["10.0.0.1"])]
+    assert stats["found"] == 2
+    assert stats["wildcard_addresses"] == []
+
+@pytest.mark.asyncio
+async def test_brute_force_filters_wildcard_answers(dns_server):
+    server, nameserver = dns_server
+    server.records.update({
+        "*.example.test": ["10.9.9.9"],
+        "api.example.test": ["10.0.0.5"],
+    })
+    found = []
+    resolver = make_resolver([nameserver], timeout=1.0, tries=1)
+
+    stats = await brute_force(
+        resolver, "example.test", ["api", "nothing", "else"], on_found=lambda name, _: found.append(name)
+    )
+
+    assert found == ["api.example.test"]
+    assert stats["wildcard_addresses"] == ["10.9.9.9"]
+    assert stats["wildcard_filtered"] == 2
+
+@pytest.mark.asyncio
+async def test_brute_force_streams_large_wordlist_with_bounded_window(dns_server, tmp_path):
+    server, nameserver = dns_server
+    server.records["host4242.example.test"] = ["10.0.0.42"]
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("# comment\n\n" + "".join(f"host{i}\n" for i in range(5000)) + "-invalid-\n")
+    resolver = make_resolver([nameserver], timeout=1.0, tries=1)
+
+    stats = await brute_force(resolver, "example.test", read_wordlist(str(wordlist)), window=500)
+
+    assert stats["queried"] == 5000
+    assert stats["found"] == 1
+    # Both ends share one core here; a real resolver only has to keep up
+    assert stats["queries_per_second"] > 1000, stats
+
+@pytest.mark.asyncio
+async def test_dns_module_streams_subdomain_findings(dns_server, tmp_path, monkeypatch):
+    server, nameserver = dns_server
+    server.records.update({"example.test": ["10.0.0.1"], "dev.example.test": ["10.0.0.7"]})
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("dev\nstaging\n")
+    # Record queries for the target itself go to the stub server as well
+    stub_resolver = make_resolver([nameserver], timeout=1.0, tries=1)
+    monkeypatch.setattr(dns_cache, "dns_resolver", lambda: stub_resolver)
+
+    findings = []
+    context = {"on_finding": lambda module, finding: findings.append(finding)}
+    config = {
+        "subdomain_wordlist": str(wordlist), "nameservers": [nameserver], "query_timeout": 1.0, "query_tries": 1,
+    }
+    results = await DnsEnumModule().run("example.test", config, context)
+
+    assert results["A"] == ["10.0.0.1"]
+    assert results["subdomains"] == [{"subdomain": "dev.example.test", "addresses": ["10.0.0.7"]}]
+    assert results["subdomain_stats"]["queried"] == 2
+    assert {"subdomain": "dev.example.test", "addresses": ["10.0.0.7"]} in findings
+
+@pytest.mark.asyncio
+async def test_dns_module_keeps_records_when_wordlist_is_missing(dns_server, tmp_path, monkeypatch):
+    server, nameserver = dns_server
+    server.records["example.test"] = ["10.0.0.1"]
+    stub_resolver = make_resolver([nameserver], timeout=1.0, tries=1)
+    monkeypatch.setattr(dns_cache, "dns_resolver", lambda: stub_resolver)
+
+    config = {"subdomain_wordlist": str(tmp_path / "missing.txt"), "nameservers": [nameserver]}
+    results = await DnsEnumModule().run("example.test", config)
+
+    assert results["A"] == ["10.0.0.1"]
+    assert results["subdomains"] == []
+    assert "Cannot read wordlist" in results["subdomain_stats"]["error"]
+
+def test_read_wordlist_fails_before_iteration(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        read_wordlist(str(tmp_path / "missing.txt"))
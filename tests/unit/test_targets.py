@@ -0,0 +1,82 @@
+import asyncio
+import itertools
+import threading
+import tracemalloc
+import pytest
+from gloaks.utils.targets import RecentSet, aiter_targets, iter_targets, parse_target
+
+@pytest.mark.parametrize("raw, expected", [
+    ("Example.COM", "example.com"),
+    ("example.com.", "example.com"),
+    ("https://user:pw@www.example.com:8443/login?next=/#top", "www.example.com"),
+    ("example.com:8080", "example.com"),
+    ("http://[2001:DB8::1]:8080/", "2001:db8::1"),
+    ("2001:0db8:0000::0001", "2001:db8::1"),
+    ("  192.0.2.10  ", "192.0.2.10"),
+    ("bücher.example", "xn--bcher-kva.example"),
+])
+def test_parse_target_normalises(raw, expected):
+    assert parse_target(raw) == expected
+
+@pytest.mark.parametrize("raw", ["not a target", "exa mple.com", "-bad-.com", "http://"])
+def test_parse_target_rejects_invalid(raw):
+    with pytest.raises(ValueError):
+        parse_target(raw)
+
+def test_iter_targets_dedupes_and_expands_ranges():
+    invalid = []
+    lines = [
+        "# assets", "", "example.com", "https://EXAMPLE.com/", "192.0.2.0/30", "192.0.2.0/30",
+        "10.0.0.5/32", "bad target", "8.0.0.0/7",
+    ]
+
+    targets = list(iter_targets(lines, max_network_size=2 ** 24, on_invalid=lambda e, r: invalid.append(e)))
+
+    assert targets == ["example.com", "192.0.2.1", "192.0.2.2", "10.0.0.5"]
+    assert invalid == ["bad target", "8.0.0.0/7"]
+
+def test_iter_targets_dedupes_addresses_against_ranges():
+    lines = ["192.0.2.1", "192.0.2.0/30", "192.0.2.0/29", "192.0.2.6"]
+
+    assert list(iter_targets(lines)) == [f"192.0.2.{i}" for i in range(1, 7)]
+
+def test_recent_set_is_bounded():
+    seen = RecentSet(2)
+    assert [seen.add(key) for key in ("a", "b", "a", "c", "b", "a")] == [True, True, False, True, True, True]
+    assert len(seen._keys) == 2
+
+def test_slash_8_expands_in_constant_memory():
+    tracemalloc.start()
+    try:
+        targets = iter_targets(["10.0.0.0/8"], dedupe_window=1000)
+        first = list(itertools.islice(targets, 5000))
+        _, peak_before = tracemalloc.get_traced_memory()
+        for _ in itertools.islice(targets, 50000):
+            pass
+        _, peak_after = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert first[:2] == ["10.0.0.1", "10.0.0.2"]
+    # Once the dedupe window is full, walking 50k more addresses allocates nothing that is kept
+    assert peak_after - peak_before < 64 * 1024
+
+@pytest.mark.asyncio
+async def test_aiter_targets_reads_off_the_event_loop():
+    release = threading.Event()
+
+    def slow_stdin():
+        yield "example.com"
+        # Blocks like an idle pipe until the test lets it continue
+        release.wait(5)
+        yield "192.0.2.0/31"
+
+    targets = aiter_targets(slow_stdin())
+    assert await targets.__anext__() == "example.com"
+    pending = asyncio.ensure_future(targets.__anext__())
+    await asyncio.sleep(0.05)
+    # The loop kept running while the reader was blocked
+    assert not pending.done()
+    release.set()
+    assert await pending == "192.0.2.0"
+    assert [t async for t in targets] == ["192.0.2.1"]
@@ -0,0 +1,44 @@
+import pytest
+from gloaks.core.timing import RETRY_PROBE_WINDOW, AdaptiveTiming, TIMING_TEMPLATES, get_timing_template
+
+def test_template_lookup_accepts_names_and_levels():
+    assert get_timing_template("aggressive") is TIMING_TEMPLATES["aggressive"]
+    assert get_timing_template("T4") is TIMING_TEMPLATES["aggressive"]
+    assert get_timing_template("0") is TIMING_TEMPLATES["paranoid"]
+    with pytest.raises(ValueError):
+        get_timing_template("T9")
+    with pytest.raises(ValueError):
+        get_timing_template("ludicrous")
+
+def test_timeout_starts_at_initial_and_tracks_rtt():
+    timing = AdaptiveTiming(TIMING_TEMPLATES["normal"])
+    assert timing.timeout == 1.0
+
+    for _ in range(20):
+        timing.observe(0.002)
+    # A fast, steady host clamps to the template minimum
+    assert timing.timeout == TIMING_TEMPLATES["normal"].min_rtt_timeout
+
+    for _ in range(20):
+        timing.observe(0.4)
+    assert 0.4 < timing.timeout < 2.0
+
+def test_timeout_is_capped_at_template_maximum():
+    timing = AdaptiveTiming(TIMING_TEMPLATES["insane"])
+    timing.observe(5.0)
+    assert timing.timeout == TIMING_TEMPLATES["insane"].max_rtt_timeout
+
+def test_retries_stop_when_they_never_recover():
+    timing = AdaptiveTiming(TIMING_TEMPLATES["normal"])
+    for _ in range(RETRY_PROBE_WINDOW):
+        assert timing.should_retry(0)
+        timing.record_retry(answered=False)
+    assert not timing.should_retry(0)
+
+def test_retries_continue_while_they_recover():
+    timing = AdaptiveTiming(TIMING_TEMPLATES["aggressive"])
+    timing.record_retry(answered=True)
+    for _ in range(RETRY_PROBE_WINDOW):
+        timing.record_retry(answered=False)
+    assert timing.should_retry(0)
+    assert not timing.should_retry(TIMING_TEMPLATES["aggressive"].max_retries)
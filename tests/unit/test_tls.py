@@ -0,0 +1,130 @@
+import asyncio
+import shutil
+import ssl
+import subprocess
+import pytest
+import pytest_asyncio
+from gloaks.core.tls import TlsSessionCache, assess
+from gloaks.modules.tls import TlsModule
+
+pytestmark = pytest.mark.skipif(shutil.which("openssl") is None, reason="openssl CLI not available")
+
+@pytest.fixture(scope="module")
+def certificate(tmp_path_factory):
+    """Self-signed certificate for localhost."""
+    directory = tmp_path_factory.mktemp("tls")
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "10",
+            "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost",
+            "-keyout", str(key), "-out", str(cert),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return str(cert), str(key)
+
+@pytest_asyncio.fixture
+async def tls_ports(certificate):
+    """Two TLS listeners on 127.0.0.1 sharing one server context (and its tickets)."""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(*certificate)
+
+    async def handle(reader, writer):
+        try:
+            await reader.read()
+        except (ConnectionError, ssl.SSLError):
+            pass
+        writer.close()
+
+    servers = [await asyncio.start_server(handle, "127.0.0.1", 0, ssl=context) for _ in range(2)]
+    yield [server.sockets[0].getsockname()[1] for server in servers]
+    for server in servers:
+        server.close()
+
+@pytest.mark.asyncio
+async def test_handshake_reports_untrusted_certificate(tls_ports):
+    sessions = TlsSessionCache()
+    info = await sessions.handshake("127.0.0.1", tls_ports[0], "localhost", timeout=5.0)
+
+    assert info["protocol"] == "TLSv1.3"
+    assert info["cipher_bits"] >= 128
+    assert info["verified"] is False
+    assert "self-signed" in info["verify_error"] or "self signed" in info["verify_error"]
+    assert len(info["sha256"]) == 64
+    # Unverified handshakes still report the chain the server sent
+    assert [cert["subject"]["commonName"] for cert in info["chain"]] == ["localhost"]
+    assert any(issue.startswith("Certificate not trusted") for issue in assess(info))
+
+@pytest.mark.asyncio
+async def test_second_port_resumes_session(tls_ports, certificate):
+    sessions = TlsSessionCache()
+    # Trust the test certificate so the session is cached
+    sessions.context(True).load_verify_locations(certificate[0])
+
+    first = await sessions.handshake("127.0.0.1", tls_ports[0], "localhost", timeout=5.0)
+    second = await sessions.handshake("127.0.0.1", tls_ports[1], "localhost", timeout=5.0)
+
+    assert first["verified"] is True
+    assert first["session_reused"] is False
+    assert first["certificate"]["subject"]["commonName"] == "localhost"
+    assert first["certificate"]["subject_alt_names"] == ["localhost"]
+    assert 0 <= first["days_to_expiry"] <= 10
+    assert second["session_reused"] is True
+    assert sessions.resumed == 1
+
+@pytest.mark.asyncio
+async def test_module_reuses_http_analysis_handshake(tls_ports):
+    shared = {"protocol": "TLSv1.2", "cipher": "ECDHE-RSA-AES128-GCM-SHA256", "cipher_bits": 128, "verified": True}
+    context = {
+        "resolved_ips": ["127.0.0.1"],
+        "open_ports": [tls_ports[0], tls_ports[1]],
+        "scanned_ports": [tls_ports[0], tls_ports[1], 8443],
+        "tls_handshakes": {tls_ports[0]: shared},
+    }
+    config = {"ports": [tls_ports[0], tls_ports[1], 8443], "timeout": 5.0}
+
+    results = await TlsModule().run("localhost", config, context)
+
+    endpoints = {endpoint["port"]: endpoint for endpoint in results["endpoints"]}
+    # Closed ports are not probed
+    assert set(endpoints) == set(tls_ports)
+    assert endpoints[tls_ports[0]]["source"] == "http_analysis"
+    assert endpoints[tls_ports[0]]["issues"] == []
+    assert endpoints[tls_ports[1]]["source"] == "handshake"
+    assert endpoints[tls_ports[1]]["protocol"] == "TLSv1.3"
+
+@pytest.mark.asyncio
+async def test_handshake_reports_certificate_chain(tmp_path):
+    def openssl(*args):
+        subprocess.run(["openssl", *args], check=True, capture_output=True, cwd=tmp_path)
+
+    openssl("req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "30", "-subj", "/CN=Test Root",
+            "-keyout", "ca.key", "-out", "ca.pem")
+    openssl("req", "-newkey", "rsa:2048", "-nodes", "-subj", "/CN=localhost", "-keyout", "leaf.key", "-out", "leaf.csr")
+    (tmp_path / "san.ext").write_text("subjectAltName=DNS:localhost\n")
+    openssl("x509", "-req", "-in", "leaf.csr", "-CA", "ca.pem", "-CAkey", "ca.key", "-CAcreateserial",
+            "-days", "10", "-extfile", "san.ext", "-out", "leaf.pem")
+
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(str(tmp_path / "leaf.pem"), str(tmp_path / "leaf.key"))
+    server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0, ssl=context)
+    sessions = TlsSessionCache()
+    sessions.context(True).load_verify_locations(str(tmp_path / "ca.pem"))
+    try:
+        info = await sessions.handshake("127.0.0.1", server.sockets[0].getsockname()[1], "localhost", timeout=5.0)
+    finally:
+        server.close()
+
+    assert info["verified"] is True
+    assert info["chain_length"] == 2
+    leaf, root = info["chain"]
+    assert (leaf["subject"]["commonName"], leaf["issuer"]["commonName"]) == ("localhost", "Test Root")
+    assert root["subject"]["commonName"] == "Test Root"
+    assert leaf["not_after"] < root["not_after"]
+
+def test_assess_flags_legacy_protocol_and_expiry():
+    issues = assess({"protocol": "TLSv1", "cipher": "RC4-MD5", "cipher_bits": 40, "days_to_expiry": 5})
+
+    assert issues == ["Legacy protocol TLSv1", "Weak cipher RC4-MD5 (40 bits)", "Certificate expires in 5 days"]